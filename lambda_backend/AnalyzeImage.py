@@ -1,13 +1,25 @@
 import json
 import base64
-import boto3
+import math
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
+from decimal import Decimal
+from functools import partial
 
-# Boto3 클라이언트 초기화
-s3_client = boto3.client("s3")
-bedrock_runtime = boto3.client("bedrock-runtime")
-dynamodb = boto3.resource("dynamodb")
+from botocore.exceptions import ClientError
+
+from analysis_requests import release_analysis
+from aws_clients import get_client, get_table
+from analysis_cache import AnalysisCache, cache_version, image_phash
+from bedrock_limiter import AdmissionTimeout, BedrockLimiter, is_throttle_error
+from candidate_stream import CandidateStreamParser, iter_text_deltas
+from image_preprocess import normalize_image
+from image_thumbnails import ensure_thumbnails, parse_formats, parse_sizes
+from metrics import StageTimer, emit_metrics
+from result_codec import BLOB_ATTRIBUTE, compact_item, encode_payload
 
 # Lambda 환경 변수에서 리소스 이름 가져오기
 BUCKET_NAME = os.environ.get("BUCKET_NAME")
@@ -16,70 +28,86 @@ RESULTS_TABLE_NAME = os.environ.get(
     "RESULTS_TABLE_NAME"
 )  # 새로 추가 (예: 'analysis-results')
 
-# DynamoDB 테이블 객체 가져오기
-results_table = dynamodb.Table(RESULTS_TABLE_NAME)
-MAX_TOKENS = 1024
+# 분석 결과 캐시 테이블 (설정하지 않으면 캐시를 사용하지 않음)
+ANALYSIS_CACHE_TABLE_NAME = os.environ.get("ANALYSIS_CACHE_TABLE_NAME")
+ANALYSIS_CACHE_MAX_DISTANCE = int(os.environ.get("ANALYSIS_CACHE_MAX_DISTANCE", "4"))
+ANALYSIS_CACHE_TTL_SECONDS = int(
+    os.environ.get("ANALYSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+)
+ANALYSIS_CACHE_LRU_SIZE = int(os.environ.get("ANALYSIS_CACHE_LRU_SIZE", "256"))
 
+# Bedrock에 보내기 전 이미지 정규화 설정 (긴 변 최대 픽셀, JPEG 품질)
+IMAGE_MAX_EDGE = int(os.environ.get("IMAGE_MAX_EDGE", "1280"))
+IMAGE_JPEG_QUALITY = int(os.environ.get("IMAGE_JPEG_QUALITY", "85"))
 
-def run_multi_modal_prompt(image_bytes, prompt_text):
-    """
-    (이전 코드와 동일) Bedrock 멀티모달 모델을 호출합니다.
-    """
-    base64_image = base64.b64encode(image_bytes).decode("utf-8")
-    message = {
-        "role": "user",
-        "content": [
-            {
-                "type": "image",
-                "source": {
-                    "type": "base64",
-                    "media_type": "image/jpeg",
-                    "data": base64_image,
-                },
-            },
-            {"type": "text", "text": prompt_text},
-        ],
-    }
-    request_body = {
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": MAX_TOKENS,
-        "messages": [message],
-    }
-    try:
-        response = bedrock_runtime.invoke_model(
-            modelId=MODEL_ID, body=json.dumps(request_body)
-        )
-        response_body = json.loads(response.get("body").read())
-        return response_body.get("content", [{}])[0].get("text", "")
-    except Exception as e:
-        print(f"Error invoking Bedrock model: {e}")
-        raise
+# 한 배치 안의 메시지를 동시에 처리할 워커 수 (1이면 순차 처리)
+MAX_WORKERS = int(os.environ.get("MAX_WORKERS", "10"))
 
+# 한 번의 Bedrock 호출에 묶어 보낼 최대 이미지 수 (1이면 묶지 않음)
+PACK_MAX_IMAGES = int(os.environ.get("PACK_MAX_IMAGES", "1"))
 
-def lambda_handler(event, context):
-    """
-    SQS 메시지를 트리거로 받아 이미지 분석을 수행하고, 결과를 DynamoDB에 저장합니다.
-    """
-    # SQS는 여러 개의 메시지를 'Records' 리스트에 담아 전달할 수 있습니다.
-    for record in event.get("Records", []):
-        try:
-            # 1. SQS 메시지 Body를 파싱하여 작업 정보 추출
-            message_body = json.loads(record["body"])
-            analysis_id = message_body.get("analysisId")
-            object_key = message_body.get("objectKey")
+# 단일 이미지 분석을 스트리밍으로 받아, 후보가 하나씩 완성될 때마다 PARTIAL 상태로 저장
+STREAM_PARTIAL_RESULTS = os.environ.get("STREAM_PARTIAL_RESULTS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# 결과를 압축 형식(result_codec, resultBlob 속성)으로 저장
+# (GetAnalysisResult가 압축 형식을 읽을 수 있게 배포된 뒤에 켭니다)
+COMPACT_RESULTS = os.environ.get("COMPACT_RESULTS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# 결과 아이템 보관 기간 (초, TTL 속성 expiresAt). 0이면 만료시키지 않습니다.
+# 저장한 음식 기록은 food-logs에 따로 남으므로, 결과 아이템은 분석 직후에만 필요합니다.
+RESULT_TTL_SECONDS = int(os.environ.get("RESULT_TTL_SECONDS", str(3 * 24 * 3600)))
+
+# 분석하는 김에 음식 기록 목록/캘린더용 썸네일 생성 (image_thumbnails, thumbnails/ 접두사)
+# 정규화한 이미지에서 만들므로 원본을 다시 내려받거나 디코딩하지 않습니다.
+GENERATE_THUMBNAILS = os.environ.get("GENERATE_THUMBNAILS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+THUMBNAIL_SIZES = parse_sizes(os.environ.get("THUMBNAIL_SIZES", "160,480"))
+THUMBNAIL_FORMATS = parse_formats(os.environ.get("THUMBNAIL_FORMATS", "webp,jpeg"))
+
+# Bedrock 수락 제어 테이블 (설정하지 않으면 제한 없이 호출)
+BEDROCK_LIMITER_TABLE_NAME = os.environ.get("BEDROCK_LIMITER_TABLE_NAME")
+BEDROCK_REQUESTS_PER_MINUTE = float(os.environ.get("BEDROCK_REQUESTS_PER_MINUTE", "60"))
+BEDROCK_BURST = int(os.environ.get("BEDROCK_BURST", "5"))
+BEDROCK_MAX_CONCURRENCY = int(os.environ.get("BEDROCK_MAX_CONCURRENCY", "10"))
 
-            if not analysis_id or not object_key:
-                print(f"Skipping invalid message: {record['body']}")
-                continue
+# RequestAnalysis/EnqueueUploadAnalysis가 중복 분석을 막으려고 차지하는 멱등성 테이블
+# FAILED로 끝난 작업은 차지한 레코드를 지워, 사용자가 다시 요청하면 새로 분석하게 합니다.
+IDEMPOTENCY_TABLE_NAME = os.environ.get("IDEMPOTENCY_TABLE_NAME")
+# 큐 재전달 정책의 maxReceiveCount (이 횟수째 전달에서 실패하면 DLQ로 이동, 0이면 확인하지 않음)
+MAX_RECEIVE_COUNT = int(os.environ.get("MAX_RECEIVE_COUNT", "0"))
 
-            print(f"Processing analysis job: {analysis_id} for object: {object_key}")
+# 스로틀로 처리하지 못한 메시지를 다시 전달받기까지의 기본 대기 시간 (초)
+THROTTLE_RETRY_DELAY_SECONDS = int(os.environ.get("THROTTLE_RETRY_DELAY_SECONDS", "30"))
+# 결과를 저장할 시간을 남기기 위해 Lambda 제한 시간보다 이만큼 먼저 Bedrock 대기를 포기 (초)
+DEADLINE_MARGIN_SECONDS = 10
 
-            # 2. S3에서 이미지 가져오기
-            s3_object = s3_client.get_object(Bucket=BUCKET_NAME, Key=object_key)
-            image_bytes = s3_object["Body"].read()
+MAX_TOKENS = 1024
+
+# 단계별 소요 시간(timings 키) -> EMF 메트릭 이름
+STAGE_METRICS = {
+    "queueWait": "QueueWait",
+    "s3Download": "S3Download",
+    "normalize": "Normalize",
+    "cacheLookup": "CacheLookup",
+    "encode": "Encode",
+    "model": "ModelLatency",
+    "parse": "Parse",
+    "dynamoWrite": "DynamoWrite",
+    "endToEnd": "EndToEnd",
+}
 
-            # 3. Bedrock에 전달할 프롬프트 정의 (이전과 동일)
-            prompt = """
+# Bedrock에 전달할 프롬프트 정의
+ANALYSIS_PROMPT = """
             You are a helpful nutrition analysis assistant.
             Your task is to analyze the provided meal image and identify the 3 most likely dishes. For each dish, provide an estimation for the following nutritional values:
             1. Total calories (in kcal).
@@ -100,31 +128,756 @@ def lambda_handler(event, context):
             ]}
             """
 
-            # 4. Bedrock을 호출하여 AI 분석 수행
-            analysis_result_str = run_multi_modal_prompt(image_bytes, prompt)
+# 여러 이미지를 한 번에 분석할 때 사용하는 프롬프트 ({image_ids} 자리에 태그 목록)
+PACKED_ANALYSIS_PROMPT = """
+            You are a helpful nutrition analysis assistant.
+            Each meal image above is preceded by its tag ({image_ids}). For every image separately, identify the 3 most likely dishes. For each dish, provide an estimation for the following nutritional values:
+            1. Total calories (in kcal).
+            2. Protein (in grams).
+            3. Carbohydrates (in grams).
+            4. Fat (in grams).
+
+            Output Rules:
+            - You must respond with Raw JSON only. Do not include ```json```, markdown, or any surrounding text or explanations.
+            - The JSON must be an object keyed by image tag, with one entry for every tag, following the example below.
+            - For the 'name' field, capitalize the first letter of each word (e.g., 'Chicken Breast Salad').
+
+            Example JSON Structure:
+            {"img1": {"candidates": [
+                {"name": "Dish Name 1", "calories": 550, "protein": 25, "carbs": 60, "fat": 23},
+                {"name": "Dish Name 2", "calories": 600, "protein": 30, "carbs": 55, "fat": 28},
+                {"name": "Dish Name 3", "calories": 500, "protein": 20, "carbs": 70, "fat": 16}
+            ]},
+            "img2": {"candidates": [...]}}
+            """
+
+analysis_cache = None
+if ANALYSIS_CACHE_TABLE_NAME:
+    analysis_cache = AnalysisCache(
+        ANALYSIS_CACHE_TABLE_NAME,
+        version=cache_version(MODEL_ID, ANALYSIS_PROMPT),
+        max_distance=ANALYSIS_CACHE_MAX_DISTANCE,
+        ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS,
+        lru_size=ANALYSIS_CACHE_LRU_SIZE,
+    )
+
+# 묶음 프롬프트의 결과는 별도 버전으로 저장하여, 한쪽 프롬프트만 바뀌면 그 결과만 무효화합니다.
+packed_analysis_cache = None
+if ANALYSIS_CACHE_TABLE_NAME and PACK_MAX_IMAGES > 1:
+    packed_analysis_cache = AnalysisCache(
+        ANALYSIS_CACHE_TABLE_NAME,
+        version=cache_version(MODEL_ID, PACKED_ANALYSIS_PROMPT),
+        max_distance=ANALYSIS_CACHE_MAX_DISTANCE,
+        ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS,
+        lru_size=ANALYSIS_CACHE_LRU_SIZE,
+    )
+
+bedrock_limiter = None
+if BEDROCK_LIMITER_TABLE_NAME:
+    # Bedrock 할당량은 모델별이므로 모델 ID를 키로 사용합니다.
+    bedrock_limiter = BedrockLimiter(
+        BEDROCK_LIMITER_TABLE_NAME,
+        key=f"bedrock:{MODEL_ID}",
+        rate_per_second=BEDROCK_REQUESTS_PER_MINUTE / 60,
+        burst=BEDROCK_BURST,
+        max_concurrency=BEDROCK_MAX_CONCURRENCY,
+    )
+
+
+def image_block(image_bytes, media_type):
+    return {
+        "type": "image",
+        "source": {
+            "type": "base64",
+            "media_type": media_type,
+            "data": base64.b64encode(image_bytes).decode("utf-8"),
+        },
+    }
+
+
+def call_bedrock(invoke, deadline=None):
+    """
+    수락 제어를 설정했으면 허가를 받아(스로틀 시 백오프 후 재시도) invoke()를 호출하고,
+    아니면 바로 호출합니다. deadline은 time.monotonic 기준 마감 시각입니다.
+    """
+    if bedrock_limiter is None:
+        return invoke()
+    return bedrock_limiter.call(invoke, deadline or float("inf"))
+
+
+def invoke_bedrock(content, max_tokens=MAX_TOKENS, deadline=None, usage=None):
+    """
+    Bedrock 멀티모달 모델에 하나의 user 메시지를 보내고 응답 텍스트를 반환합니다.
+    usage(dict)를 넘기면 응답의 입력/출력 토큰 수를 채웁니다.
+    """
+    request_body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "messages": [{"role": "user", "content": content}],
+    }
+
+    def invoke():
+        response = get_client("bedrock-runtime").invoke_model(
+            modelId=MODEL_ID, body=json.dumps(request_body)
+        )
+        return json.loads(response.get("body").read())
+
+    try:
+        response_body = call_bedrock(invoke, deadline)
+        if usage is not None:
+            usage.update(response_body.get("usage", {}))
+        return response_body.get("content", [{}])[0].get("text", "")
+    except Exception as e:
+        print(f"Error invoking Bedrock model: {e}")
+        raise
+
+
+def invoke_bedrock_stream(
+    content, on_candidate, max_tokens=MAX_TOKENS, deadline=None, usage=None
+):
+    """
+    응답 스트림 API로 Bedrock을 호출하고 전체 응답 텍스트를 반환합니다.
+    응답의 후보 객체가 하나 완성될 때마다 지금까지의 후보 목록으로 on_candidate를 호출합니다.
+    """
+    request_body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "messages": [{"role": "user", "content": content}],
+    }
+
+    def invoke():
+        # 스트림 도중 스로틀되어 재시도하면 처음부터 다시 파싱합니다.
+        response = get_client("bedrock-runtime").invoke_model_with_response_stream(
+            modelId=MODEL_ID, body=json.dumps(request_body)
+        )
+        parser = CandidateStreamParser()
+        candidates = []
+        for text in iter_text_deltas(response.get("body"), usage):
+            completed = parser.feed(text)
+            if completed:
+                candidates.extend(completed)
+                on_candidate(list(candidates))
+        return parser.text
+
+    try:
+        return call_bedrock(invoke, deadline)
+    except Exception as e:
+        print(f"Error invoking Bedrock model (stream): {e}")
+        raise
+
+
+def run_multi_modal_prompt(
+    image_bytes,
+    prompt_text,
+    media_type="image/jpeg",
+    on_candidate=None,
+    deadline=None,
+    timer=None,
+    usage=None,
+):
+    """
+    Bedrock 멀티모달 모델을 호출합니다.
+    on_candidate를 넘기면 스트리밍으로 호출하여 완성된 후보를 그때그때 전달합니다.
+    timer(StageTimer)에는 base64 인코딩(encode)과 모델 호출(model) 시간이 기록됩니다.
+    """
+    timer = timer or StageTimer()
+    with timer.stage("encode"):
+        content = [
+            image_block(image_bytes, media_type),
+            {"type": "text", "text": prompt_text},
+        ]
+    with timer.stage("model"):
+        if on_candidate is not None:
+            return invoke_bedrock_stream(
+                content, on_candidate, deadline=deadline, usage=usage
+            )
+        return invoke_bedrock(content, deadline=deadline, usage=usage)
+
+
+def run_packed_prompt(jobs):
+    """
+    여러 이미지를 하나의 메시지에 태그와 함께 담아 한 번에 분석합니다.
+    {analysisId: 분석 결과} 형태로 반환하며, 응답에서 빠졌거나 형식이 잘못된 이미지는 제외합니다.
+    묶음 호출의 단계별 시간은 각 작업에 그대로, 토큰 수는 이미지 수로 나누어 기록합니다.
+    """
+    timer = StageTimer()
+    usage = {}
+    try:
+        tags = {}
+        with timer.stage("encode"):
+            content = []
+            for i, job in enumerate(jobs, start=1):
+                tag = f"img{i}"
+                tags[tag] = job["analysisId"]
+                content.append({"type": "text", "text": f"Image {tag}:"})
+                content.append(image_block(job["image"], job["mediaType"]))
+            content.append(
+                {
+                    "type": "text",
+                    "text": PACKED_ANALYSIS_PROMPT.replace(
+                        "{image_ids}", ", ".join(tags)
+                    ),
+                }
+            )
+
+        # 이미지 수만큼 출력 토큰 한도를 늘립니다. (마감 시각은 가장 이른 작업 기준)
+        deadlines = [job["deadline"] for job in jobs if job["deadline"] is not None]
+        with timer.stage("model"):
+            response_text = invoke_bedrock(
+                content,
+                max_tokens=MAX_TOKENS * len(jobs),
+                deadline=min(deadlines) if deadlines else None,
+                usage=usage,
+            )
+        with timer.stage("parse"):
+            packed = json.loads(response_text, parse_float=Decimal)
+    finally:
+        for job in jobs:
+            for name, milliseconds in timer.timings.items():
+                job["timer"].add(name, milliseconds)
+            record_usage(job, usage, len(jobs))
+    if not isinstance(packed, dict):
+        raise ValueError("Packed response is not a JSON object")
+
+    results = {}
+    for tag, analysis_id in tags.items():
+        entry = packed.get(tag)
+        if isinstance(entry, dict) and isinstance(entry.get("candidates"), list):
+            results[analysis_id] = entry
+    return results
+
+
+def record_usage(job, usage, share=1):
+    """
+    Bedrock 응답의 토큰 수를 작업에 더합니다. (묶음 호출은 share개로 나눔)
+    """
+    for source, target in (
+        ("input_tokens", "inputTokens"),
+        ("output_tokens", "outputTokens"),
+    ):
+        if source in usage:
+            job["usage"][target] = job["usage"].get(target, 0) + usage[source] // share
+
+
+def trace_context(record):
+    """
+    SQS 레코드에서 추적 정보를 꺼냅니다.
+    (SQS가 메시지를 받은 시각, RequestAnalysis가 붙인 요청 시각과 요청 ID)
+    """
+    attributes = record.get("messageAttributes") or {}
+
+    def attribute(name):
+        return (attributes.get(name) or {}).get("stringValue")
+
+    sent_at = (record.get("attributes") or {}).get("SentTimestamp")
+    requested_at = attribute("requestedAt")
+    return {
+        "sentAt": int(sent_at) if sent_at else None,
+        "requestedAt": int(requested_at) if requested_at else None,
+        "traceId": attribute("traceId"),
+    }
+
+
+def parse_job(record):
+    """
+    SQS 레코드에서 (analysisId, objectKey, groupId)를 꺼냅니다. 유효하지 않으면 None을 반환합니다.
+    groupId는 한 요청으로 함께 등록된 작업끼리 같은 값이며, 없으면 None입니다.
+    """
+    try:
+        message_body = json.loads(record["body"])
+    except (KeyError, TypeError, json.JSONDecodeError):
+        return None
+    if not isinstance(message_body, dict):
+        return None
+
+    analysis_id = message_body.get("analysisId")
+    object_key = message_body.get("objectKey")
+    if not analysis_id or not object_key:
+        return None
+    return analysis_id, object_key, message_body.get("groupId")
+
+
+def pack_jobs(jobs, pack_size):
+    """
+    작업을 pack_size개 이하의 묶음으로 나눕니다.
+    같은 groupId의 작업끼리 먼저 묶어, 한 끼에 함께 요청된 사진이 같은 Bedrock 호출에 들어가게 합니다.
+    groupId가 없는 작업들은 도착 순서대로 묶습니다.
+    """
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job.get("groupId"), []).append(job)
+    return [
+        members[i : i + pack_size]
+        for members in groups.values()
+        for i in range(0, len(members), pack_size)
+    ]
+
+
+def prepare_job(job):
+    """
+    S3에서 이미지를 가져와 정규화하고 캐시를 조회합니다. (워커 스레드에서 실행)
+    캐시에 결과가 있으면 job["result"]가 채워집니다.
+    """
+    analysis_id = job["analysisId"]
+    print(f"Processing analysis job: {analysis_id} for object: {job['objectKey']}")
+
+    timer = job["timer"]
+
+    # 1. S3에서 이미지 가져오기
+    with timer.stage("s3Download"):
+        s3_object = get_client("s3").get_object(
+            Bucket=BUCKET_NAME, Key=job["objectKey"]
+        )
+        image_bytes = s3_object["Body"].read()
+
+    # 2. 이미지 정규화 (EXIF 방향 적용, 축소, 메타데이터 없이 재인코딩)
+    with timer.stage("normalize"):
+        job["image"], job["mediaType"], image_stats = normalize_image(
+            image_bytes, max_edge=IMAGE_MAX_EDGE, quality=IMAGE_JPEG_QUALITY
+        )
+    print(
+        f"Normalized image for {analysis_id}: "
+        f"{image_stats['bytesIn']} -> {image_stats['bytesOut']} bytes "
+        f"({job['mediaType']})"
+    )
+
+    # 3. 캐시 조회: 같은(또는 거의 같은) 사진의 분석 결과가 있으면 Bedrock 호출을 생략
+    #    (단일 프롬프트 결과를 먼저, 없으면 묶음 프롬프트 결과를 조회)
+    job["result"] = None
+    with timer.stage("cacheLookup"):
+        job["phash"] = image_phash(job["image"]) if analysis_cache else None
+        if job["phash"] is not None:
+            for cache in (analysis_cache, packed_analysis_cache):
+                if cache is None or job["result"] is not None:
+                    continue
+                try:
+                    job["result"] = cache.lookup(job["phash"])
+                except Exception as e:
+                    print(f"Analysis cache lookup failed for {analysis_id}: {e}")
+    job["cacheHit"] = job["result"] is not None
+    if job["cacheHit"]:
+        print(f"Analysis cache hit for {analysis_id}")
+    return job
+
+
+def generate_thumbnails(job):
+    """
+    정규화한 이미지로 썸네일을 만들어 저장합니다. (워커 스레드에서 Bedrock 호출과 동시에 실행)
+    썸네일은 부가 기능이므로 실패해도 분석 결과에는 영향을 주지 않습니다.
+    """
+    try:
+        started = time.perf_counter()
+        written = ensure_thumbnails(
+            get_client("s3"),
+            BUCKET_NAME,
+            job["objectKey"],
+            job["image"],
+            THUMBNAIL_SIZES,
+            THUMBNAIL_FORMATS,
+        )
+        print(
+            f"Thumbnails for {job['analysisId']}: {written} written "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+    except Exception as e:
+        print(f"Failed to generate thumbnails for {job['analysisId']}: {e}")
+
+
+def publish_partial(job, candidates):
+    """
+    지금까지 완성된 후보들을 PARTIAL 상태로 결과 아이템에 저장합니다.
+    이미 COMPLETED(또는 다른 최종 상태)로 저장된 아이템은 덮어쓰지 않으며,
+    저장에 실패해도 분석 자체는 계속합니다. (최종 결과는 save_results가 저장)
+    """
+    result = {"candidates": candidates}
+    values = {
+        ":partial": "PARTIAL",
+        ":result": encode_payload({"result": result}) if COMPACT_RESULTS else result,
+        ":object_key": job["objectKey"],
+        ":updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    update_expression = (
+        "SET #status = :partial, #result = :result, "
+        "objectKey = :object_key, updatedAt = :updated_at"
+    )
+    if RESULT_TTL_SECONDS > 0:
+        # 분석이 끝나지 못하고 버려진 PARTIAL 아이템도 만료되게 합니다.
+        update_expression += ", expiresAt = :expires_at"
+        values[":expires_at"] = int(time.time()) + RESULT_TTL_SECONDS
+    try:
+        get_table(RESULTS_TABLE_NAME).update_item(
+            Key={"analysisId": job["analysisId"]},
+            UpdateExpression=update_expression,
+            ConditionExpression="attribute_not_exists(#status) OR #status = :partial",
+            ExpressionAttributeNames={
+                "#status": "status",
+                "#result": BLOB_ATTRIBUTE if COMPACT_RESULTS else "result",
+            },
+            ExpressionAttributeValues=values,
+        )
+        print(
+            f"Published {len(candidates)} partial candidate(s) for {job['analysisId']}"
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            print(f"Failed to publish partial result for {job['analysisId']}: {e}")
+    except Exception as e:
+        print(f"Failed to publish partial result for {job['analysisId']}: {e}")
+
+
+def analyze_jobs(jobs):
+    """
+    캐시에 없는 작업들을 Bedrock으로 분석합니다. (워커 스레드에서 실행)
+    작업이 여러 개면 한 번의 호출로 묶어 보내고, 묶음 응답이 잘못되었거나 일부가 빠지면
+    해당 이미지만 개별 호출로 다시 분석합니다. [(job, error)] 목록을 반환합니다.
+    """
+    results = {}
+    if len(jobs) > 1:
+        try:
+            results = run_packed_prompt(jobs)
+            print(f"Packed analysis returned {len(results)}/{len(jobs)} results.")
+        except Exception as e:
+            print(f"Packed analysis failed, falling back to single calls. Error: {e}")
+
+    outcomes = []
+    for job in jobs:
+        try:
+            result = results.get(job["analysisId"])
+            cache = analysis_cache if result is None else packed_analysis_cache
+            if result is None:
+                # Bedrock이 반환한 JSON 문자열을 파이썬 객체로 변환
+                # (DynamoDB는 float를 저장할 수 없으므로 실수는 Decimal로 파싱)
+                # 스트리밍 모드에서는 후보가 완성될 때마다 PARTIAL로 먼저 저장하고,
+                # 스트림이 끝난 뒤 전체 텍스트를 파싱한 결과를 최종 결과로 사용합니다.
+                on_candidate = None
+                if STREAM_PARTIAL_RESULTS:
+                    on_candidate = partial(publish_partial, job)
+                usage = {}
+                try:
+                    response_text = run_multi_modal_prompt(
+                        job["image"],
+                        ANALYSIS_PROMPT,
+                        job["mediaType"],
+                        on_candidate,
+                        job["deadline"],
+                        timer=job["timer"],
+                        usage=usage,
+                    )
+                finally:
+                    record_usage(job, usage)
+                with job["timer"].stage("parse"):
+                    result = json.loads(response_text, parse_float=Decimal)
+            job["result"] = result
+            outcomes.append((job, None))
+        except Exception as e:
+            outcomes.append((job, e))
+            continue
+
+        if job["phash"] is not None and cache is not None:
+            try:
+                cache.store(job["phash"], job["result"])
+            except Exception as e:
+                print(f"Analysis cache store failed for {job['analysisId']}: {e}")
+    return outcomes
+
+
+def finish_timings(job):
+    """
+    대기열 대기와 종단 간 시간을 계산하고, 단계별 시간을 정수 ms로 반환합니다.
+    """
+    now_ms = time.time() * 1000
+    timer = job["timer"]
+    if job["sentAt"] is not None:
+        timer.timings["queueWait"] = max(0, job["receivedAt"] - job["sentAt"])
+    if job["requestedAt"] is not None:
+        timer.timings["endToEnd"] = max(0, now_ms - job["requestedAt"])
+    return {name: int(round(value)) for name, value in timer.timings.items()}
+
+
+def build_item(job):
+    """
+    DynamoDB에 저장할 아이템을 구성합니다.
+    timings는 결과를 저장하기 직전까지의 단계별 시간(ms)입니다.
+    """
+    item = {
+        "analysisId": job["analysisId"],  # 파티션 키
+        "status": "COMPLETED",  # 분석 상태
+        "result": job["result"],  # 분석 결과 (JSON 객체)
+        "objectKey": job["objectKey"],  # 원본 이미지 키
+        "updatedAt": datetime.now(timezone.utc).isoformat(),
+        "cacheHit": job["cacheHit"],
+        "timings": finish_timings(job),
+    }
+    if job["usage"]:
+        item["tokenUsage"] = job["usage"]
+    if RESULT_TTL_SECONDS > 0:
+        item["expiresAt"] = int(time.time()) + RESULT_TTL_SECONDS
+    # 압축 형식이면 result/timings/tokenUsage를 resultBlob 하나로 저장합니다.
+    return compact_item(item) if COMPACT_RESULTS else item
 
-            # Bedrock이 반환한 JSON 문자열을 파이썬 객체로 변환
-            analysis_data = json.loads(analysis_result_str)
 
-            # 5. DynamoDB에 저장할 아이템 구성
-            timestamp = datetime.now(timezone.utc).isoformat()
+def emit_job_metrics(job, status):
+    """
+    작업 하나의 단계별 시간과 토큰 수를 모델 ID 차원의 EMF 메트릭으로 출력합니다.
+    """
+    timings = finish_timings(job)
+    metrics = {
+        metric: timings[stage]
+        for stage, metric in STAGE_METRICS.items()
+        if stage in timings
+    }
+    metrics["InputTokens"] = job["usage"].get("inputTokens")
+    metrics["OutputTokens"] = job["usage"].get("outputTokens")
+    units = {metric: "Milliseconds" for metric in STAGE_METRICS.values()}
+    emit_metrics(
+        metrics,
+        units=units,
+        dimensions={"ModelId": MODEL_ID},
+        properties={
+            "analysisId": job["analysisId"],
+            "groupId": job["groupId"],
+            "traceId": job["traceId"],
+            "status": status,
+            "cacheHit": job.get("cacheHit", False),
+        },
+    )
 
-            item_to_save = {
-                "analysisId": analysis_id,  # 파티션 키
-                "status": "COMPLETED",  # 분석 상태
-                "result": analysis_data,  # 분석 결과 (JSON 객체)
-                "objectKey": object_key,  # 원본 이미지 키
-                "updatedAt": timestamp,
+
+def save_results(items):
+    """
+    분석 결과들을 하나의 DynamoDB 배치 쓰기로 저장합니다.
+    batch_writer가 25개 단위 분할과 UnprocessedItems 재시도를 처리합니다.
+    """
+    # 같은 analysisId가 한 배치에 중복으로 들어와도(SQS 중복 전달) 배치 쓰기가 실패하지 않도록 합니다.
+    results_table = get_table(RESULTS_TABLE_NAME)
+    with results_table.batch_writer(overwrite_by_pkeys=["analysisId"]) as batch:
+        for item in items:
+            batch.put_item(Item=item)
+
+
+def queue_url_from_arn(queue_arn):
+    """
+    arn:aws:sqs:<region>:<account>:<name> 형식의 큐 ARN을 큐 URL로 바꿉니다.
+    """
+    _, _, _, region, account, name = queue_arn.split(":")
+    return f"https://sqs.{region}.amazonaws.com/{account}/{name}"
+
+
+def defer_message(job, delay_seconds):
+    """
+    메시지의 가시성 제한 시간을 delay_seconds로 바꿉니다. 스로틀로 처리하지 못한 메시지를
+    실패로 보고할 때 호출하여, 큐의 기본 가시성 제한 시간이 아니라 백오프 뒤에
+    (여러 메시지가 동시에 몰리지 않도록 지터를 더해) 다시 전달되게 합니다.
+    """
+    delay = math.ceil(delay_seconds * random.uniform(1.0, 1.5))
+    try:
+        get_client("sqs").change_message_visibility(
+            QueueUrl=queue_url_from_arn(job["eventSourceARN"]),
+            ReceiptHandle=job["receiptHandle"],
+            VisibilityTimeout=max(1, min(delay, 43200)),
+        )
+        print(f"Deferred message {job['messageId']} by {delay}s (Bedrock throttled)")
+    except Exception as e:
+        print(f"Failed to defer message {job['messageId']}. Error: {e}")
+
+
+def is_final_attempt(job):
+    """
+    이번 전달이 DLQ로 옮겨지기 전 마지막 시도인지 확인합니다.
+    """
+    return MAX_RECEIVE_COUNT > 0 and job["receiveCount"] >= MAX_RECEIVE_COUNT
+
+
+def failure_code(error):
+    """
+    작업 준비(S3 다운로드, 정규화) 중 난 오류가 다시 시도해도 성공할 수 없는 오류면
+    클라이언트에 돌려줄 오류 코드를, 아니면 None을 반환합니다.
+    """
+    if isinstance(error, ClientError):
+        if error.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+            return "IMAGE_NOT_FOUND"
+        return None
+    if isinstance(error, ValueError):
+        return "UNSUPPORTED_IMAGE"
+    return None
+
+
+def save_failure(job):
+    """
+    더 이상 재시도하지 않는 작업을 FAILED 상태로 저장하여, 폴링하는 클라이언트가 기다리지 않게
+    합니다. 이미 COMPLETED로 저장된 아이템(중복 전달)은 덮어쓰지 않습니다.
+    같은 사진을 다시 요청하면 새로 분석하도록 멱등성 레코드도 지웁니다. (지우지 못해도 TTL이 지나면 풀림)
+    """
+    item = {
+        "analysisId": job["analysisId"],
+        "status": "FAILED",
+        "errorCode": job.get("failureCode") or "ANALYSIS_FAILED",
+        "objectKey": job["objectKey"],
+        "updatedAt": datetime.now(timezone.utc).isoformat(),
+    }
+    if RESULT_TTL_SECONDS > 0:
+        item["expiresAt"] = int(time.time()) + RESULT_TTL_SECONDS
+    try:
+        get_table(RESULTS_TABLE_NAME).put_item(
+            Item=item,
+            ConditionExpression="attribute_not_exists(#status) OR #status = :partial",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={":partial": "PARTIAL"},
+        )
+        print(f"Saved FAILED status for {job['analysisId']} ({item['errorCode']})")
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            print(f"Failed to save FAILED status for {job['analysisId']}: {e}")
+    except Exception as e:
+        print(f"Failed to save FAILED status for {job['analysisId']}: {e}")
+
+    if IDEMPOTENCY_TABLE_NAME:
+        try:
+            release_analysis(get_table(IDEMPOTENCY_TABLE_NAME), job["objectKey"])
+        except Exception as e:
+            print(f"Failed to release analysis claim for {job['objectKey']}: {e}")
+
+
+def lambda_handler(event, context):
+    """
+    SQS 메시지를 트리거로 받아 이미지 분석을 수행하고, 결과를 DynamoDB에 저장합니다.
+    배치 안의 메시지는 워커 풀에서 동시에 처리하며, 실패한 메시지만 batchItemFailures로
+    반환하여 SQS가 해당 메시지만 다시 전달하도록 합니다.
+    (이벤트 소스 매핑에 ReportBatchItemFailures 설정이 필요합니다.)
+    """
+    # Bedrock 허가를 기다릴 수 있는 마감 시각 (결과 저장 시간을 남김)
+    deadline = None
+    if context is not None:
+        deadline = (
+            time.monotonic()
+            + context.get_remaining_time_in_millis() / 1000
+            - DEADLINE_MARGIN_SECONDS
+        )
+
+    # SQS는 여러 개의 메시지를 'Records' 리스트에 담아 전달할 수 있습니다.
+    jobs = []
+    for record in event.get("Records", []):
+        job = parse_job(record)
+        if job is None:
+            # 재시도해도 성공할 수 없는 메시지이므로 실패로 보고하지 않고 건너뜁니다.
+            print(f"Skipping invalid message: {record.get('body')}")
+            continue
+        analysis_id, object_key, group_id = job
+        jobs.append(
+            {
+                **trace_context(record),
+                "receivedAt": time.time() * 1000,
+                "timer": StageTimer(),
+                "usage": {},
+                "messageId": record.get("messageId"),
+                "receiptHandle": record.get("receiptHandle"),
+                "eventSourceARN": record.get("eventSourceARN"),
+                "receiveCount": int(
+                    (record.get("attributes") or {}).get("ApproximateReceiveCount", 1)
+                ),
+                "analysisId": analysis_id,
+                "objectKey": object_key,
+                "groupId": group_id,
+                "deadline": deadline,
             }
+        )
+
+    failed_message_ids = []
+    completed = []
+    thumbnail_executor = None
 
-            # 6. DynamoDB에 결과 저장
-            results_table.put_item(Item=item_to_save)
-            print(f"Successfully saved analysis result for {analysis_id} to DynamoDB.")
+    if jobs:
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(MAX_WORKERS, len(jobs)))
+        ) as executor:
+            # 1. 워커 풀에서 S3 다운로드 + 정규화 + 캐시 조회를 동시에 수행
+            futures = {executor.submit(prepare_job, job): job for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Failed to process message {job['messageId']}. Error: {e}")
+                    failed_message_ids.append(job["messageId"])
+                    job["failureCode"] = failure_code(e)
 
+            prepared = [
+                job for job in jobs if job["messageId"] not in failed_message_ids
+            ]
+            completed = [job for job in prepared if job["cacheHit"]]
+            # 썸네일은 별도 풀에서 Bedrock 호출과 동시에 만들고, 결과 저장 뒤에 완료를 기다립니다.
+            if GENERATE_THUMBNAILS and prepared:
+                thumbnail_executor = ThreadPoolExecutor(
+                    max_workers=max(1, min(MAX_WORKERS, len(prepared)))
+                )
+                for job in prepared:
+                    thumbnail_executor.submit(generate_thumbnails, job)
+            pending = [job for job in prepared if not job["cacheHit"]]
+
+            # 2. 캐시에 없는 작업을 PACK_MAX_IMAGES개씩(같은 groupId끼리 먼저) 묶어
+            #    Bedrock 호출을 동시에 수행
+            packs = pack_jobs(pending, max(1, PACK_MAX_IMAGES))
+            futures = [executor.submit(analyze_jobs, pack) for pack in packs]
+            for future in as_completed(futures):
+                for job, error in future.result():
+                    if error is None:
+                        completed.append(job)
+                        continue
+                    print(
+                        f"Failed to process message {job['messageId']}. Error: {error}"
+                    )
+                    failed_message_ids.append(job["messageId"])
+                    # 스로틀로 처리하지 못한 메시지는 백오프 뒤에 다시 전달되게 합니다.
+                    if isinstance(error, AdmissionTimeout):
+                        defer_message(job, error.retry_after)
+                    elif is_throttle_error(error):
+                        defer_message(job, THROTTLE_RETRY_DELAY_SECONDS)
+
+    # 3. 성공한 결과를 한 번의 배치 쓰기로 저장
+    if completed:
+        write_timer = StageTimer()
+        try:
+            with write_timer.stage("dynamoWrite"):
+                save_results([build_item(job) for job in completed])
+            print(f"Successfully saved {len(completed)} analysis results to DynamoDB.")
         except Exception as e:
-            # 개별 메시지 처리 중 에러 발생 시 로그를 남기고 다음 메시지로 넘어갑니다.
-            # 에러 발생 시 SQS가 재시도하도록 하려면 여기서 에러를 다시 raise 해야 합니다.
-            print(f"Failed to process message {record.get('messageId')}. Error: {e}")
-            # raise e # 재시도하려면 이 줄의 주석을 해제
+            # 저장에 실패하면 해당 메시지들도 모두 재시도 대상으로 보고합니다.
+            print(f"Failed to save analysis results. Error: {e}")
+            failed_message_ids.extend(job["messageId"] for job in completed)
+        for job in completed:
+            job["timer"].add("dynamoWrite", write_timer.timings["dynamoWrite"])
 
-    return {"statusCode": 200, "body": json.dumps("Processing complete.")}
+    if thumbnail_executor:
+        thumbnail_executor.shutdown(wait=True)
+
+    # 4. 더 이상 재시도하지 않는 실패(이미지가 없거나 읽을 수 없음, 마지막 시도)는 FAILED로 저장
+    #    이미지 문제는 다시 시도해도 실패하므로 재시도 대상에서 뺍니다.
+    given_up = set()
+    for job in jobs:
+        if job["messageId"] not in failed_message_ids:
+            continue
+        if job.get("failureCode") or is_final_attempt(job):
+            save_failure(job)
+        if job.get("failureCode"):
+            given_up.add(job["messageId"])
+
+    # 5. 작업별 단계 시간/토큰 수 메트릭 (저장 시간과 저장 후 종단 간 시간 포함)
+    for job in jobs:
+        emit_job_metrics(
+            job, "FAILED" if job["messageId"] in failed_message_ids else "COMPLETED"
+        )
+
+    if analysis_cache:
+        print(f"Analysis cache stats: {analysis_cache.stats()}")
+    if packed_analysis_cache:
+        print(f"Packed analysis cache stats: {packed_analysis_cache.stats()}")
+    if bedrock_limiter:
+        bedrock_limiter.flush_metrics(dimensions={"ModelId": MODEL_ID})
+
+    return {
+        "batchItemFailures": [
+            {"itemIdentifier": message_id}
+            for message_id in failed_message_ids
+            if message_id not in given_up
+        ]
+    }
@@ -0,0 +1,93 @@
+import os
+from datetime import datetime
+from urllib.parse import unquote_plus
+
+from analysis_requests import (
+    build_job_message,
+    claim_analysis,
+    parse_auto_analyze_key,
+    release_analysis,
+)
+from aws_clients import get_client, get_table
+
+# Lambda 환경 변수에서 리소스 이름 가져오기
+SQS_QUEUE_URL = os.environ.get("SQS_QUEUE_URL")
+IDEMPOTENCY_TABLE_NAME = os.environ.get("IDEMPOTENCY_TABLE_NAME")
+# 차지 레코드 보관 기간: AnalyzeImage 결과 보관 기간(RESULT_TTL_SECONDS)보다 짧게 두어,
+# 기존 analysisId를 돌려줄 때 그 결과가 아직 남아 있게 합니다.
+ANALYSIS_CLAIM_TTL_SECONDS = int(
+    os.environ.get("ANALYSIS_CLAIM_TTL_SECONDS", str(24 * 3600))
+)
+
+
+def trace_attributes(record):
+    """
+    종단 간 지연 추적용 SQS 메시지 속성 (업로드 완료 시각 ms, S3 요청 ID)
+    """
+    try:
+        uploaded_at = datetime.fromisoformat(record["eventTime"].replace("Z", "+00:00"))
+        requested_at = int(uploaded_at.timestamp() * 1000)
+    except (KeyError, AttributeError, ValueError):
+        return {}
+    attributes = {
+        "requestedAt": {"DataType": "Number", "StringValue": str(requested_at)}
+    }
+    request_id = record.get("responseElements", {}).get("x-amz-request-id")
+    if request_id:
+        attributes["traceId"] = {"DataType": "String", "StringValue": request_id}
+    return attributes
+
+
+def lambda_handler(event, context):
+    """
+    S3 객체 생성 이벤트(uploads/auto/ 접두사)를 받아 분석 작업을 SQS에 등록합니다.
+    analysisId는 UploadImage가 객체 키에 미리 넣어 두었으므로, 클라이언트는 업로드 후
+    RequestAnalysis를 호출하지 않고 바로 결과를 폴링할 수 있습니다.
+    """
+    counts = {"enqueued": 0, "duplicates": 0, "ignored": 0}
+
+    # 1. 이벤트에서 분석할 객체 고르기
+    jobs = []
+    for record in event.get("Records", []):
+        if not record.get("eventName", "").startswith("ObjectCreated:"):
+            counts["ignored"] += 1
+            continue
+        # S3 이벤트의 객체 키는 URL 인코딩되어 있습니다. (공백은 '+')
+        object_key = unquote_plus(record["s3"]["object"]["key"])
+        parsed = parse_auto_analyze_key(object_key)
+        if parsed is None:
+            print(f"Ignoring object outside the auto-analyze layout: {object_key}")
+            counts["ignored"] += 1
+            continue
+        jobs.append((parsed[1], object_key, record))
+
+    # 2. 같은 객체의 작업이 이미 등록되었으면(이벤트 중복, RequestAnalysis 호출) 건너뛰기
+    for analysis_id, object_key, record in jobs:
+        if IDEMPOTENCY_TABLE_NAME:
+            _, claimed = claim_analysis(
+                get_table(IDEMPOTENCY_TABLE_NAME),
+                object_key,
+                analysis_id,
+                ANALYSIS_CLAIM_TTL_SECONDS,
+            )
+            if not claimed:
+                print(f"Analysis already requested for {object_key}")
+                counts["duplicates"] += 1
+                continue
+
+        # 3. RequestAnalysis와 같은 형식으로 SQS에 등록
+        #    실패하면 차지한 레코드를 지우고 예외를 던져 S3 비동기 호출이 재시도하게 합니다.
+        try:
+            get_client("sqs").send_message(
+                QueueUrl=SQS_QUEUE_URL,
+                MessageBody=build_job_message(analysis_id, object_key),
+                MessageAttributes=trace_attributes(record),
+            )
+        except Exception:
+            if IDEMPOTENCY_TABLE_NAME:
+                release_analysis(get_table(IDEMPOTENCY_TABLE_NAME), object_key)
+            raise
+        print(f"Successfully enqueued analysis job. ID: {analysis_id}")
+        counts["enqueued"] += 1
+
+    return counts
@@ -1,40 +1,77 @@
 import json
-import boto3
 import os
-from decimal import Decimal  # Decimal 타입을 사용하기 위해 import
+import time
+
+from aws_clients import get_table
+from result_codec import decode_item
+from serialization import etag_for, etag_matches, json_response, not_modified
 
-# DynamoDB 리소스 초기화
-dynamodb = boto3.resource("dynamodb")
 RESULTS_TABLE_NAME = os.environ.get("RESULTS_TABLE_NAME")
-table = dynamodb.Table(RESULTS_TABLE_NAME)
+
+# 롱 폴링(?wait=N) 최대 대기 시간 (API Gateway 통합 타임아웃 30초보다 짧게)
+MAX_WAIT_SECONDS = float(os.environ.get("MAX_WAIT_SECONDS", "20"))
+# 롱 폴링 재조회 간격 (처음 간격, 최대 간격, 증가 배수)
+POLL_INITIAL_DELAY = 0.1
+POLL_MAX_DELAY = 0.5
+POLL_BACKOFF = 1.5
 
 
-# --- [수정된 부분 1] ---
-# Decimal 타입을 JSON으로 변환하기 위한 커스텀 인코더 클래스
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        # obj가 Decimal 타입인지 확인
-        if isinstance(obj, Decimal):
-            # 정수인지 실수인지 확인하여 변환
-            if obj % 1 == 0:
-                return int(obj)
-            else:
-                return float(obj)
-        # 그 외의 타입은 기본 인코더에게 맡김
-        return super(DecimalEncoder, self).default(obj)
+def item_etag(item):
+    """
+    결과 아이템의 ETag (status와 updatedAt으로 계산, updatedAt이 없는 이전 아이템은 None)
+    """
+    if not item.get("updatedAt"):
+        return None
+    return etag_for(item["analysisId"], item.get("status"), item["updatedAt"])
 
 
-# --- 수정 끝 ---
+def wait_for_item(analysis_id, wait_seconds, context=None, event=None):
+    """
+    결과 아이템이 생길 때까지 최대 wait_seconds 동안 강한 일관성 읽기로 재조회합니다.
+    재조회 간격은 짧게 시작해서 점점 늘려, 결과가 저장되면 빠르게 응답하면서도
+    대기 중 읽기 횟수를 줄입니다. 아이템이 없으면 None을 반환합니다.
+    스트리밍 분석 중인 PARTIAL 아이템도 바로 반환하여 첫 후보를 빨리 보여줄 수 있게 합니다.
+    event의 If-None-Match가 현재 아이템과 일치하면 아이템이 바뀔 때까지 계속 기다립니다.
+    """
+    deadline = time.monotonic() + wait_seconds
+    if context is not None:
+        # Lambda 제한 시간 전에 응답할 수 있도록 1초 여유를 둡니다.
+        lambda_deadline = (
+            time.monotonic() + context.get_remaining_time_in_millis() / 1000 - 1
+        )
+        deadline = min(deadline, lambda_deadline)
+
+    delay = POLL_INITIAL_DELAY
+    while True:
+        response = get_table(RESULTS_TABLE_NAME).get_item(
+            Key={"analysisId": analysis_id}, ConsistentRead=True
+        )
+        item = response.get("Item")
+        if item is not None and not etag_matches(event, item_etag(item)):
+            return item
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return item
+        time.sleep(min(delay, remaining))
+        delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
 
 
 def lambda_handler(event, context):
     """
     analysisId를 기반으로 DynamoDB에서 분석 결과를 조회합니다.
+    ?wait=N을 붙이면 결과가 나올 때까지 최대 N초 동안 기다렸다가 응답합니다(롱 폴링).
+    분석이 진행 중이면 status가 PARTIAL이고 result.candidates에 지금까지 완성된 후보가 담기며,
+    클라이언트는 COMPLETED(또는 FAILED)가 될 때까지 계속 폴링합니다.
+    FAILED는 더 이상 재시도하지 않는 분석이며 errorCode(IMAGE_NOT_FOUND, UNSUPPORTED_IMAGE,
+    ANALYSIS_FAILED)가 담깁니다. 같은 사진을 다시 요청하면 새로 분석합니다.
+    응답의 ETag를 If-None-Match로 보내면 그 사이 바뀌지 않은 결과는 본문 없이 304로 응답합니다.
     """
     headers = {
         "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Headers": "Content-Type,Authorization",
+        "Access-Control-Allow-Headers": "Content-Type,Authorization,If-None-Match",
         "Access-Control-Allow-Methods": "GET,OPTIONS",
+        "Access-Control-Expose-Headers": "ETag",
     }
 
     if event.get("requestContext", {}).get("http", {}).get("method") == "OPTIONS":
@@ -52,18 +89,36 @@ def lambda_handler(event, context):
                 ),
             }
 
-        response = table.get_item(Key={"analysisId": analysis_id})
-
-        if "Item" in response:
-            item = response["Item"]
+        params = event.get("queryStringParameters") or {}
+        try:
+            wait_seconds = min(float(params.get("wait", 0)), MAX_WAIT_SECONDS)
+        except ValueError:
             return {
-                "statusCode": 200,
+                "statusCode": 400,
                 "headers": headers,
-                # --- [수정된 부분 2] ---
-                # json.dumps 호출 시, 위에서 만든 DecimalEncoder를 cls 파라미터로 지정
-                "body": json.dumps(item, cls=DecimalEncoder),
-                # --- 수정 끝 ---
+                "body": json.dumps({"error": "Bad Request: wait must be a number."}),
             }
+
+        if wait_seconds > 0:
+            item = wait_for_item(analysis_id, wait_seconds, context, event)
+        else:
+            item = (
+                get_table(RESULTS_TABLE_NAME)
+                .get_item(Key={"analysisId": analysis_id})
+                .get("Item")
+            )
+
+        if item is not None:
+            # 클라이언트가 가진 결과와 같으면 본문을 만들지 않습니다.
+            etag = item_etag(item)
+            if etag is not None:
+                if etag_matches(event, etag):
+                    return not_modified(etag, headers)
+                headers = {**headers, "ETag": etag}
+            # 압축 형식(resultBlob)이면 result/timings/tokenUsage로 되돌리고,
+            # Decimal 등 DynamoDB 타입을 숫자로 변환하여 직렬화
+            # (PARTIAL 아이템도 같은 형태로 지금까지의 후보를 반환)
+            return json_response(200, decode_item(item), headers, event)
         else:
             return {
                 "statusCode": 202,
@@ -1,28 +1,277 @@
+import base64
 import json
 import os
-import boto3
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, time, timedelta
 import pytz  # 시간대 처리를 위한 라이브러리
+from boto3.dynamodb.conditions import Key
+
+from aws_clients import get_table
+from daily_rollups import get_log_version, kst_day, to_rollup_row
+from foodlog_keys import ENTRY_KEY, day_key_range, entry_range_query
+from serialization import dumps, etag_for, etag_matches, json_response, not_modified
 
-# DynamoDB 리소스 초기화
-dynamodb = boto3.resource("dynamodb")
 TABLE_NAME = os.environ.get("TABLE_NAME", "food-logs")
-table = dynamodb.Table(TABLE_NAME)
+
+# 일자별 영양소 합계 테이블 (캘린더 view=daily 조회용)
+ROLLUP_TABLE_NAME = os.environ.get("ROLLUP_TABLE_NAME")
+
+# 식사 시각 기준 키를 쓰는 v2 테이블 (foodlog_keys)과 읽기 모드
+# - legacy: 기존 테이블로 응답 (기본값)
+# - shadow: 기존 테이블로 응답하고, v2 테이블에도 같은 기록이 있는지 확인하여 로그로 남김
+# - v2: v2 테이블로 응답 (지난 식사도 식사 날짜에 나오고, meal_type 조회는 인덱스를 사용
+#       ETC처럼 인덱스에 없는 식사 종류는 날짜 범위를 읽어 거름)
+FOODLOG_V2_TABLE_NAME = os.environ.get("FOODLOG_V2_TABLE_NAME")
+FOODLOG_READ_MODE = os.environ.get("FOODLOG_READ_MODE", "legacy").lower()
 
 # 한국 시간대 설정
 KST = pytz.timezone("Asia/Seoul")
 
+# 전체 조회(mode=full) 설정: 일자 구간 동시 조회 수, 응답 본문 바이트 예산
+SEGMENT_WORKERS = int(os.environ.get("SEGMENT_WORKERS", "8"))
+MAX_RESPONSE_BYTES = int(os.environ.get("MAX_RESPONSE_BYTES", "1000000"))
+
+# 목록/캘린더 화면이 사용하는 필드 (mode=full에서 ProjectionExpression으로 사용)
+VIEW_FIELDS = (
+    "log_id",
+    "food_name",
+    "calories",
+    "protein",
+    "carbs",
+    "fat",
+    "meal_type",
+    "eaten_at",
+    "image_url",
+    "thumbnail_urls",
+)
+
+
+def query_daily_rollups(user_id, start_day, end_day):
+    """
+    기간 내 일자별 rollup 행을 날짜순으로 조회합니다.
+    """
+    rows = []
+    query_params = {
+        "KeyConditionExpression": Key("user_id").eq(user_id)
+        & Key("day").between(start_day, end_day),
+    }
+    while True:
+        response = get_table(ROLLUP_TABLE_NAME).query(**query_params)
+        rows.extend(to_rollup_row(item) for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return rows
+        query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def to_log_id_range(start_dt_kst, end_dt_kst):
+    """
+    KST 시간 범위를 log_id(UTC ISO 문자열) 정렬 키 범위로 변환합니다.
+    """
+    start_log_id = start_dt_kst.astimezone(pytz.utc).isoformat()
+    # 마지막 시각 이후 '#'이 붙은 ID들까지 포함하기 위해 ZZZ를 붙여줍니다.
+    end_log_id = (
+        end_dt_kst.astimezone(pytz.utc).isoformat().replace("+00:00", "Z") + "ZZZ"
+    )
+    return start_log_id, end_log_id
+
+
+def day_segments(start_dt_kst, end_dt_kst):
+    """
+    조회 범위를 KST 하루 단위의 log_id 구간 목록으로 나눕니다. (구간끼리 겹치지 않고 순서대로)
+    """
+    segments = []
+    current = start_dt_kst
+    while current <= end_dt_kst:
+        next_day = KST.localize(
+            datetime.combine(current.date() + timedelta(days=1), time.min)
+        )
+        segment_end = min(next_day - timedelta(microseconds=1), end_dt_kst)
+        segments.append(to_log_id_range(current, segment_end))
+        current = next_day
+    return segments
+
+
+def v2_day_segments(start_dt_kst, end_dt_kst):
+    """
+    조회 범위를 KST 하루 단위의 entry_key 구간 목록으로 나눕니다. (v2 테이블)
+    """
+    days = (end_dt_kst.date() - start_dt_kst.date()).days + 1
+    return [
+        day_key_range(day, day)
+        for day in (
+            (start_dt_kst.date() + timedelta(days=i)).isoformat() for i in range(days)
+        )
+    ]
+
+
+def query_segment(
+    user_id, start_key, end_key, fields, after_key=None, meal_type=None, v2=False
+):
+    """
+    정렬 키 구간 하나를 끝까지 페이지네이션하며 필요한 필드만 조회합니다.
+    (v2면 entry_key 구간, meal_type이 있으면 meal-type-index를 조회)
+    """
+    names = {f"#f{i}": field for i, field in enumerate(fields)}
+    if v2:
+        table_name, sort_key = FOODLOG_V2_TABLE_NAME, ENTRY_KEY
+        query_params = entry_range_query(user_id, start_key, end_key, meal_type)
+    else:
+        table_name, sort_key = TABLE_NAME, "log_id"
+        query_params = {
+            "KeyConditionExpression": Key("user_id").eq(user_id)
+            & Key("log_id").between(start_key, end_key),
+        }
+    query_params.update(
+        {
+            "ProjectionExpression": ", ".join(names),
+            "ExpressionAttributeNames": names,
+            "ScanIndexForward": True,
+        }
+    )
+    items = []
+    while True:
+        response = get_table(table_name).query(**query_params)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    if after_key:
+        items = [item for item in items if item[sort_key] > after_key]
+    if meal_type and not v2:
+        # 기존 테이블에는 식사 종류 인덱스가 없으므로 읽은 뒤 거릅니다.
+        items = [item for item in items if item.get("meal_type") == meal_type]
+    return items
+
+
+def encode_cursor(after_key, sort_key="log_id"):
+    return base64.urlsafe_b64encode(
+        json.dumps({"after": after_key, "key": sort_key}).encode()
+    ).decode()
+
+
+def decode_cursor(cursor, sort_key="log_id"):
+    """
+    커서에서 마지막으로 반환한 정렬 키 값을 꺼냅니다. 잘못된 커서거나 다른 테이블(정렬 키)의
+    커서면 ValueError를 발생시킵니다. (key가 없는 커서는 기존 log_id 커서)
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        after_key = payload["after"]
+        cursor_key = payload.get("key", "log_id")
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(after_key, str) or cursor_key != sort_key:
+        raise ValueError("Invalid cursor")
+    return after_key
+
+
+def query_full_range(
+    user_id, segments, fields, after_key=None, meal_type=None, v2=False
+):
+    """
+    일자 구간들을 동시에 조회하고 정렬 키 순서로 합칩니다.
+    응답이 MAX_RESPONSE_BYTES를 넘으면 더 읽지 않고 잘라내어 이어서 조회할 커서를 반환합니다.
+    """
+    sort_key = ENTRY_KEY if v2 else "log_id"
+
+    # 커서가 있으면 마지막으로 반환한 정렬 키 이후 구간만 조회합니다.
+    if after_key:
+        segments = [
+            (max(start, after_key), end) for start, end in segments if end > after_key
+        ]
+
+    # 구간을 순서대로 최대 SEGMENT_WORKERS개씩 앞서 조회하고, 응답 예산을 채우면
+    # 남은 구간은 조회하지 않습니다.
+    items = []
+    size = 0
+    remaining = iter(segments)
+    in_flight = deque()
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(SEGMENT_WORKERS, len(segments)))
+    ) as executor:
+
+        def submit_next():
+            segment = next(remaining, None)
+            if segment:
+                in_flight.append(
+                    executor.submit(
+                        query_segment,
+                        user_id,
+                        segment[0],
+                        segment[1],
+                        fields,
+                        after_key,
+                        meal_type,
+                        v2,
+                    )
+                )
+
+        for _ in range(SEGMENT_WORKERS):
+            submit_next()
+        while in_flight:
+            for item in in_flight.popleft().result():
+                item_size = len(dumps(item)) + 1
+                if items and size + item_size > MAX_RESPONSE_BYTES:
+                    for future in in_flight:
+                        future.cancel()
+                    return items, encode_cursor(items[-1][sort_key], sort_key)
+                items.append(item)
+                size += item_size
+            submit_next()
+    return items, None
+
+
+def shadow_compare(user_id, start_dt_kst, end_dt_kst, items):
+    """
+    shadow 모드: 기존 테이블로 응답한 기록이 v2 테이블의 같은 KST 날짜 범위에도 있는지 확인하고
+    결과를 로그로 남깁니다. (이중 쓰기/이전 누락 확인용, 실패해도 응답에는 영향 없음)
+    기존 테이블은 저장 시각 기준이라, 나중에 기록한 지난 식사는 v2에만 있는 것이 정상입니다.
+    """
+    try:
+        start_day = start_dt_kst.date().isoformat()
+        end_day = end_dt_kst.date().isoformat()
+        v2_items, _ = query_full_range(
+            user_id,
+            v2_day_segments(start_dt_kst, end_dt_kst),
+            (ENTRY_KEY, "log_id"),
+            v2=True,
+        )
+        v2_log_ids = {item["log_id"] for item in v2_items}
+        missing = [
+            item["log_id"]
+            for item in items
+            if item.get("eaten_at")
+            and start_day <= kst_day(item["eaten_at"]) <= end_day
+            and item["log_id"] not in v2_log_ids
+        ]
+        print(
+            f"Food log shadow read for {user_id} {start_day}..{end_day}: "
+            f"legacy {len(items)}, v2 {len(v2_items)}, missing in v2 {len(missing)}"
+            + (f" (e.g. {missing[:3]})" if missing else "")
+        )
+    except Exception as e:
+        print(f"Food log shadow read failed for {user_id}: {e}")
+
 
 def lambda_handler(event, context):
     """
     사용자의 음식 기록을 조회하는 API.
     - 쿼리 파라미터 없이 호출 시: 오늘 날짜의 기록 조회
     - ?year=YYYY&month=MM 호출 시: 해당 연월의 기록 조회
+    - ?year=YYYY&month=MM&view=daily 호출 시: 해당 연월의 일자별 합계(최대 31행) 조회
+    - mode=full 추가 시: 범위 전체를 서버에서 한 번에 조회 (fields로 필드 선택,
+      응답이 너무 크면 next_cursor를 cursor로 넘겨 이어서 조회)
+    - meal_type 추가 시: 해당 식사 종류의 기록만 조회 (예: 오늘 아침)
+    ROLLUP_TABLE_NAME이 설정되어 있으면 사용자의 기록 버전으로 ETag를 만들고,
+    If-None-Match가 일치하면 조회 없이 304를 반환합니다.
     """
     headers = {
         "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Headers": "Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token",
+        "Access-Control-Allow-Headers": "Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,If-None-Match",
         "Access-Control-Allow-Methods": "GET,OPTIONS",
+        "Access-Control-Expose-Headers": "ETag",
     }
 
     try:
@@ -46,6 +295,9 @@ def lambda_handler(event, context):
         params = event.get("queryStringParameters") or {}
         year_str = params.get("year")
         month_str = params.get("month")
+        meal_type = params.get("meal_type")
+        read_v2 = bool(FOODLOG_V2_TABLE_NAME) and FOODLOG_READ_MODE == "v2"
+        shadow = bool(FOODLOG_V2_TABLE_NAME) and FOODLOG_READ_MODE == "shadow"
 
         # 3. 조회할 시간 범위 결정
         now_kst = datetime.now(KST)
@@ -79,54 +331,139 @@ def lambda_handler(event, context):
                 hour=23, minute=59, second=59, microsecond=999999
             )
 
-        # 4. DynamoDB 쿼리를 위해 UTC로 변환 후 ISO 형식 문자열로 변환
-        start_dt_utc = start_dt_kst.astimezone(pytz.utc)
-        end_dt_utc = end_dt_kst.astimezone(pytz.utc)
+        # 조건부 요청: 기록 버전, 조회 범위, 쿼리 파라미터가 같으면 응답도 같습니다.
+        response_headers = headers
+        if ROLLUP_TABLE_NAME:
+            etag = etag_for(
+                user_id,
+                get_log_version(get_table(ROLLUP_TABLE_NAME), user_id),
+                start_dt_kst.date().isoformat(),
+                end_dt_kst.date().isoformat(),
+                sorted(params.items()),
+                # 읽는 테이블에 따라 지난 식사가 들어가는 날짜가 다릅니다.
+                "v2" if read_v2 else "legacy",
+            )
+            if etag_matches(event, etag):
+                return not_modified(etag, headers)
+            response_headers = {**headers, "ETag": etag}
 
-        # ulid 변환 없이 바로 isoformat() 사용
-        start_log_id = start_dt_utc.isoformat()
+        # 캘린더용 일자별 합계 조회: 원본 기록 대신 rollup 행만 읽습니다.
+        if (
+            year_str
+            and month_str
+            and params.get("view") == "daily"
+            and ROLLUP_TABLE_NAME
+        ):
+            days = query_daily_rollups(
+                user_id,
+                start_dt_kst.date().isoformat(),
+                end_dt_kst.date().isoformat(),
+            )
+            return json_response(200, {"days": days}, response_headers, event)
 
-        # 월간 조회 시, 마지막 날의 가장 끝 시간을 포함하기 위해 ZZZ를 붙여줍니다.
-        # 이렇게 하면 '2025-06-30T23:59:59.999999' 이후, '#'이 붙은 ID들까지 모두 포함됩니다.
-        end_log_id = end_dt_utc.isoformat().replace("+00:00", "Z") + "ZZZ"
+        # 범위 전체 조회: 일자 구간을 동시에 조회하여 한 번의 응답으로 반환합니다.
+        if params.get("mode") == "full":
+            fields = VIEW_FIELDS
+            if params.get("fields"):
+                requested = params["fields"].split(",")
+                fields = ("log_id",) + tuple(
+                    field
+                    for field in VIEW_FIELDS
+                    if field in requested and field != "log_id"
+                )
+            # v2 커서는 entry_key로 이어서 조회합니다.
+            if read_v2:
+                fields = (ENTRY_KEY,) + fields
+            try:
+                after_key = (
+                    decode_cursor(params["cursor"], ENTRY_KEY if read_v2 else "log_id")
+                    if params.get("cursor")
+                    else None
+                )
+            except ValueError:
+                return {
+                    "statusCode": 400,
+                    "headers": headers,
+                    "body": json.dumps({"error": "Invalid cursor"}),
+                }
+            if read_v2:
+                segments = v2_day_segments(start_dt_kst, end_dt_kst)
+            else:
+                segments = day_segments(start_dt_kst, end_dt_kst)
+            items, next_cursor = query_full_range(
+                user_id, segments, fields, after_key, meal_type, v2=read_v2
+            )
+            if shadow and not after_key and not next_cursor:
+                shadow_compare(user_id, start_dt_kst, end_dt_kst, items)
+            return json_response(
+                200,
+                {"items": items, "next_cursor": next_cursor},
+                response_headers,
+                event,
+            )
 
-        # 5. 페이지네이션 처리
+        # 4. 페이지네이션 처리
         # 클라이언트가 다음 페이지를 요청할 때 보낸 last_key를 받음
         exclusive_start_key = None
         last_key_str = params.get("last_key")
         if last_key_str:
             exclusive_start_key = json.loads(last_key_str)
+            # 읽기 모드가 바뀌기 전에 받은 last_key는 다른 테이블의 키입니다.
+            if not isinstance(exclusive_start_key, dict) or (
+                (ENTRY_KEY in exclusive_start_key) != read_v2
+            ):
+                return {
+                    "statusCode": 400,
+                    "headers": headers,
+                    "body": json.dumps({"error": "Invalid last_key"}),
+                }
 
-        # 6. DynamoDB 쿼리 실행
-        query_params = {
-            "KeyConditionExpression": "user_id = :uid AND log_id BETWEEN :start AND :end",
-            "ExpressionAttributeValues": {
-                ":uid": user_id,
-                ":start": start_log_id,
-                ":end": end_log_id,
-            },
-            "ScanIndexForward": True,  # 시간순 (오름차순)으로 정렬
-        }
+        # 5. DynamoDB 쿼리 구성
+        if read_v2:
+            # v2 테이블: KST 날짜가 정렬 키 앞부분이므로 날짜 범위가 곧 키 범위입니다.
+            table_name = FOODLOG_V2_TABLE_NAME
+            query_params = entry_range_query(
+                user_id,
+                *day_key_range(
+                    start_dt_kst.date().isoformat(), end_dt_kst.date().isoformat()
+                ),
+                meal_type,
+            )
+        else:
+            # 기존 테이블: UTC ISO 형식 log_id 범위로 변환
+            table_name = TABLE_NAME
+            start_log_id, end_log_id = to_log_id_range(start_dt_kst, end_dt_kst)
+            query_params = {
+                "KeyConditionExpression": "user_id = :uid AND log_id BETWEEN :start AND :end",
+                "ExpressionAttributeValues": {
+                    ":uid": user_id,
+                    ":start": start_log_id,
+                    ":end": end_log_id,
+                },
+            }
+        query_params["ScanIndexForward"] = True  # 시간순 (오름차순)으로 정렬
 
         if exclusive_start_key:
             query_params["ExclusiveStartKey"] = exclusive_start_key
 
-        response = table.query(**query_params)
+        # 6. DynamoDB 쿼리 실행
+        response = get_table(table_name).query(**query_params)
+        items = response.get("Items", [])
+        if meal_type and not read_v2:
+            # 기존 테이블에는 식사 종류 인덱스가 없으므로 읽은 뒤 거릅니다.
+            items = [item for item in items if item.get("meal_type") == meal_type]
+        if shadow and not exclusive_start_key and "LastEvaluatedKey" not in response:
+            shadow_compare(user_id, start_dt_kst, end_dt_kst, items)
 
         # 7. 응답 데이터 구성
         # 다음 페이지가 있는 경우, LastEvaluatedKey를 클라이언트에 전달
         result = {
-            "items": response.get("Items", []),
+            "items": items,
             "last_evaluated_key": response.get("LastEvaluatedKey", None),
         }
 
-        return {
-            "statusCode": 200,
-            "headers": headers,
-            "body": json.dumps(
-                result, default=str
-            ),  # Decimal 타입 등을 위해 default=str
-        }
+        # Decimal은 문자열이 아닌 숫자로 직렬화 (앱은 숫자/문자열 모두 처리)
+        return json_response(200, result, response_headers, event)
 
     except Exception as e:
         print(f"Internal Server Error: {e}")
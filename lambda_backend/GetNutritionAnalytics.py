@@ -0,0 +1,322 @@
+import json
+import os
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+
+import pytz  # 시간대 처리를 위한 라이브러리
+from boto3.dynamodb.conditions import Key
+
+from aws_clients import get_client, get_table
+from daily_rollups import kst_day, period_fingerprint
+from foodlog_keys import ENTRY_KEY, day_key_range, entry_range_query
+from nutrition_analytics import (
+    compute_period_analytics,
+    parse_day,
+    targets_from_attributes,
+)
+from profile_cache import ProfileCache
+from serialization import json_response
+
+TABLE_NAME = os.environ.get("TABLE_NAME", "food-logs")
+ROLLUP_TABLE_NAME = os.environ.get("ROLLUP_TABLE_NAME")
+USER_POOL_ID = os.environ.get("USER_POOL_ID")
+
+# 지난 기간의 계산 결과 캐시 (선택 사항, 파티션 키 user_id / 정렬 키 periodKey, TTL expiresAt)
+ANALYTICS_CACHE_TABLE_NAME = os.environ.get("ANALYTICS_CACHE_TABLE_NAME")
+ANALYTICS_CACHE_TTL_SECONDS = int(
+    os.environ.get("ANALYTICS_CACHE_TTL_SECONDS", str(30 * 24 * 3600))
+)
+
+# 조회 기간 제한과 기본값
+DEFAULT_PERIOD_DAYS = 30
+MAX_PERIOD_DAYS = int(os.environ.get("ANALYTICS_MAX_PERIOD_DAYS", "366"))
+DEFAULT_WINDOW = 7
+MAX_WINDOW = 31
+
+# 식사 시각 기준 키를 쓰는 v2 테이블 (GetFoodlog와 같은 설정, FOODLOG_READ_MODE=v2일 때 사용)
+FOODLOG_V2_TABLE_NAME = os.environ.get("FOODLOG_V2_TABLE_NAME")
+READ_V2 = bool(FOODLOG_V2_TABLE_NAME) and (
+    os.environ.get("FOODLOG_READ_MODE", "legacy").lower() == "v2"
+)
+
+CHUNK_DAYS = 7
+CHUNK_WORKERS = int(os.environ.get("SEGMENT_WORKERS", "8"))
+
+# 계산에 필요한 필드만 읽습니다.
+LOG_FIELDS = (
+    ENTRY_KEY if READ_V2 else "log_id",
+    "calories",
+    "protein",
+    "carbs",
+    "fat",
+    "meal_type",
+    "eaten_at",
+    "created_at",
+)
+
+KST = pytz.timezone("Asia/Seoul")
+
+profile_cache = ProfileCache(table_name=os.environ.get("PROFILE_CACHE_TABLE_NAME"))
+
+
+def load_targets(user_sub):
+    """
+    사용자의 목표 섭취량을 프로필 캐시(없으면 Cognito)에서 읽습니다. 실패하면 빈 dict를 반환합니다.
+    """
+    try:
+        user_attributes, username, _, version = profile_cache.get(user_sub)
+        if user_attributes is None:
+            response = get_client("cognito-idp").admin_get_user(
+                UserPoolId=USER_POOL_ID, Username=user_sub
+            )
+            user_attributes = response["UserAttributes"]
+            profile_cache.put(user_sub, user_attributes, response["Username"], version)
+        return targets_from_attributes(user_attributes)
+    except Exception as e:
+        print(f"Failed to load targets for {user_sub}: {e}")
+        return {}
+
+
+def query_chunk(table_name, key_condition):
+    names = {f"#f{i}": field for i, field in enumerate(LOG_FIELDS)}
+    query_params = {
+        "KeyConditionExpression": key_condition,
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+    items = []
+    while True:
+        response = get_table(table_name).query(**query_params)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            return items
+        query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def v2_chunks(user_id, start_day, end_day):
+    """
+    v2 테이블은 정렬 키가 먹은 시각(KST)이므로 기간을 CHUNK_DAYS일씩 나눈 키 범위만 읽습니다.
+    """
+    chunks = []
+    current = start_day
+    while current <= end_day:
+        chunk_end = min(current + timedelta(days=CHUNK_DAYS - 1), end_day)
+        chunks.append(
+            entry_range_query(
+                user_id, *day_key_range(current.isoformat(), chunk_end.isoformat())
+            )["KeyConditionExpression"]
+        )
+        current = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def legacy_chunks(user_id, start_day, now_kst):
+    """
+    기존 테이블은 log_id가 저장 시각이고 지난 식사는 며칠, 몇 주 뒤에도 기록할 수 있으므로,
+    기간 시작 전날부터 지금까지 저장한 기록을 CHUNK_DAYS일 단위로 읽습니다.
+    (오래된 기간일수록 읽는 양이 늘지만, 끝난 기간은 rollup 지문으로 검증한 캐시를 사용합니다)
+    """
+    range_start = KST.localize(
+        datetime.combine(start_day - timedelta(days=1), time.min)
+    )
+    chunks = []
+    current = range_start
+    while current < now_kst:
+        chunk_end = min(current + timedelta(days=CHUNK_DAYS), now_kst)
+        chunks.append(
+            Key("user_id").eq(user_id)
+            & Key("log_id").between(
+                current.astimezone(pytz.utc).isoformat(),
+                # 마지막 시각 이후 '#'이 붙은 ID들까지 포함하기 위해 ZZZ를 붙여줍니다.
+                (chunk_end - timedelta(microseconds=1))
+                .astimezone(pytz.utc)
+                .isoformat()
+                .replace("+00:00", "Z")
+                + "ZZZ",
+            )
+        )
+        current = chunk_end
+    return chunks
+
+
+def query_period_logs(user_id, start_day, end_day, now_kst):
+    """
+    기간에 먹은(eaten_at 기준) 기록을 읽습니다.
+    키 범위를 CHUNK_DAYS 단위로 나눠 동시에 조회한 뒤 먹은 일자로 거릅니다.
+    """
+    # 1. 읽을 키 범위 (v2: 기간의 먹은 시각, 기존: 기간 시작 전날 ~ 지금의 저장 시각)
+    if READ_V2:
+        table_name = FOODLOG_V2_TABLE_NAME
+        chunks = v2_chunks(user_id, start_day, end_day)
+    else:
+        table_name = TABLE_NAME
+        chunks = legacy_chunks(user_id, start_day, now_kst)
+    if not chunks:
+        return []
+
+    # 2. 동시 조회
+    with ThreadPoolExecutor(max_workers=min(CHUNK_WORKERS, len(chunks))) as executor:
+        pages = executor.map(lambda chunk: query_chunk(table_name, chunk), chunks)
+
+    # 3. 먹은 일자(KST)로 필터링
+    start, end = start_day.isoformat(), end_day.isoformat()
+    items = []
+    for page in pages:
+        for item in page:
+            eaten_at = item.get("eaten_at") or item.get("created_at")
+            try:
+                day = kst_day(eaten_at)
+            except (AttributeError, TypeError, ValueError):
+                continue
+            if start <= day <= end:
+                items.append({**item, "day": day})
+    return items
+
+
+def cached_analytics(user_id, period_key, fingerprint, targets):
+    """
+    지문과 목표가 같은 캐시 결과가 있으면 반환합니다.
+    """
+    item = (
+        get_table(ANALYTICS_CACHE_TABLE_NAME)
+        .get_item(Key={"user_id": user_id, "periodKey": period_key})
+        .get("Item")
+    )
+    if (
+        item
+        and item.get("fingerprint") == fingerprint
+        and item.get("targets") == json.dumps(targets, sort_keys=True)
+    ):
+        return json.loads(item["body"])
+    return None
+
+
+def store_analytics(user_id, period_key, fingerprint, targets, result):
+    get_table(ANALYTICS_CACHE_TABLE_NAME).put_item(
+        Item={
+            "user_id": user_id,
+            "periodKey": period_key,
+            "fingerprint": fingerprint,
+            "targets": json.dumps(targets, sort_keys=True),
+            "body": json.dumps(result),
+            "expiresAt": int(time_module.time()) + ANALYTICS_CACHE_TTL_SECONDS,
+        }
+    )
+
+
+def lambda_handler(event, context):
+    """
+    기간별 섭취 분석 API.
+    - ?start=YYYY-MM-DD&end=YYYY-MM-DD (기본: 오늘까지 최근 30일, 최대 366일)
+    - window=N: 이동 평균 일수 (기본 7, 1~31)
+    일자별 합계/이동 평균/목표 대비 편차, 주/월 평균, 끼니별 분포를 한 번에 반환합니다.
+    오늘 이전에 끝난 기간은 rollup 지문으로 검증한 캐시 결과를 반환합니다.
+    """
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token",
+        "Access-Control-Allow-Methods": "GET,OPTIONS",
+    }
+
+    if event.get("requestContext", {}).get("http", {}).get("method") == "OPTIONS":
+        return {"statusCode": 204, "headers": headers, "body": ""}
+
+    try:
+        # 1. 사용자 인증 정보 가져오기
+        claims = (
+            event.get("requestContext", {})
+            .get("authorizer", {})
+            .get("jwt", {})
+            .get("claims", {})
+        )
+        user_id = claims.get("sub")
+
+        if not user_id:
+            return {
+                "statusCode": 401,
+                "headers": headers,
+                "body": json.dumps({"error": "Unauthorized"}),
+            }
+
+        # 2. 쿼리 파라미터 파싱
+        params = event.get("queryStringParameters") or {}
+        now_kst = datetime.now(KST)
+        today = now_kst.date()
+        try:
+            end_day = parse_day(params["end"]) if params.get("end") else today
+            start_day = (
+                parse_day(params["start"])
+                if params.get("start")
+                else end_day - timedelta(days=DEFAULT_PERIOD_DAYS - 1)
+            )
+            window = int(params.get("window") or DEFAULT_WINDOW)
+        except (ValueError, TypeError):
+            return {
+                "statusCode": 400,
+                "headers": headers,
+                "body": json.dumps({"error": "Invalid start, end or window"}),
+            }
+        period_days = (end_day - start_day).days + 1
+        if period_days < 1 or period_days > MAX_PERIOD_DAYS:
+            return {
+                "statusCode": 400,
+                "headers": headers,
+                "body": json.dumps(
+                    {"error": f"Period must be 1 to {MAX_PERIOD_DAYS} days"}
+                ),
+            }
+        if not 1 <= window <= MAX_WINDOW:
+            return {
+                "statusCode": 400,
+                "headers": headers,
+                "body": json.dumps({"error": f"window must be 1 to {MAX_WINDOW}"}),
+            }
+
+        # 3. 목표 섭취량
+        targets = load_targets(user_id)
+
+        # 4. 지난 기간이면 캐시 확인 (기간 안의 rollup version이 같으면 재사용)
+        cacheable = end_day < today and ANALYTICS_CACHE_TABLE_NAME and ROLLUP_TABLE_NAME
+        period_key = f"{start_day.isoformat()}:{end_day.isoformat()}:{window}"
+        fingerprint = None
+        if cacheable:
+            try:
+                fingerprint = period_fingerprint(
+                    get_table(ROLLUP_TABLE_NAME),
+                    user_id,
+                    start_day.isoformat(),
+                    end_day.isoformat(),
+                )
+                result = cached_analytics(user_id, period_key, fingerprint, targets)
+                if result is not None:
+                    return json_response(
+                        200, result, {**headers, "X-Cache": "HIT"}, event
+                    )
+            except Exception as e:
+                print(f"Analytics cache lookup failed for {user_id}: {e}")
+
+        # 5. 기간의 기록을 읽어 한 번에 계산
+        items = query_period_logs(user_id, start_day, end_day, now_kst)
+        result = compute_period_analytics(items, start_day, end_day, targets, window)
+
+        if fingerprint is not None:
+            try:
+                store_analytics(user_id, period_key, fingerprint, targets, result)
+            except Exception as e:
+                print(f"Analytics cache store failed for {user_id}: {e}")
+
+        return json_response(
+            200,
+            result,
+            {**headers, "X-Cache": "MISS" if cacheable else "BYPASS"},
+            event,
+        )
+
+    except Exception as e:
+        print(f"Internal Server Error: {e}")
+        return {
+            "statusCode": 500,
+            "headers": headers,
+            "body": json.dumps({"error": "Internal Server Error"}),
+        }
@@ -1,10 +1,78 @@
 import json
-import boto3
 import os
 
-cognito_client = boto3.client("cognito-idp")
+from aws_clients import get_client
+from profile_cache import ProfileCache
+
 USER_POOL_ID = os.environ.get("USER_POOL_ID")
 
+# 프로필 캐시 설정 (공유 캐시 테이블이 없으면 캐시하지 않고 매번 Cognito를 호출)
+PROFILE_CACHE_TABLE_NAME = os.environ.get("PROFILE_CACHE_TABLE_NAME")
+PROFILE_CACHE_LOCAL_TTL_SECONDS = int(
+    os.environ.get("PROFILE_CACHE_LOCAL_TTL_SECONDS", "30")
+)
+PROFILE_CACHE_SHARED_TTL_SECONDS = int(
+    os.environ.get("PROFILE_CACHE_SHARED_TTL_SECONDS", "3600")
+)
+
+profile_cache = ProfileCache(
+    table_name=PROFILE_CACHE_TABLE_NAME,
+    local_ttl_seconds=PROFILE_CACHE_LOCAL_TTL_SECONDS,
+    shared_ttl_seconds=PROFILE_CACHE_SHARED_TTL_SECONDS,
+)
+
+
+def build_profile(user_attributes, username):
+    """
+    Cognito 사용자 속성으로 항상 완전한 형태의 프로필 dict를 만듭니다.
+    """
+    # 1. 반환할 프로필의 기본 형태(템플릿)를 정의합니다. (모든 키 포함, 값은 None)
+    default_profile = {
+        "sub": None,
+        "email": None,
+        "email_verified": None,
+        "birthdate": None,
+        "gender": None,
+        "height": None,
+        "weight": None,
+        "activity_level": None,
+        "goal": None,
+        "target_calories": None,
+        "target_carbs": None,
+        "target_protein": None,
+        "target_fats": None,
+    }
+
+    # 2. Cognito 응답에서 실제로 존재하는 값들로 템플릿을 업데이트합니다.
+    for attr in user_attributes:
+        key = attr["Name"].replace("custom:", "")
+
+        # 템플릿에 해당 키가 있을 경우에만 값을 업데이트
+        if key in default_profile:
+            value = attr["Value"]
+            # 숫자 변환 로직 (이전과 동일)
+            if key in [
+                "height",
+                "weight",
+                "target_calories",
+                "target_carbs",
+                "target_protein",
+                "target_fats",
+            ]:
+                try:
+                    value = int(value)
+                except ValueError:
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        pass
+
+            default_profile[key] = value
+
+    # Cognito 응답의 Username ('sub')도 추가해줍니다.
+    default_profile["sub"] = username
+    return default_profile
+
 
 def lambda_handler(event, context):
     headers = {
@@ -26,66 +94,36 @@ def lambda_handler(event, context):
         }
 
     try:
-        response = cognito_client.admin_get_user(
-            UserPoolId=USER_POOL_ID, Username=user_sub
-        )
-
-        # --- [수정된 부분] ---
-
-        # 1. 반환할 프로필의 기본 형태(템플릿)를 정의합니다. (모든 키 포함, 값은 None)
-        default_profile = {
-            "sub": None,
-            "email": None,
-            "email_verified": None,
-            "birthdate": None,
-            "gender": None,
-            "height": None,
-            "weight": None,
-            "activity_level": None,
-            "goal": None,
-            "target_calories": None,
-            "target_carbs": None,
-            "target_protein": None,
-            "target_fats": None,
-        }
+        # 1. 캐시 조회 (웜 컨테이너 -> 공유 캐시 순서)
+        user_attributes, username, cache_tier, version = None, None, "miss", 0
+        try:
+            user_attributes, username, cache_tier, version = profile_cache.get(user_sub)
+        except Exception as e:
+            print(f"Profile cache lookup failed for {user_sub}: {e}")
 
-        # 2. Cognito 응답에서 실제로 존재하는 값들로 템플릿을 업데이트합니다.
-        for attr in response["UserAttributes"]:
-            key = attr["Name"].replace("custom:", "")
-
-            # 템플릿에 해당 키가 있을 경우에만 값을 업데이트
-            if key in default_profile:
-                value = attr["Value"]
-                # 숫자 변환 로직 (이전과 동일)
-                if key in [
-                    "height",
-                    "weight",
-                    "target_calories",
-                    "target_carbs",
-                    "target_protein",
-                    "target_fats",
-                ]:
-                    try:
-                        value = int(value)
-                    except ValueError:
-                        try:
-                            value = float(value)
-                        except ValueError:
-                            pass
+        # 2. 캐시에 없으면 Cognito에서 조회 후 캐시에 저장
+        if user_attributes is None:
+            response = get_client("cognito-idp").admin_get_user(
+                UserPoolId=USER_POOL_ID, Username=user_sub
+            )
+            user_attributes = response["UserAttributes"]
+            username = response["Username"]
+            try:
+                profile_cache.put(user_sub, user_attributes, username, version)
+            except Exception as e:
+                print(f"Profile cache store failed for {user_sub}: {e}")
 
-                default_profile[key] = value
-
-        # Cognito 응답의 Username ('sub')도 추가해줍니다.
-        default_profile["sub"] = response["Username"]
-        # --- 수정 끝 ---
+        print(f"Profile cache {cache_tier}: {profile_cache.stats()}")
 
         return {
             "statusCode": 200,
-            "headers": headers,
-            "body": json.dumps(default_profile),  # 항상 완전한 형태의 프로필을 반환
+            "headers": {**headers, "X-Cache": cache_tier.upper()},
+            "body": json.dumps(
+                build_profile(user_attributes, username)
+            ),  # 항상 완전한 형태의 프로필을 반환
         }
 
-    except cognito_client.exceptions.UserNotFoundException:
+    except get_client("cognito-idp").exceptions.UserNotFoundException:
         return {
             "statusCode": 404,
             "headers": headers,
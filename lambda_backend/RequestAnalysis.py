@@ -1,25 +1,164 @@
 import json
-import boto3
 import os
+import time
 import uuid
 
-# Boto3 클라이언트 초기화
-sqs_client = boto3.client("sqs")
+from analysis_requests import (
+    build_job_message,
+    claim_analysis,
+    parse_auto_analyze_key,
+    release_analysis,
+    send_job_batches,
+)
+from aws_clients import get_client, get_table
 
 # Lambda 환경 변수에서 리소스 이름 가져오기
 SQS_QUEUE_URL = os.environ.get("SQS_QUEUE_URL")
 
+# 같은 객체의 중복 분석 방지 (선택 사항, SaveAnalysis와 같은 멱등성 테이블)
+IDEMPOTENCY_TABLE_NAME = os.environ.get("IDEMPOTENCY_TABLE_NAME")
+# 차지 레코드 보관 기간: AnalyzeImage 결과 보관 기간(RESULT_TTL_SECONDS)보다 짧게 두어,
+# 기존 analysisId를 돌려줄 때 그 결과가 아직 남아 있게 합니다.
+ANALYSIS_CLAIM_TTL_SECONDS = int(
+    os.environ.get("ANALYSIS_CLAIM_TTL_SECONDS", str(24 * 3600))
+)
+
+# 한 번에 요청할 수 있는 최대 이미지 수, 배치 전송 실패 항목 재시도 횟수
+MAX_OBJECT_KEYS = int(os.environ.get("MAX_OBJECT_KEYS", "20"))
+SEND_MAX_ATTEMPTS = int(os.environ.get("SEND_MAX_ATTEMPTS", "3"))
+
+
+def trace_attributes(event):
+    """
+    종단 간 지연 추적용 SQS 메시지 속성을 만듭니다. (요청 수신 시각 ms, API 요청 ID)
+    API Gateway가 요청을 받은 시각(timeEpoch)이 있으면 그 시각을 사용합니다.
+    """
+    request_context = event.get("requestContext", {})
+    requested_at = request_context.get("timeEpoch") or int(time.time() * 1000)
+    attributes = {
+        "requestedAt": {"DataType": "Number", "StringValue": str(requested_at)}
+    }
+    request_id = request_context.get("requestId")
+    if request_id:
+        attributes["traceId"] = {"DataType": "String", "StringValue": request_id}
+    return attributes
+
+
+def request_many(event, object_keys, headers):
+    """
+    여러 이미지의 분석 작업을 같은 groupId로 묶어 send_message_batch로 등록합니다.
+    {objectKey: analysisId}를 반환하며, 끝내 등록하지 못한 키는 failed에 담습니다.
+    """
+    group_id = str(uuid.uuid4())
+    analysis_ids = {}
+    entries = []
+    attributes = trace_attributes(event)
+
+    # 1. 키별 analysisId 결정 (이미 등록된 객체는 기존 ID를 그대로 사용)
+    #    차지 도중 예외가 나면 이번 요청에서 차지한 레코드를 지워, 메시지 없이 남지 않게 합니다.
+    try:
+        for index, object_key in enumerate(object_keys):
+            parsed = parse_auto_analyze_key(object_key)
+            analysis_id = parsed[1] if parsed else str(uuid.uuid4())
+            if IDEMPOTENCY_TABLE_NAME:
+                analysis_id, claimed = claim_analysis(
+                    get_table(IDEMPOTENCY_TABLE_NAME),
+                    object_key,
+                    analysis_id,
+                    ANALYSIS_CLAIM_TTL_SECONDS,
+                )
+                if not claimed:
+                    print(f"Analysis already requested. ID: {analysis_id}")
+                    analysis_ids[object_key] = analysis_id
+                    continue
+            analysis_ids[object_key] = analysis_id
+            entries.append(
+                {
+                    "Id": str(index),
+                    "MessageBody": build_job_message(analysis_id, object_key, group_id),
+                    "MessageAttributes": attributes,
+                }
+            )
+    except Exception:
+        if IDEMPOTENCY_TABLE_NAME:
+            for entry in entries:
+                release_analysis(
+                    get_table(IDEMPOTENCY_TABLE_NAME), object_keys[int(entry["Id"])]
+                )
+        raise
+
+    # 2. 10개씩 배치 전송 (실패한 항목만 재시도)
+    failed = []
+    if entries:
+        failed_ids = send_job_batches(
+            get_client("sqs"), SQS_QUEUE_URL, entries, SEND_MAX_ATTEMPTS
+        )
+        for entry_id in failed_ids:
+            object_key = object_keys[int(entry_id)]
+            failed.append(object_key)
+            del analysis_ids[object_key]
+            # 차지한 레코드를 지워 클라이언트가 다시 요청할 수 있게 합니다.
+            if IDEMPOTENCY_TABLE_NAME:
+                release_analysis(get_table(IDEMPOTENCY_TABLE_NAME), object_key)
+    print(
+        f"Enqueued {len(entries) - len(failed)} analysis jobs in group {group_id} "
+        f"({len(object_keys) - len(entries)} already requested, {len(failed)} failed)"
+    )
+
+    if not analysis_ids:
+        return {
+            "statusCode": 500,
+            "headers": headers,
+            "body": json.dumps({"error": "Internal server error", "failed": failed}),
+        }
+    return {
+        "statusCode": 202,
+        "headers": headers,
+        "body": json.dumps(
+            {
+                "message": "Analysis request accepted.",
+                "groupId": group_id,
+                "analysisIds": analysis_ids,
+                "failed": failed,
+            }
+        ),
+    }
+
 
 def lambda_handler(event, context):
     """
     분석 요청을 받아 SQS에 작업을 등록하고,
     클라이언트에게는 즉시 추적 ID(analysisId)를 반환합니다.
+    같은 객체의 작업이 이미 등록되어 있으면(업로드 즉시 분석 등) 새로 등록하지 않고 그 ID를 반환합니다.
+    Body에 objectKeys 배열을 보내면 여러 이미지를 한 번에 요청하고 {objectKey: analysisId}를 받습니다.
     """
     headers = {"Access-Control-Allow-Origin": "*"}
 
     try:
         # 1. 요청 Body에서 objectKey 가져오기
         body = json.loads(event.get("body", "{}"))
+
+        # 여러 이미지 요청 (한 끼에 여러 접시)
+        if "objectKeys" in body:
+            object_keys = body["objectKeys"]
+            if (
+                not isinstance(object_keys, list)
+                or not 1 <= len(object_keys) <= MAX_OBJECT_KEYS
+                or not all(isinstance(key, str) and key for key in object_keys)
+            ):
+                return {
+                    "statusCode": 400,
+                    "headers": headers,
+                    "body": json.dumps(
+                        {
+                            "error": "Bad Request: objectKeys must be a list of "
+                            f"1 to {MAX_OBJECT_KEYS} keys."
+                        }
+                    ),
+                }
+            # 중복 키는 한 번만 요청합니다. (순서 유지)
+            return request_many(event, list(dict.fromkeys(object_keys)), headers)
+
         object_key = body.get("objectKey")
         if not object_key:
             return {
@@ -29,13 +168,44 @@ def lambda_handler(event, context):
             }
 
         # 2. 고유한 analysisId 생성 (핵심)
-        analysis_id = str(uuid.uuid4())
+        # 업로드 즉시 분석 키에는 UploadImage가 미리 만든 analysisId가 들어 있습니다.
+        parsed = parse_auto_analyze_key(object_key)
+        analysis_id = parsed[1] if parsed else str(uuid.uuid4())
 
-        # 3. SQS에 보낼 메시지 본문 구성
-        message_body = json.dumps({"analysisId": analysis_id, "objectKey": object_key})
+        # 3. 같은 객체의 작업이 이미 등록되었으면 그 analysisId를 반환
+        if IDEMPOTENCY_TABLE_NAME:
+            analysis_id, claimed = claim_analysis(
+                get_table(IDEMPOTENCY_TABLE_NAME),
+                object_key,
+                analysis_id,
+                ANALYSIS_CLAIM_TTL_SECONDS,
+            )
+            if not claimed:
+                print(f"Analysis already requested. ID: {analysis_id}")
+                return {
+                    "statusCode": 202,
+                    "headers": headers,
+                    "body": json.dumps(
+                        {
+                            "message": "Analysis request accepted.",
+                            "analysisId": analysis_id,
+                        }
+                    ),
+                }
 
         # 4. SQS 대기열에 메시지 전송
-        sqs_client.send_message(QueueUrl=SQS_QUEUE_URL, MessageBody=message_body)
+        # (요청 시각과 API 요청 ID를 메시지 속성으로 붙여 AnalyzeImage가 구간별 지연을 기록)
+        try:
+            get_client("sqs").send_message(
+                QueueUrl=SQS_QUEUE_URL,
+                MessageBody=build_job_message(analysis_id, object_key),
+                MessageAttributes=trace_attributes(event),
+            )
+        except Exception:
+            # 차지한 레코드를 지워 클라이언트가 다시 요청할 수 있게 합니다.
+            if IDEMPOTENCY_TABLE_NAME:
+                release_analysis(get_table(IDEMPOTENCY_TABLE_NAME), object_key)
+            raise
 
         print(f"Successfully enqueued analysis job. ID: {analysis_id}")
 
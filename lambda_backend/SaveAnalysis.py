@@ -1,22 +1,360 @@
 import json
 import os
-import boto3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import uuid
 
-# DynamoDB 리소스 초기화
-dynamodb = boto3.resource("dynamodb")
+from botocore.exceptions import ClientError
+
+from aws_clients import get_resource, get_table
+from daily_rollups import add_to_rollup, bump_log_version, kst_day
+from foodlog_keys import to_v2_item
+from image_thumbnails import parse_formats, parse_sizes, thumbnail_urls
+
 # Lambda 환경 변수에서 테이블 이름 가져오기
 TABLE_NAME = os.environ.get("TABLE_NAME", "food-logs")
-table = dynamodb.Table(TABLE_NAME)
 
 # Lambda 환경 변수에서 이미지 기본 URL 가져오기
 IMAGE_BASE_URL = os.environ.get("IMAGE_BASE_URL")
 
+# 기록에 썸네일 URL(thumbnail_urls)도 저장 (AnalyzeImage의 GENERATE_THUMBNAILS를 켠 뒤에 켭니다)
+# 크기와 형식은 AnalyzeImage와 같은 값을 사용하며, URL은 첫 번째 형식으로 만듭니다.
+THUMBNAIL_URLS = os.environ.get("THUMBNAIL_URLS", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+THUMBNAIL_SIZES = parse_sizes(os.environ.get("THUMBNAIL_SIZES", "160,480"))
+THUMBNAIL_FORMATS = parse_formats(os.environ.get("THUMBNAIL_FORMATS", "webp,jpeg"))
+
+# 식사 시각 기준 키를 쓰는 v2 테이블 (foodlog_keys). 설정하면 이전 기간 동안 두 테이블에 모두 씁니다.
+FOODLOG_V2_TABLE_NAME = os.environ.get("FOODLOG_V2_TABLE_NAME")
+
+# 일자별 영양소 합계 테이블 (설정하지 않으면 rollup을 갱신하지 않음)
+ROLLUP_TABLE_NAME = os.environ.get("ROLLUP_TABLE_NAME")
+
+# 일괄 저장 시 클라이언트 멱등성 키를 기록하는 테이블 (파티션 키 idempotencyKey, TTL expiresAt)
+IDEMPOTENCY_TABLE_NAME = os.environ.get("IDEMPOTENCY_TABLE_NAME")
+IDEMPOTENCY_TTL_SECONDS = int(
+    os.environ.get("IDEMPOTENCY_TTL_SECONDS", str(7 * 24 * 3600))
+)
+
+# 일괄 저장 시 멱등성 키를 동시에 차지하는 최대 요청 수
+IDEMPOTENCY_CLAIM_WORKERS = int(os.environ.get("IDEMPOTENCY_CLAIM_WORKERS", "8"))
+
+# 한 번의 일괄 저장 요청에 담을 수 있는 최대 기록 수
+MAX_BATCH_ENTRIES = int(os.environ.get("MAX_BATCH_ENTRIES", "100"))
+
+REQUIRED_FIELDS = ["food_name", "calories", "protein", "carbs", "fat"]
+NUMERIC_FIELDS = ["calories", "protein", "carbs", "fat"]
+
+
+def build_item(user_id, entry, log_id, now):
+    """
+    요청 데이터로 DynamoDB에 저장할 음식 기록 아이템을 만듭니다.
+    """
+    item = {
+        "user_id": user_id,
+        "log_id": log_id,
+        "food_name": entry.get("food_name"),
+        "calories": int(entry.get("calories")),
+        # --- [영양소 추가 2/3] 아이템에 영양소 정보 추가 ---
+        "protein": int(entry.get("protein")),
+        "carbs": int(entry.get("carbs")),
+        "fat": int(entry.get("fat")),
+        # ---
+        "meal_type": entry.get(
+            "meal_type", "ETC"
+        ),  # 예: 'breakfast', 'lunch', 'dinner', 'snack'
+        "eaten_at": entry.get(
+            "eaten_at", now.isoformat()
+        ),  # 사용자가 식사 시간을 직접 선택한 경우
+        "created_at": now.isoformat(),
+    }
+
+    # image_key가 제공된 경우, 전체 이미지 URL을 생성하여 추가
+    image_key = entry.get("imageUrl")
+    if image_key:
+        item["image_url"] = f"{IMAGE_BASE_URL.rstrip('/')}/{image_key.lstrip('/')}"
+        # 목록/캘린더 화면은 원본 대신 크기별 썸네일을 사용합니다. {"160": URL, ...}
+        if THUMBNAIL_URLS:
+            item["thumbnail_urls"] = thumbnail_urls(
+                IMAGE_BASE_URL, image_key, THUMBNAIL_SIZES, THUMBNAIL_FORMATS[0]
+            )
+    return item
+
+
+def validate_entry(entry):
+    """
+    일괄 저장 요청의 기록 하나를 검사합니다. 문제가 있으면 오류 메시지를, 없으면 None을 반환합니다.
+    """
+    if not isinstance(entry, dict):
+        return "Entry must be a JSON object."
+    missing = [field for field in REQUIRED_FIELDS if field not in entry]
+    if missing:
+        return f"Missing required fields: {missing}"
+    for field in NUMERIC_FIELDS:
+        try:
+            int(entry[field])
+        except (ValueError, TypeError):
+            return f"{field} must be a number."
+    if "eaten_at" in entry:
+        try:
+            kst_day(entry["eaten_at"])
+        except (ValueError, TypeError, AttributeError):
+            return "eaten_at must be an ISO 8601 string."
+    key = entry.get("idempotency_key")
+    if key is not None and (not isinstance(key, str) or not 0 < len(key) <= 128):
+        return "idempotency_key must be a string of 1-128 characters."
+    return None
+
+
+def new_log_id(now):
+    """
+    정렬 키 log_id를 만듭니다. 같은 시각에 저장되는 기록끼리 겹치지 않도록 접미사를 붙입니다.
+    """
+    return f"{now.isoformat()}#{uuid.uuid4().hex[:8]}"
+
+
+def find_saved_log_ids(user_id, keys):
+    """
+    이미 저장된 멱등성 키를 조회하여 {키: log_id}를 반환합니다.
+    재시도된 요청을 조건부 쓰기 실패 없이 걸러내는 빠른 경로이며, 중복 여부는 claim_log_id가 정합니다.
+    """
+    saved = {}
+    keys = list(keys)
+    for i in range(0, len(keys), 100):
+        request = {
+            IDEMPOTENCY_TABLE_NAME: {
+                "Keys": [
+                    {"idempotencyKey": f"food-log#{user_id}#{key}"}
+                    for key in keys[i : i + 100]
+                ],
+                "ProjectionExpression": "idempotencyKey, log_id",
+            }
+        }
+        while request:
+            response = get_resource("dynamodb").batch_get_item(RequestItems=request)
+            for item in response["Responses"].get(IDEMPOTENCY_TABLE_NAME, []):
+                saved[item["idempotencyKey"].split("#", 2)[2]] = item["log_id"]
+            request = response.get("UnprocessedKeys")
+    return saved
+
+
+def claim_log_id(table, user_id, key, log_id, expires_at):
+    """
+    멱등성 키를 조건부 쓰기로 차지합니다. (analysis_requests.claim_analysis와 같은 방식)
+    (log_id, True)면 호출한 쪽이 기록을 저장해야 하고,
+    (기존 log_id, False)면 같은 키의 기록이 이미 저장되었거나 저장 중이므로 그 log_id를 사용합니다.
+    """
+    idempotency_key = f"food-log#{user_id}#{key}"
+    try:
+        table.put_item(
+            Item={
+                "idempotencyKey": idempotency_key,
+                "log_id": log_id,
+                "expiresAt": expires_at,
+            },
+            ConditionExpression="attribute_not_exists(idempotencyKey)",
+        )
+        return log_id, True
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+    item = table.get_item(
+        Key={"idempotencyKey": idempotency_key}, ConsistentRead=True
+    ).get("Item")
+    if item is None:
+        # 레코드가 방금 만료/삭제된 경우: 다시 차지를 시도합니다.
+        return claim_log_id(table, user_id, key, log_id, expires_at)
+    return item["log_id"], False
+
+
+def release_log_ids(table, user_id, keys):
+    """
+    기록을 저장하지 못했을 때 차지한 멱등성 키를 지워 재시도가 다시 저장할 수 있게 합니다.
+    """
+    for key in keys:
+        try:
+            table.delete_item(Key={"idempotencyKey": f"food-log#{user_id}#{key}"})
+        except Exception as e:
+            print(f"Failed to release idempotency key {key} for {user_id}: {e}")
+
+
+def claim_log_ids(user_id, claims, expires_at):
+    """
+    {키: 새 log_id}의 멱등성 키를 동시에 차지하고 {키: (log_id, 차지 여부)}를 반환합니다.
+    하나라도 실패하면 이미 차지한 키를 풀고 예외를 다시 발생시킵니다.
+    """
+    table = get_table(IDEMPOTENCY_TABLE_NAME)
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(IDEMPOTENCY_CLAIM_WORKERS, len(claims)))
+    ) as executor:
+        futures = {
+            key: executor.submit(claim_log_id, table, user_id, key, log_id, expires_at)
+            for key, log_id in claims.items()
+        }
+    results = {}
+    error = None
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            error = error or e
+    if error:
+        release_log_ids(
+            table, user_id, [key for key, (_, claimed) in results.items() if claimed]
+        )
+        raise error
+    return results
+
+
+def write_v2_items(items):
+    """
+    저장한 기록을 v2 테이블에도 씁니다. (이전 기간의 이중 쓰기)
+    기존 테이블이 아직 원본이므로 실패해도 저장은 성공으로 처리합니다.
+    v2 키는 기존 기록에서 정해지므로, 빠진 기록은 이전 스크립트를 다시 실행하면 채워집니다.
+    """
+    try:
+        with get_table(FOODLOG_V2_TABLE_NAME).batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=to_v2_item(item))
+    except Exception as e:
+        print(f"Failed to write {len(items)} food logs to {FOODLOG_V2_TABLE_NAME}: {e}")
+
+
+def save_batch(user_id, entries, headers):
+    """
+    여러 음식 기록을 한 번에 저장합니다. (오프라인 상태에서 쌓인 기록 동기화용)
+    모든 기록을 먼저 검사하고, idempotency_key가 이미 저장된 기록은 다시 저장하지 않습니다.
+    """
+    # 1. 전체 기록 사전 검사 (하나라도 잘못되면 아무것도 저장하지 않음)
+    if not entries or len(entries) > MAX_BATCH_ENTRIES:
+        return {
+            "statusCode": 400,
+            "headers": headers,
+            "body": json.dumps(
+                {
+                    "error": f"Bad Request: entries must contain 1-{MAX_BATCH_ENTRIES} items."
+                }
+            ),
+        }
+    errors = [
+        {"index": i, "error": error}
+        for i, error in enumerate(map(validate_entry, entries))
+        if error
+    ]
+    if errors:
+        return {
+            "statusCode": 400,
+            "headers": headers,
+            "body": json.dumps(
+                {"error": "Bad Request: Invalid entries.", "errors": errors}
+            ),
+        }
+    if not IMAGE_BASE_URL and any(entry.get("imageUrl") for entry in entries):
+        print("ERROR: IMAGE_BASE_URL environment variable is not set.")
+        return {
+            "statusCode": 500,
+            "headers": headers,
+            "body": json.dumps(
+                {"error": "Internal Server Error: Image URL configuration is missing."}
+            ),
+        }
+
+    # 2. 멱등성 키 차지 (재시도된 동기화 요청의 중복 저장 방지)
+    #    이미 저장된 키는 한 번의 batch_get으로 거르고, 나머지는 기록을 쓰기 전에 조건부 쓰기로
+    #    차지하므로 같은 키로 동시에 들어온 요청도 한쪽만 저장합니다.
+    now = datetime.now(timezone.utc)
+    expires_at = int(now.timestamp()) + IDEMPOTENCY_TTL_SECONDS
+    keys = {
+        entry["idempotency_key"] for entry in entries if entry.get("idempotency_key")
+    }
+    saved = find_saved_log_ids(user_id, keys) if keys and IDEMPOTENCY_TABLE_NAME else {}
+    claimed = {key: (log_id, False) for key, log_id in saved.items()}
+    pending = {key: new_log_id(now) for key in keys if key not in saved}
+    if pending and IDEMPOTENCY_TABLE_NAME:
+        claimed.update(claim_log_ids(user_id, pending, expires_at))
+    else:
+        claimed.update((key, (log_id, True)) for key, log_id in pending.items())
+
+    # 3. 저장할 아이템 구성
+    results = []
+    items = []
+    written = set()
+    for i, entry in enumerate(entries):
+        key = entry.get("idempotency_key")
+        if key:
+            log_id, is_new = claimed[key]
+            if not is_new or key in written:
+                results.append({"index": i, "status": "duplicate", "log_id": log_id})
+                continue
+            written.add(key)
+        else:
+            log_id = new_log_id(now)
+        items.append(build_item(user_id, entry, log_id, now))
+        results.append({"index": i, "status": "created", "log_id": log_id})
+
+    # 4. 배치 쓰기 (batch_writer가 25개 단위 분할과 UnprocessedItems 재시도를 처리)
+    #    저장에 실패하면 차지한 키를 풀어서 재시도가 저장할 수 있게 합니다.
+    #    기록 버전을 먼저 올려, 버전을 올리지 못하면 아무것도 저장하지 않고 실패합니다.
+    try:
+        if ROLLUP_TABLE_NAME and items:
+            bump_log_version(get_table(ROLLUP_TABLE_NAME), user_id)
+        with get_table(TABLE_NAME).batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=item)
+    except Exception:
+        if written and IDEMPOTENCY_TABLE_NAME:
+            release_log_ids(get_table(IDEMPOTENCY_TABLE_NAME), user_id, written)
+        raise
+    if FOODLOG_V2_TABLE_NAME and items:
+        write_v2_items(items)
+
+    # 5. 일자별 rollup 갱신 (같은 날짜의 기록은 한 번의 업데이트로 합산)
+    if ROLLUP_TABLE_NAME and items:
+        day_totals = {}
+        for item in items:
+            totals = day_totals.setdefault(
+                kst_day(item["eaten_at"]),
+                dict.fromkeys(NUMERIC_FIELDS + ["count"], 0),
+            )
+            for field in NUMERIC_FIELDS:
+                totals[field] += item[field]
+            totals["count"] += 1
+        for day, totals in day_totals.items():
+            try:
+                add_to_rollup(
+                    get_table(ROLLUP_TABLE_NAME),
+                    user_id,
+                    day,
+                    totals,
+                    entry_count=totals["count"],
+                )
+            except Exception as e:
+                print(f"Failed to update daily rollup for {user_id} {day}: {e}")
+        # 저장하는 동안 조회한 응답의 ETag도 무효가 되도록 한 번 더 올립니다.
+        try:
+            bump_log_version(get_table(ROLLUP_TABLE_NAME), user_id)
+        except Exception as e:
+            print(f"Failed to bump log version for {user_id}: {e}")
+
+    return {
+        "statusCode": 201,
+        "headers": headers,
+        "body": json.dumps(
+            {
+                "message": f"Saved {len(items)} of {len(entries)} food logs.",
+                "results": results,
+            }
+        ),
+    }
+
 
 def lambda_handler(event, context):
     """
     API Gateway를 통해 음식 기록(영양소 포함)을 받아 DynamoDB에 저장하는 메인 핸들러
+    Body에 entries 배열을 보내면 여러 기록을 한 번에 저장합니다.
     """
     headers = {
         "Access-Control-Allow-Origin": "*",
@@ -46,70 +384,81 @@ def lambda_handler(event, context):
         # 2. 요청 Body 파싱 및 유효성 검사
         body = json.loads(event.get("body", "{}"))
 
+        # 일괄 저장 모드
+        if isinstance(body, dict) and isinstance(body.get("entries"), list):
+            return save_batch(user_id, body["entries"], headers)
+
         # --- [영양소 추가 1/3] 필수 필드 목록에 영양소 추가 ---
-        required_fields = ["food_name", "calories", "protein", "carbs", "fat"]
-        if not all(field in body for field in required_fields):
+        if not all(field in body for field in REQUIRED_FIELDS):
             return {
                 "statusCode": 400,
                 "headers": headers,
                 "body": json.dumps(
                     {
-                        "error": f"Bad Request: Missing one or more required fields. Required: {required_fields}"
+                        "error": f"Bad Request: Missing one or more required fields. Required: {REQUIRED_FIELDS}"
                     }
                 ),
             }
 
-        food_name = body.get("food_name")
-        calories = body.get("calories")
-        protein = body.get("protein")
-        carbs = body.get("carbs")
-        fat = body.get("fat")
         image_key = body.get("imageUrl")
 
         # 3. DynamoDB에 저장할 아이템 생성
         now = datetime.now(timezone.utc)
         # Partition Key(user_id)와 Sort Key(log_id)를 조합하여 아이템을 고유하게 식별
-        log_id = f"{now.isoformat()}"
+        log_id = new_log_id(now)
         eaten_at = body.get("eaten_at", now.isoformat())
 
-        item = {
-            "user_id": user_id,
-            "log_id": log_id,
-            "food_name": food_name,
-            "calories": int(calories),
-            # --- [영양소 추가 2/3] 아이템에 영양소 정보 추가 ---
-            "protein": int(protein),
-            "carbs": int(carbs),
-            "fat": int(fat),
-            # ---
-            "meal_type": body.get(
-                "meal_type", "ETC"
-            ),  # 예: 'breakfast', 'lunch', 'dinner', 'snack'
-            "eaten_at": eaten_at,  # 사용자가 식사 시간을 직접 선택한 경우
-            "created_at": now.isoformat(),
-        }
-
-        # image_key가 제공된 경우, 전체 이미지 URL을 생성하여 추가
-        if image_key:
-            if not IMAGE_BASE_URL:
-                print("ERROR: IMAGE_BASE_URL environment variable is not set.")
+        rollup_day = None
+        if ROLLUP_TABLE_NAME:
+            try:
+                rollup_day = kst_day(eaten_at)
+            except (ValueError, TypeError, AttributeError):
                 return {
-                    "statusCode": 500,
+                    "statusCode": 400,
                     "headers": headers,
                     "body": json.dumps(
-                        {
-                            "error": "Internal Server Error: Image URL configuration is missing."
-                        }
+                        {"error": "Bad Request: eaten_at must be an ISO 8601 string."}
                     ),
                 }
 
-            full_image_url = f"{IMAGE_BASE_URL.rstrip('/')}/{image_key.lstrip('/')}"
-            item["image_url"] = full_image_url
+        # image_key가 제공된 경우 전체 이미지 URL을 만들기 위한 설정 확인
+        if image_key and not IMAGE_BASE_URL:
+            print("ERROR: IMAGE_BASE_URL environment variable is not set.")
+            return {
+                "statusCode": 500,
+                "headers": headers,
+                "body": json.dumps(
+                    {
+                        "error": "Internal Server Error: Image URL configuration is missing."
+                    }
+                ),
+            }
+
+        item = build_item(user_id, body, log_id, now)
 
         # 4. DynamoDB에 아이템 저장
-        table.put_item(Item=item)
+        #    GetFoodlog의 ETag가 바뀌도록 기록 버전을 먼저 올립니다. 버전을 올리지 못하면
+        #    저장하지 않고 실패하므로, 클라이언트가 재시도해도 중복 기록이 생기지 않습니다.
+        if ROLLUP_TABLE_NAME:
+            bump_log_version(get_table(ROLLUP_TABLE_NAME), user_id)
+        get_table(TABLE_NAME).put_item(Item=item)
+        if FOODLOG_V2_TABLE_NAME:
+            write_v2_items([item])
+
+        # 5. 일자별 rollup 갱신 (실패해도 기록 저장은 성공으로 처리, 백필 스크립트로 복구 가능)
+        if rollup_day:
+            try:
+                add_to_rollup(get_table(ROLLUP_TABLE_NAME), user_id, rollup_day, item)
+            except Exception as e:
+                print(f"Failed to update daily rollup for {user_id} {rollup_day}: {e}")
+        if ROLLUP_TABLE_NAME:
+            # 저장하는 동안 조회한 응답의 ETag도 무효가 되도록 한 번 더 올립니다.
+            try:
+                bump_log_version(get_table(ROLLUP_TABLE_NAME), user_id)
+            except Exception as e:
+                print(f"Failed to bump log version for {user_id}: {e}")
 
-        # 5. 성공 응답 반환
+        # 6. 성공 응답 반환
         return {
             "statusCode": 201,  # 201 Created
             "headers": headers,
@@ -1,62 +1,19 @@
 import json
-import boto3
 import os
-from datetime import date
 
-# boto3 클라이언트 초기화
-cognito_client = boto3.client("cognito-idp")
+from aws_clients import get_client, get_table
+from nutrition_goals import (
+    ACTIVITY_MULTIPLIERS,
+    GOAL_ADJUSTMENTS,
+    calculate_nutritional_goals,
+)
+from profile_cache import bump_profile_version
 
 # Lambda 환경 변수에서 User Pool ID 가져오기
 USER_POOL_ID = os.environ.get("USER_POOL_ID")
 
-
-def calculate_nutritional_goals(
-    birthdate_str, height_cm, weight_kg, gender, activity_level, goal
-):
-    """
-    Mifflin-St Jeor equation - 사용자 정보와 목표에 기반하여 일일 권장 섭취량을 계산합니다.
-    """
-    # 1. 나이 계산
-    today = date.today()
-    birthdate = date.fromisoformat(birthdate_str)
-    age = (
-        today.year
-        - birthdate.year
-        - ((today.month, today.day) < (birthdate.month, birthdate.day))
-    )
-
-    # 2. BMR 계산 (미플린-지어 방정식)
-    if gender == "male":
-        bmr = (10 * weight_kg) + (6.25 * height_cm) - (5 * age) + 5
-    else:  # female
-        bmr = (10 * weight_kg) + (6.25 * height_cm) - (5 * age) - 161
-
-    # 3. TDEE 계산 (활동량 계수 적용)
-    activity_multipliers = {
-        "sedentary": 1.2,
-        "light": 1.375,
-        "moderate": 1.55,
-        "very": 1.725,
-        "extra": 1.9,
-    }
-    tdee = bmr * activity_multipliers[activity_level]
-
-    # 4. 목표 칼로리 설정
-    goal_adjustments = {"lose": -500, "maintain": 0, "gain": 300}
-    target_calories = tdee + goal_adjustments[goal]
-
-    # 5. 영양소 배분 (칼로리 기준: 탄수화물 40%, 단백질 30%, 지방 30%)
-    # 1g당 칼로리: 탄수화물=4, 단백질=4, 지방=9
-    target_carbs = (target_calories * 0.40) / 4
-    target_protein = (target_calories * 0.30) / 4
-    target_fats = (target_calories * 0.30) / 9
-
-    return {
-        "calories": round(target_calories),
-        "carbs": round(target_carbs),
-        "protein": round(target_protein),
-        "fats": round(target_fats),
-    }
+# GetUserProfile의 공유 프로필 캐시 테이블 (설정된 경우 업데이트 후 무효화)
+PROFILE_CACHE_TABLE_NAME = os.environ.get("PROFILE_CACHE_TABLE_NAME")
 
 
 def lambda_handler(event, context):
@@ -90,7 +47,7 @@ def lambda_handler(event, context):
                 ),
             }
 
-        valid_activity_levels = ["sedentary", "light", "moderate", "very", "extra"]
+        valid_activity_levels = list(ACTIVITY_MULTIPLIERS)
         if body["activity_level"] not in valid_activity_levels:
             return {
                 "statusCode": 400,
@@ -102,7 +59,7 @@ def lambda_handler(event, context):
             }
 
         # 목표 값 검사
-        if body["goal"] not in ["lose", "maintain", "gain"]:
+        if body["goal"] not in GOAL_ADJUSTMENTS:
             return {
                 "statusCode": 400,
                 "body": json.dumps(
@@ -146,10 +103,16 @@ def lambda_handler(event, context):
         ]
 
         # Cognito API 호출
-        cognito_client.admin_update_user_attributes(
+        get_client("cognito-idp").admin_update_user_attributes(
             UserPoolId=USER_POOL_ID, Username=user_sub, UserAttributes=user_attributes
         )
 
+        # 프로필 캐시 무효화 (버전을 올려 캐시된 이전 프로필을 사용하지 않도록 함)
+        # 실패하면 이전 프로필이 계속 조회되므로 500을 반환합니다. 속성 업데이트는 같은 값으로
+        # 다시 해도 되므로 클라이언트가 재시도하면 무효화까지 끝납니다.
+        if PROFILE_CACHE_TABLE_NAME:
+            bump_profile_version(get_table(PROFILE_CACHE_TABLE_NAME), user_sub)
+
         return {
             "statusCode": 200,
             "headers": {"Access-Control-Allow-Origin": "*"},
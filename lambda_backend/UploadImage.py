@@ -1,13 +1,84 @@
 import json
-import boto3
 import uuid
 import os
 
-s3_client = boto3.client("s3")
+from analysis_requests import auto_analyze_key
+from aws_clients import get_client
+
 BUCKET_NAME = os.environ.get("BUCKET_NAME")  # Lambda 환경 변수에서 버킷 이름 가져오기
 
+# 업로드 URL 유효 시간 (초)
+UPLOAD_EXPIRES_SECONDS = int(os.environ.get("UPLOAD_EXPIRES_SECONDS", "300"))
+
+# 배치 업로드(presigned POST) 설정: 한 번에 발급할 최대 개수, 업로드 크기 상한(바이트)
+MAX_BATCH_UPLOADS = int(os.environ.get("MAX_BATCH_UPLOADS", "10"))
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(8 * 1024 * 1024)))
+
+# 허용하는 Content-Type -> 파일 확장자
+UPLOAD_CONTENT_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "image/heic": "heic",
+}
+
+
+def new_upload_key(user_id, extension, analyze=False):
+    """
+    (객체 키, 파일명, analysisId)를 만듭니다.
+    analyze이면 analysisId를 미리 만들어 업로드 즉시 분석 키(uploads/auto/...)에 넣습니다.
+    """
+    if analyze:
+        analysis_id = str(uuid.uuid4())
+        object_key = auto_analyze_key(user_id, analysis_id, extension)
+        return object_key, object_key.rsplit("/", 1)[1], analysis_id
+    file_name = f"{uuid.uuid4()}.{extension}"
+    return f"uploads/{user_id}/{file_name}", file_name, None
+
+
+def presigned_post_targets(user_id, count, content_type, analyze=False):
+    """
+    count개의 업로드 대상(presigned POST)을 만듭니다.
+    정책 조건으로 객체 키, Content-Type, 크기 범위(1 ~ MAX_UPLOAD_BYTES)를 고정하므로
+    S3가 조건에 맞지 않는 업로드를 거부합니다. 서명 클라이언트(자격 증명)는 배치 전체에서 재사용합니다.
+    """
+    s3 = get_client("s3")
+    extension = UPLOAD_CONTENT_TYPES[content_type]
+    conditions = [
+        ["content-length-range", 1, MAX_UPLOAD_BYTES],
+        {"Content-Type": content_type},
+    ]
+    targets = []
+    for _ in range(count):
+        object_key, file_name, analysis_id = new_upload_key(user_id, extension, analyze)
+        post = s3.generate_presigned_post(
+            Bucket=BUCKET_NAME,
+            Key=object_key,
+            Fields={"Content-Type": content_type},
+            Conditions=conditions,
+            ExpiresIn=UPLOAD_EXPIRES_SECONDS,
+        )
+        targets.append(
+            {
+                "url": post["url"],
+                "fields": post["fields"],  # multipart/form-data 필드 (file보다 먼저)
+                "objectKey": object_key,
+                "filename": file_name,
+            }
+        )
+        if analysis_id:
+            targets[-1]["analysisId"] = analysis_id
+    return targets
+
 
 def lambda_handler(event, context):
+    """
+    S3 업로드 URL을 발급합니다.
+    - 쿼리 파라미터 없이 호출 시: presigned PUT URL 하나 (기존 앱 호환)
+    - ?count=N(&contentType=image/jpeg) 호출 시: 크기/형식이 제한된 presigned POST N개
+    - analyze=true 추가 시: analysisId를 미리 발급하여 객체 키에 넣고, 업로드가 끝나면
+      S3 이벤트(EnqueueUploadAnalysis)로 분석이 시작됩니다. (RequestAnalysis 호출 불필요)
+    """
     # CORS 헤더 정의
     cors_headers = {
         "Access-Control-Allow-Origin": "*",
@@ -52,31 +123,70 @@ def lambda_handler(event, context):
                 ),
             }
 
+        # 배치 모드: 여러 장을 한 번의 호출로 발급 (presigned POST)
+        params = event.get("queryStringParameters") or {}
+        analyze = params.get("analyze") in ("true", "1")
+        if params.get("count"):
+            content_type = params.get("contentType", "image/jpeg")
+            try:
+                count = int(params["count"])
+            except ValueError:
+                count = 0
+            if not 1 <= count <= MAX_BATCH_UPLOADS:
+                return {
+                    "statusCode": 400,
+                    "headers": cors_headers,
+                    "body": json.dumps(
+                        {"error": f"count must be 1 to {MAX_BATCH_UPLOADS}"}
+                    ),
+                }
+            if content_type not in UPLOAD_CONTENT_TYPES:
+                return {
+                    "statusCode": 400,
+                    "headers": cors_headers,
+                    "body": json.dumps(
+                        {"error": f"Unsupported contentType: {content_type}"}
+                    ),
+                }
+            return {
+                "statusCode": 200,
+                "headers": cors_headers,
+                "body": json.dumps(
+                    {
+                        "uploads": presigned_post_targets(
+                            user_id, count, content_type, analyze
+                        ),
+                        "maxBytes": MAX_UPLOAD_BYTES,
+                        "expiresIn": UPLOAD_EXPIRES_SECONDS,
+                    }
+                ),
+            }
+
         # 고유한 파일명과 S3 객체 키(경로) 생성
-        file_name = f"{uuid.uuid4()}.jpg"
-        object_key = f"uploads/{user_id}/{file_name}"
+        object_key, file_name, analysis_id = new_upload_key(user_id, "jpg", analyze)
         print(object_key)
         # 5분 동안 유효한 Pre-signed URL 생성
-        presigned_url = s3_client.generate_presigned_url(
+        presigned_url = get_client("s3").generate_presigned_url(
             "put_object",
             Params={
                 "Bucket": BUCKET_NAME,
                 "Key": object_key,
                 "ContentType": "image/jpeg",
             },
-            ExpiresIn=300,  # URL 유효 시간 (초)
+            ExpiresIn=UPLOAD_EXPIRES_SECONDS,  # URL 유효 시간 (초)
         )
         print(presigned_url)
+        result = {
+            "uploadUrl": presigned_url,
+            "objectKey": object_key,  # 업로드 후 분석 요청에 사용할 키
+            "filename": file_name,
+        }
+        if analysis_id:
+            result["analysisId"] = analysis_id  # 업로드 후 바로 폴링할 ID
         return {
             "statusCode": 200,
             "headers": cors_headers,
-            "body": json.dumps(
-                {
-                    "uploadUrl": presigned_url,
-                    "objectKey": object_key,  # 업로드 후 분석 요청에 사용할 키
-                    "filename": file_name,
-                }
-            ),
+            "body": json.dumps(result),
         }
 
     except Exception as e:
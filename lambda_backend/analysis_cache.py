@@ -0,0 +1,197 @@
+"""
+Bedrock 분석 결과 캐시.
+
+같은 음식 사진(재촬영, 타임아웃 후 재시도, 몇 초 간격의 연속 촬영)을 다시 분석하지 않도록
+이미지의 지각 해시(dHash)와 프롬프트/모델 버전을 키로 분석 결과를 재사용합니다.
+- 1차: 웜 컨테이너 안의 LRU
+- 2차: DynamoDB 테이블 (컨테이너 간 공유, expiresAt TTL 속성으로 만료)
+
+DynamoDB 테이블 스키마: 파티션 키 cacheKey (S), 정렬 키 phash (S), TTL 속성 expiresAt
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+
+from boto3.dynamodb.conditions import Key
+
+from aws_clients import get_table
+
+# Pillow 레이어가 없으면 해시를 계산할 수 없으므로 캐시를 건너뜁니다.
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+HASH_BITS = 64
+# 밴드 하나에서 조회할 최대 후보 수
+BAND_QUERY_LIMIT = 25
+
+
+def image_phash(image_bytes):
+    """
+    이미지의 64비트 dHash를 계산합니다. 디코딩할 수 없으면 None을 반환합니다.
+    """
+    if Image is None:
+        return None
+    try:
+        image = Image.open(BytesIO(image_bytes))
+        # JPEG는 축소 디코딩으로 전체 해상도 디코딩 비용을 피합니다.
+        image.draft("L", (64, 64))
+        pixels = list(image.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    except Exception as e:
+        print(f"Failed to compute image hash: {e}")
+        return None
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def cache_version(model_id, prompt_text):
+    """
+    프롬프트나 모델이 바뀌면 이전 결과를 재사용하지 않도록 캐시 버전을 만듭니다.
+    """
+    prompt_digest = hashlib.sha1(prompt_text.encode("utf-8")).hexdigest()[:12]
+    return f"{model_id}:{prompt_digest}"
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class AnalysisCache:
+    """
+    지각 해시 기반 분석 결과 캐시 (LRU + DynamoDB).
+
+    해밍 거리 max_distance 이내의 이미지를 같은 이미지로 봅니다. 64비트 해시를
+    max_distance + 1개의 밴드로 나누면 거리 max_distance 이내의 두 해시는 적어도 한 밴드가
+    정확히 같으므로(비둘기집 원리), 각 밴드 값을 파티션 키로 저장하고 조회합니다.
+    """
+
+    def __init__(
+        self, table_name, version, max_distance=4, ttl_seconds=604800, lru_size=256
+    ):
+        self.table_name = table_name
+        self.version = version
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.lru_size = lru_size
+        self._lru = OrderedDict()  # phash -> (expiresAt, result)
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+        band_count = max_distance + 1
+        base, extra = divmod(HASH_BITS, band_count)
+        self._bands = []  # (shift, mask)
+        shift = HASH_BITS
+        for i in range(band_count):
+            width = base + (1 if i < extra else 0)
+            shift -= width
+            self._bands.append((shift, (1 << width) - 1))
+
+    @property
+    def table(self):
+        return get_table(self.table_name)
+
+    def _band_keys(self, phash):
+        return [
+            f"{self.version}#{i}#{(phash >> shift) & mask:x}"
+            for i, (shift, mask) in enumerate(self._bands)
+        ]
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _lookup_local(self, phash, now):
+        with self._lock:
+            best = None
+            for cached_hash, (expires_at, result) in list(self._lru.items()):
+                if expires_at <= now:
+                    del self._lru[cached_hash]
+                    continue
+                distance = hamming_distance(phash, cached_hash)
+                if distance <= self.max_distance and (
+                    best is None or distance < best[0]
+                ):
+                    best = (distance, cached_hash, result)
+            if best is None:
+                return None
+            self._lru.move_to_end(best[1])
+            return best[2]
+
+    def _remember(self, phash, expires_at, result):
+        with self._lock:
+            self._lru[phash] = (expires_at, result)
+            self._lru.move_to_end(phash)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def lookup(self, phash):
+        """
+        캐시된 분석 결과를 반환합니다. 없으면 None을 반환합니다.
+        """
+        now = int(time.time())
+
+        # 1. 프로세스 내 LRU 조회
+        result = self._lookup_local(phash, now)
+        if result is not None:
+            self._count("local_hits")
+            return result
+
+        # 2. DynamoDB 밴드별 조회 후 해밍 거리가 가장 가까운 항목 선택
+        #    (TTL 삭제는 지연될 수 있으므로 expiresAt도 직접 확인합니다.)
+        best = None
+        for band_key in self._band_keys(phash):
+            response = self.table.query(
+                KeyConditionExpression=Key("cacheKey").eq(band_key),
+                Limit=BAND_QUERY_LIMIT,
+            )
+            for item in response.get("Items", []):
+                if int(item.get("expiresAt", 0)) <= now:
+                    continue
+                cached_hash = int(item["phash"], 16)
+                distance = hamming_distance(phash, cached_hash)
+                if distance <= self.max_distance and (
+                    best is None or distance < best[0]
+                ):
+                    best = (distance, int(item["expiresAt"]), item["result"])
+            if best is not None and best[0] == 0:
+                break
+
+        if best is None:
+            self._count("misses")
+            return None
+
+        self._count("shared_hits")
+        self._remember(phash, best[1], best[2])
+        return best[2]
+
+    def store(self, phash, result):
+        """
+        분석 결과를 모든 밴드 키에 저장합니다.
+        """
+        expires_at = int(time.time()) + self.ttl_seconds
+        phash_hex = f"{phash:016x}"
+        with self.table.batch_writer() as batch:
+            for band_key in self._band_keys(phash):
+                batch.put_item(
+                    Item={
+                        "cacheKey": band_key,
+                        "phash": phash_hex,
+                        "result": result,
+                        "expiresAt": expires_at,
+                    }
+                )
+        self._remember(phash, expires_at, result)
@@ -0,0 +1,130 @@
+"""
+분석 작업 등록 공통 처리 (RequestAnalysis, EnqueueUploadAnalysis).
+
+업로드 즉시 분석(UploadImage ?analyze=true)은 analysisId를 미리 만들어 객체 키
+uploads/auto/<user_id>/<analysisId>.<확장자>에 넣고, S3 객체 생성 이벤트로
+EnqueueUploadAnalysis가 RequestAnalysis와 같은 형식의 SQS 작업을 등록합니다.
+
+여러 장을 한 번에 요청하면 send_message_batch(10개 단위)로 보내고, 같은 요청의 작업에는
+같은 groupId를 붙여 AnalyzeImage가 한 묶음으로 분석할 수 있게 합니다.
+
+같은 객체에 대한 작업은 멱등성 테이블의 analysis#<objectKey> 레코드를 먼저 차지한 쪽만
+등록하므로, S3 이벤트 중복 전달이나 클라이언트의 RequestAnalysis 호출이 겹쳐도
+Bedrock 호출은 한 번만 일어납니다. 레코드는 작업 등록에 실패하거나(release_analysis)
+AnalyzeImage가 마지막 시도까지 실패하면 지워지고, 그렇지 않아도 TTL이 지나면 다시 차지할 수
+있으므로 실패한 분석을 다시 요청할 수 있습니다.
+
+DynamoDB 테이블 스키마: 파티션 키 idempotencyKey (S), TTL 속성 expiresAt
+"""
+
+import json
+import re
+import time
+
+from botocore.exceptions import ClientError
+
+# 업로드 즉시 분석 객체 키 접두사 (S3 이벤트 알림의 prefix 필터로 사용)
+AUTO_ANALYZE_PREFIX = "uploads/auto/"
+SQS_BATCH_SIZE = 10  # send_message_batch 한 번에 보낼 수 있는 최대 메시지 수
+
+AUTO_ANALYZE_KEY = re.compile(
+    r"^uploads/auto/(?P<user_id>[^/]+)/(?P<analysis_id>[0-9a-f-]{36})\.[a-z]+$"
+)
+
+
+def auto_analyze_key(user_id, analysis_id, extension):
+    return f"{AUTO_ANALYZE_PREFIX}{user_id}/{analysis_id}.{extension}"
+
+
+def parse_auto_analyze_key(object_key):
+    """
+    업로드 즉시 분석 키에서 (user_id, analysisId)를 꺼냅니다. 형식이 다르면 None을 반환합니다.
+    """
+    match = AUTO_ANALYZE_KEY.match(object_key)
+    if match is None:
+        return None
+    return match.group("user_id"), match.group("analysis_id")
+
+
+def build_job_message(analysis_id, object_key, group_id=None):
+    """
+    AnalyzeImage가 읽는 SQS 메시지 본문 (group_id는 함께 요청된 작업끼리 같은 값)
+    """
+    message = {"analysisId": analysis_id, "objectKey": object_key}
+    if group_id:
+        message["groupId"] = group_id
+    return json.dumps(message)
+
+
+def send_job_batches(sqs, queue_url, entries, max_attempts=3, retry_delay=0.05):
+    """
+    send_message_batch 항목(Id, MessageBody, MessageAttributes)을 10개씩 나눠 보냅니다.
+    실패한 항목만 지수 백오프로 다시 보내며, 끝내 보내지 못한 항목의 Id 목록을 반환합니다.
+    (SenderFault 실패는 다시 보내도 실패하므로 재시도하지 않습니다)
+    """
+    pending = list(entries)
+    rejected = []
+    for attempt in range(max_attempts):
+        retry = []
+        for i in range(0, len(pending), SQS_BATCH_SIZE):
+            chunk = pending[i : i + SQS_BATCH_SIZE]
+            try:
+                response = sqs.send_message_batch(QueueUrl=queue_url, Entries=chunk)
+            except Exception as e:
+                print(f"send_message_batch failed ({len(chunk)} entries): {e}")
+                retry.extend(chunk)
+                continue
+            by_id = {entry["Id"]: entry for entry in chunk}
+            for failure in response.get("Failed", []):
+                print(
+                    f"Failed to enqueue entry {failure['Id']}: "
+                    f"{failure.get('Code')} {failure.get('Message')}"
+                )
+                if failure.get("SenderFault"):
+                    rejected.append(failure["Id"])
+                else:
+                    retry.append(by_id[failure["Id"]])
+        pending = retry
+        if not pending:
+            break
+        if attempt + 1 < max_attempts:
+            time.sleep(retry_delay * 2**attempt)
+    return rejected + [entry["Id"] for entry in pending]
+
+
+def claim_analysis(table, object_key, analysis_id, ttl_seconds):
+    """
+    객체에 대한 분석 작업 등록을 차지합니다.
+    (analysisId, True)면 호출한 쪽이 작업을 등록해야 하고,
+    (기존 analysisId, False)면 이미 등록된 작업이 있으므로 그 ID를 사용합니다.
+    """
+    key = f"analysis#{object_key}"
+    now = int(time.time())
+    try:
+        # DynamoDB TTL은 만료된 레코드를 바로 지우지 않으므로 만료 시각도 확인합니다.
+        table.put_item(
+            Item={
+                "idempotencyKey": key,
+                "analysisId": analysis_id,
+                "expiresAt": now + ttl_seconds,
+            },
+            ConditionExpression="attribute_not_exists(idempotencyKey) OR expiresAt < :now",
+            ExpressionAttributeValues={":now": now},
+        )
+        return analysis_id, True
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+    item = table.get_item(Key={"idempotencyKey": key}, ConsistentRead=True).get("Item")
+    if item is None:
+        # 레코드가 방금 만료/삭제된 경우: 다시 차지를 시도합니다.
+        return claim_analysis(table, object_key, analysis_id, ttl_seconds)
+    return item["analysisId"], False
+
+
+def release_analysis(table, object_key):
+    """
+    작업 등록에 실패했거나 분석이 끝내 실패했을 때 차지한 레코드를 지워, 다시 요청하면 새로
+    등록할 수 있게 합니다.
+    """
+    table.delete_item(Key={"idempotencyKey": f"analysis#{object_key}"})
@@ -0,0 +1,106 @@
+"""
+모든 핸들러가 공유하는 boto3 클라이언트 레이어.
+
+클라이언트는 처음 사용할 때 만들고(지연 생성) 웜 컨테이너에서 재사용합니다.
+서비스별로 연결 풀 크기, 재시도 방식(adaptive), 연결/읽기 타임아웃을 따로 설정합니다.
+- Bedrock: 응답 생성에 수십 초가 걸릴 수 있으므로 읽기 타임아웃을 길게
+- DynamoDB/SQS: 짧은 타임아웃으로 빨리 실패하고 재시도
+- 연결 풀은 AnalyzeImage 워커 수(MAX_WORKERS)에 맞춤
+- Bedrock 재시도 횟수는 BEDROCK_MAX_ATTEMPTS로 조정 (bedrock_limiter를 쓸 때(BEDROCK_LIMITER_TABLE_NAME
+  설정)는 기본값이 1이라 스로틀 응답이 SDK 재시도에 가려지지 않고 수락 제어에 바로 전달됨)
+"""
+
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+MAX_WORKERS = int(os.environ.get("MAX_WORKERS", "10"))
+BEDROCK_MAX_ATTEMPTS = int(
+    os.environ.get(
+        "BEDROCK_MAX_ATTEMPTS",
+        "1" if os.environ.get("BEDROCK_LIMITER_TABLE_NAME") else "4",
+    )
+)
+
+SERVICE_CONFIGS = {
+    "bedrock-runtime": Config(
+        connect_timeout=3,
+        read_timeout=120,
+        retries={"mode": "adaptive", "max_attempts": BEDROCK_MAX_ATTEMPTS},
+        max_pool_connections=MAX_WORKERS,
+        tcp_keepalive=True,
+    ),
+    "dynamodb": Config(
+        connect_timeout=1,
+        read_timeout=5,
+        retries={"mode": "adaptive", "max_attempts": 5},
+        max_pool_connections=max(10, MAX_WORKERS * 2),
+        tcp_keepalive=True,
+    ),
+    "s3": Config(
+        connect_timeout=2,
+        read_timeout=10,
+        retries={"mode": "adaptive", "max_attempts": 4},
+        max_pool_connections=max(10, MAX_WORKERS),
+        tcp_keepalive=True,
+    ),
+    "sqs": Config(
+        connect_timeout=1,
+        read_timeout=5,
+        retries={"mode": "adaptive", "max_attempts": 4},
+        tcp_keepalive=True,
+    ),
+    "cognito-idp": Config(
+        connect_timeout=2,
+        read_timeout=5,
+        retries={"mode": "adaptive", "max_attempts": 3},
+        tcp_keepalive=True,
+    ),
+}
+
+_clients = {}
+_resources = {}
+_tables = {}
+# boto3 기본 세션은 스레드 안전하지 않으므로 생성은 락 안에서 합니다.
+_lock = threading.Lock()
+
+
+def get_client(service):
+    """
+    서비스별 설정이 적용된 boto3 클라이언트를 반환합니다. (지연 생성, 컨테이너 내 재사용)
+    """
+    client = _clients.get(service)
+    if client is None:
+        with _lock:
+            client = _clients.get(service)
+            if client is None:
+                client = boto3.client(service, config=SERVICE_CONFIGS.get(service))
+                _clients[service] = client
+    return client
+
+
+def get_resource(service):
+    """
+    서비스별 설정이 적용된 boto3 리소스를 반환합니다. (지연 생성, 컨테이너 내 재사용)
+    """
+    resource = _resources.get(service)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(service)
+            if resource is None:
+                resource = boto3.resource(service, config=SERVICE_CONFIGS.get(service))
+                _resources[service] = resource
+    return resource
+
+
+def get_table(table_name):
+    """
+    DynamoDB Table 객체를 반환합니다.
+    """
+    table = _tables.get(table_name)
+    if table is None:
+        table = get_resource("dynamodb").Table(table_name)
+        _tables[table_name] = table
+    return table
@@ -0,0 +1,315 @@
+"""
+Bedrock 호출 수락 제어(admission control).
+
+SQS 버스트로 AnalyzeImage 컨테이너가 늘어나면 각 컨테이너가 따로 invoke_model을 호출하여
+계정 할당량을 넘기고 스로틀링됩니다. 이 모듈은 모든 컨테이너가 공유하는 DynamoDB 아이템
+하나로 다음 두 가지를 제한합니다.
+- 토큰 버킷: 초당 rate_per_second개씩 채워지고 최대 burst개까지 쌓이는 호출 허가
+- 동시 실행: 만료 시각이 있는 임대(lease) 목록. 컨테이너가 중간에 죽어도 임대는 만료됩니다.
+
+아이템은 읽은 뒤 version 조건부 쓰기로 갱신하므로(낙관적 동시성) 동시에 갱신하면
+한쪽만 성공하고 나머지는 다시 읽어서 재시도합니다. 재시도가 계속 충돌하면 허가를 기다리는
+것과 같이 잠시 뒤 다시 시도하고, 마감 시각까지 받지 못하면 AdmissionTimeout으로 미룹니다.
+
+컨테이너마다 스로틀 응답을 받으면 지수 백오프로 잠시 멈추고 호출 비용(소모 토큰)을
+늘렸다가, 성공할 때마다 조금씩 되돌립니다(AIMD). 스로틀된 컨테이너가 공유 버킷을 더 많이
+소모하므로 전체 호출 속도가 할당량 바로 아래로 수렴합니다.
+
+DynamoDB 테이블 스키마: 파티션 키 limiterKey (S)
+"""
+
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from aws_clients import get_table
+from metrics import emit_metrics
+
+# 스로틀로 보는 오류 코드 (스트리밍 응답의 이벤트 오류는 소문자로 시작하므로 소문자로 비교)
+THROTTLE_ERROR_CODES = {
+    "throttlingexception",
+    "toomanyrequestsexception",
+    "servicequotaexceededexception",
+}
+
+# 조건부 쓰기 충돌 시 최대 재시도 횟수와, 모두 충돌했을 때 다시 시도하기까지의 대기 시간 (초)
+MAX_CONFLICT_RETRIES = 8
+CONFLICT_BACKOFF_SECONDS = 1.0
+# 동시 실행 한도에 걸렸을 때 다시 확인하기까지의 대기 시간 (초)
+CONCURRENCY_POLL_SECONDS = 0.2
+# 스로틀 백오프 (처음 대기, 최대 대기)
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 20.0
+# 호출 비용 배율(1 / scale)의 하한과 성공 시 회복 폭
+MIN_SCALE = 0.25
+SCALE_RECOVERY_STEP = 0.05
+
+
+class AdmissionTimeout(Exception):
+    """
+    마감 시각 전에 호출 허가를 받지 못했습니다. retry_after초 뒤에 다시 시도해야 합니다.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__(
+            f"Bedrock admission timed out (retry after {retry_after:.1f}s)"
+        )
+        self.retry_after = retry_after
+
+
+def is_throttle_error(error):
+    """
+    Bedrock 호출 오류가 스로틀링(할당량 초과)인지 확인합니다.
+    """
+    if not isinstance(error, ClientError):
+        return False
+    code = error.response.get("Error", {}).get("Code", "")
+    return code.lower() in THROTTLE_ERROR_CODES
+
+
+class BedrockLimiter:
+    """
+    DynamoDB 기반 분산 토큰 버킷 + 동시 실행 제한과 컨테이너별 적응형 백오프.
+    """
+
+    def __init__(
+        self,
+        table_name,
+        key,
+        rate_per_second,
+        burst=None,
+        max_concurrency=10,
+        lease_seconds=120,
+    ):
+        self.table_name = table_name
+        self.key = key
+        self.rate = float(rate_per_second)
+        self.burst = float(burst or max(1.0, self.rate))
+        self.max_concurrency = max_concurrency
+        self.lease_seconds = lease_seconds
+
+        self._lock = threading.Lock()
+        self._scale = 1.0
+        self._consecutive_throttles = 0
+        self._backoff_until = 0.0
+        self._counters = self._empty_counters()
+
+    @staticmethod
+    def _empty_counters():
+        return {
+            "granted": 0,
+            "waits": 0,
+            "waitMs": [],
+            "throttles": 0,
+            "timeouts": 0,
+            "conflicts": 0,
+        }
+
+    def _count(self, name, value=1):
+        with self._lock:
+            if isinstance(self._counters[name], list):
+                self._counters[name].append(value)
+            else:
+                self._counters[name] += value
+
+    def _update(self, mutate):
+        """
+        상태 아이템을 읽어 mutate(state, now)를 적용하고 조건부로 다시 씁니다.
+        mutate는 (새 상태 또는 None, 반환값)을 돌려주며, None이면 쓰지 않습니다.
+        MAX_CONFLICT_RETRIES번 모두 충돌하면 AdmissionTimeout을 발생시킵니다.
+        """
+        table = get_table(self.table_name)
+        for _ in range(MAX_CONFLICT_RETRIES):
+            item = table.get_item(
+                Key={"limiterKey": self.key}, ConsistentRead=True
+            ).get("Item")
+            now = time.time()
+            if item is None:
+                state = {"tokens": self.burst, "leases": {}, "version": 0}
+            else:
+                # 마지막 갱신 이후 흐른 시간만큼 토큰을 채우고 만료된 임대를 정리
+                elapsed = max(0.0, now - float(item["refilledAt"]))
+                state = {
+                    "tokens": min(
+                        self.burst, float(item["tokens"]) + elapsed * self.rate
+                    ),
+                    "leases": {
+                        lease_id: float(expires_at)
+                        for lease_id, expires_at in item.get("leases", {}).items()
+                        if float(expires_at) > now
+                    },
+                    "version": int(item["version"]),
+                }
+
+            new_state, value = mutate(state, now)
+            if new_state is None:
+                return value
+
+            if item is None:
+                condition = Attr("limiterKey").not_exists()
+            else:
+                condition = Attr("version").eq(state["version"])
+            try:
+                table.put_item(
+                    Item={
+                        "limiterKey": self.key,
+                        "tokens": Decimal(str(round(new_state["tokens"], 6))),
+                        "refilledAt": Decimal(str(round(now, 6))),
+                        "leases": {
+                            lease_id: Decimal(str(round(expires_at, 3)))
+                            for lease_id, expires_at in new_state["leases"].items()
+                        },
+                        "version": state["version"] + 1,
+                    },
+                    ConditionExpression=condition,
+                )
+                return value
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                self._count("conflicts")
+                time.sleep(random.uniform(0, 0.02))
+        raise AdmissionTimeout(CONFLICT_BACKOFF_SECONDS)
+
+    def acquire(self, deadline=float("inf")):
+        """
+        호출 허가(토큰 + 동시 실행 임대)를 받을 때까지 기다리고 임대 ID를 반환합니다.
+        deadline(time.monotonic 기준)까지 받을 수 없으면 AdmissionTimeout을 발생시킵니다.
+        """
+        started = time.monotonic()
+        lease_id = uuid.uuid4().hex
+        with self._lock:
+            cost = min(self.burst, 1.0 / self._scale)
+
+        def take(state, now):
+            if len(state["leases"]) >= self.max_concurrency:
+                return None, CONCURRENCY_POLL_SECONDS
+            if state["tokens"] < cost:
+                return None, (cost - state["tokens"]) / self.rate
+            state["tokens"] -= cost
+            state["leases"][lease_id] = now + self.lease_seconds
+            return state, 0.0
+
+        waited = False
+        while True:
+            wait = self._backoff_until - time.monotonic()
+            if wait <= 0:
+                try:
+                    wait = self._update(take)
+                except AdmissionTimeout as e:
+                    # 상태 아이템 경합이 심하면 허가를 기다리는 것처럼 잠시 뒤 다시 시도합니다.
+                    wait = e.retry_after
+                if wait <= 0:
+                    self._count("granted")
+                    if waited:
+                        self._count("waits")
+                        self._count("waitMs", (time.monotonic() - started) * 1000)
+                    return lease_id
+
+            # 기다려도 마감 시각 안에 허가를 받을 수 없으면 바로 포기합니다.
+            if time.monotonic() + wait > deadline:
+                self._count("timeouts")
+                raise AdmissionTimeout(wait)
+            waited = True
+            time.sleep(wait + random.uniform(0, 0.05))
+
+    def release(self, lease_id):
+        """
+        동시 실행 임대를 반납합니다. 실패해도 임대는 lease_seconds 뒤에 만료됩니다.
+        """
+
+        def remove(state, now):
+            if lease_id not in state["leases"]:
+                return None, None
+            del state["leases"][lease_id]
+            return state, None
+
+        try:
+            self._update(remove)
+        except Exception as e:
+            print(f"Failed to release Bedrock lease {lease_id}: {e}")
+
+    @contextmanager
+    def slot(self, deadline=float("inf")):
+        lease_id = self.acquire(deadline)
+        try:
+            yield
+        finally:
+            self.release(lease_id)
+
+    def call(self, invoke, deadline=float("inf")):
+        """
+        허가를 받아 invoke()를 호출합니다. 스로틀되면 백오프한 뒤 다시 허가를 받아
+        재시도하며, 마감 시각까지 허가를 받지 못하면 AdmissionTimeout이 발생합니다.
+        """
+        while True:
+            with self.slot(deadline):
+                try:
+                    result = invoke()
+                except Exception as e:
+                    if not is_throttle_error(e):
+                        raise
+                    backoff = self.record_throttle()
+                    print(f"Bedrock throttled, backing off {backoff:.2f}s")
+                    continue
+            self.record_success()
+            return result
+
+    def record_throttle(self):
+        """
+        스로틀 응답을 받았을 때 호출합니다. 이 컨테이너의 호출 비용을 늘리고
+        지수 백오프(지터 포함) 동안 새 허가를 받지 않습니다. 백오프 시간(초)을 반환합니다.
+        """
+        with self._lock:
+            self._counters["throttles"] += 1
+            self._consecutive_throttles += 1
+            self._scale = max(MIN_SCALE, self._scale / 2)
+            backoff = min(
+                BACKOFF_MAX_SECONDS,
+                BACKOFF_BASE_SECONDS * 2 ** (self._consecutive_throttles - 1),
+            )
+            backoff = random.uniform(backoff / 2, backoff)
+            self._backoff_until = max(self._backoff_until, time.monotonic() + backoff)
+            return backoff
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_throttles = 0
+            self._scale = min(1.0, self._scale + SCALE_RECOVERY_STEP)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            counters["scale"] = self._scale
+            return counters
+
+    def flush_metrics(self, dimensions=None):
+        """
+        지금까지의 카운터를 EMF 메트릭으로 출력하고 초기화합니다.
+        """
+        with self._lock:
+            counters = self._counters
+            self._counters = self._empty_counters()
+            scale = self._scale
+        emit_metrics(
+            {
+                "BedrockTokensGranted": counters["granted"],
+                "BedrockAdmissionWaits": counters["waits"],
+                "BedrockAdmissionWaitTime": counters["waitMs"] or None,
+                "BedrockThrottles": counters["throttles"],
+                "BedrockAdmissionTimeouts": counters["timeouts"],
+                "BedrockLimiterConflicts": counters["conflicts"],
+                "BedrockRateScale": scale,
+            },
+            units={
+                "BedrockAdmissionWaitTime": "Milliseconds",
+                "BedrockRateScale": "None",
+            },
+            dimensions=dimensions,
+        )
@@ -0,0 +1,135 @@
+"""
+Bedrock 수락 제어 벤치마크.
+
+여러 AnalyzeImage 컨테이너(각각 워커 스레드 여러 개)가 할당량이 있는 Bedrock 대역을
+동시에 호출할 때, 제한 없이 호출하는 경우와 bedrock_limiter를 거치는 경우의
+성공 호출 수(초당), 스로틀 수, 허가 대기 시간을 비교합니다.
+컨테이너마다 BedrockLimiter 인스턴스를 따로 만들고 DynamoDB 대역 테이블만 공유합니다.
+
+사용법 (lambda_backend 디렉터리에서):
+    python benchmarks/bench_bedrock_limiter.py
+    python benchmarks/bench_bedrock_limiter.py --containers 12 --quota 20 --seconds 10
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bedrock_limiter import BedrockLimiter, is_throttle_error  # noqa: E402
+from fakes import FakeAWS  # noqa: E402
+
+LIMITER_TABLE_NAME = "bedrock-limiter"
+REQUEST_BODY = (
+    '{"messages": [{"role": "user", "content": [{"type": "text", "text": "hi"}]}]}'
+)
+
+
+def run(args, use_limiter):
+    aws = FakeAWS(
+        dynamodb_latency=args.dynamodb_latency,
+        bedrock_latency=args.bedrock_latency,
+        bedrock_quota_per_second=args.quota,
+        seed=1,
+    ).install()
+    aws.dynamodb.create_table(LIMITER_TABLE_NAME, "limiterKey")
+
+    stop_at = time.monotonic() + args.seconds
+    lock = threading.Lock()
+    totals = {"ok": 0, "throttled": 0}
+    limiters = []
+
+    def invoke():
+        return aws.bedrock.invoke_model(modelId="bench", body=REQUEST_BODY)
+
+    def worker(limiter):
+        while time.monotonic() < stop_at:
+            if limiter is None:
+                try:
+                    invoke()
+                    outcome = "ok"
+                except Exception as e:
+                    if not is_throttle_error(e):
+                        raise
+                    # 제한 없이 호출하는 쪽은 SDK 재시도처럼 짧게 쉬고 다시 호출합니다.
+                    outcome = "throttled"
+                    time.sleep(0.05)
+            else:
+                before = limiter.stats()["throttles"]
+                limiter.call(invoke)
+                outcome = "ok"
+                with lock:
+                    totals["throttled"] += limiter.stats()["throttles"] - before
+            with lock:
+                totals[outcome] += 1
+
+    threads = []
+    for _ in range(args.containers):
+        limiter = None
+        if use_limiter:
+            limiter = BedrockLimiter(
+                LIMITER_TABLE_NAME,
+                key="bedrock:bench",
+                rate_per_second=args.quota * args.target,
+                burst=max(1, int(args.quota * args.target / 4)),
+                max_concurrency=args.max_concurrency,
+            )
+            limiters.append(limiter)
+        for _ in range(args.workers):
+            threads.append(threading.Thread(target=worker, args=(limiter,)))
+
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    waits = [value for limiter in limiters for value in limiter.stats()["waitMs"]]
+    conflicts = sum(limiter.stats()["conflicts"] for limiter in limiters)
+    return {
+        "ok_per_second": totals["ok"] / elapsed,
+        "throttled": totals["throttled"],
+        "bedrock_calls": aws.bedrock.calls,
+        "wait_p50_ms": statistics.median(waits) if waits else 0.0,
+        "conflicts": conflicts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bedrock admission control benchmark")
+    parser.add_argument("--containers", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--quota", type=float, default=20.0, help="calls per second")
+    parser.add_argument(
+        "--target", type=float, default=0.9, help="limiter rate as a quota fraction"
+    )
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--bedrock-latency", type=float, default=0.2)
+    parser.add_argument("--dynamodb-latency", type=float, default=0.004)
+    args = parser.parse_args()
+
+    print(
+        f"{args.containers} containers x {args.workers} workers, "
+        f"quota {args.quota:g}/s, {args.seconds:g}s"
+    )
+    print(
+        f"{'mode':<10}{'ok/s':>8}{'throttled':>11}{'calls':>8}"
+        f"{'wait p50 ms':>13}{'conflicts':>11}"
+    )
+    for name, use_limiter in (("none", False), ("limiter", True)):
+        result = run(args, use_limiter)
+        print(
+            f"{name:<10}{result['ok_per_second']:>8.1f}{result['throttled']:>11}"
+            f"{result['bedrock_calls']:>8}{result['wait_p50_ms']:>13.1f}"
+            f"{result['conflicts']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
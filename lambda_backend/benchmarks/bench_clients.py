@@ -0,0 +1,155 @@
+"""
+boto3 클라이언트 초기화 방식 비교 벤치마크.
+
+1. 콜드 스타트 init: 각 핸들러를 새 인터프리터에서 import하는 데 걸리는 시간을 측정합니다.
+   --compare-ref로 git ref(예: 이전 커밋)의 핸들러와 함께 비교할 수 있습니다.
+2. 요청 지연: --latency-table을 주면 실제 DynamoDB 테이블에 get_item을 반복 호출하여
+   boto3 기본 설정과 aws_clients 설정의 p50/p99를 비교합니다. (AWS 자격 증명 필요)
+
+사용법 (lambda_backend 디렉터리에서):
+    python benchmarks/bench_clients.py --compare-ref HEAD~1
+    python benchmarks/bench_clients.py --latency-table analysis-results --requests 500
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+
+HANDLERS = (
+    "AnalyzeImage",
+    "GetAnalysisResult",
+    "GetFoodlog",
+    "GetUserProfile",
+    "RequestAnalysis",
+    "SaveAnalysis",
+    "UpdateOnboardingProfile",
+    "UploadImage",
+)
+
+# import 시점에 필요한 환경 변수 (실제 AWS 호출은 하지 않음)
+DUMMY_ENV = {
+    "AWS_DEFAULT_REGION": "ap-northeast-2",
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "BUCKET_NAME": "benchmark-bucket",
+    "MODEL_ID": "benchmark-model",
+    "RESULTS_TABLE_NAME": "analysis-results",
+    "TABLE_NAME": "food-logs",
+    "SQS_QUEUE_URL": "https://sqs.ap-northeast-2.amazonaws.com/000000000000/q",
+    "USER_POOL_ID": "ap-northeast-2_benchmark",
+}
+
+IMPORT_SNIPPET = (
+    "import sys, time; sys.path.insert(0, sys.argv[1]); t = time.perf_counter(); "
+    "__import__(sys.argv[2]); print((time.perf_counter() - t) * 1000)"
+)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure_import(source_dir, handler, repeat):
+    env = {**os.environ, **DUMMY_ENV}
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET, source_dir, handler],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=source_dir,
+        )
+        if output.returncode != 0:
+            return None
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+
+def export_ref(ref, target_dir):
+    """
+    git ref의 lambda_backend 디렉터리를 임시 디렉터리에 풀어 놓습니다.
+    """
+    archive = subprocess.run(
+        ["git", "archive", ref, "."], cwd=BACKEND_DIR, capture_output=True, check=True
+    )
+    subprocess.run(["tar", "-x", "-C", target_dir], input=archive.stdout, check=True)
+    return target_dir
+
+
+def run_init_benchmark(args):
+    columns = [("current", BACKEND_DIR)]
+    temp_dir = None
+    if args.compare_ref:
+        temp_dir = tempfile.TemporaryDirectory()
+        columns.insert(
+            0, (args.compare_ref, export_ref(args.compare_ref, temp_dir.name))
+        )
+
+    print(f"import time (median of {args.repeat} fresh interpreters, ms)")
+    print(f"{'handler':<26}" + "".join(f"{name:>14}" for name, _ in columns))
+    for handler in HANDLERS:
+        row = f"{handler:<26}"
+        for _, source_dir in columns:
+            value = measure_import(source_dir, handler, args.repeat)
+            row += f"{'error':>14}" if value is None else f"{value:>14.1f}"
+        print(row)
+
+    if temp_dir:
+        temp_dir.cleanup()
+
+
+def run_latency_benchmark(args):
+    import boto3
+
+    from aws_clients import get_table
+
+    tables = (
+        ("boto3 default", boto3.resource("dynamodb").Table(args.latency_table)),
+        ("aws_clients", get_table(args.latency_table)),
+    )
+    key = {args.key_name: args.key_value}
+    print(f"get_item latency on {args.latency_table} ({args.requests} requests, ms)")
+    print(f"{'config':<16}{'p50':>10}{'p99':>10}{'max':>10}")
+    for name, table in tables:
+        table.get_item(Key=key)  # 연결 수립은 측정에서 제외
+        timings = []
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            table.get_item(Key=key)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(
+            f"{name:<16}{percentile(timings, 50):>10.1f}"
+            f"{percentile(timings, 99):>10.1f}{max(timings):>10.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="boto3 client setup benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--compare-ref", help="함께 비교할 git ref (예: HEAD~1)")
+    parser.add_argument(
+        "--latency-table", help="get_item 지연을 측정할 DynamoDB 테이블"
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--key-name", default="analysisId")
+    parser.add_argument("--key-value", default="benchmark")
+    args = parser.parse_args()
+
+    run_init_benchmark(args)
+    if args.latency_table:
+        print()
+        run_latency_benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
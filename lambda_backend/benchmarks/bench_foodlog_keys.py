@@ -0,0 +1,234 @@
+"""
+음식 기록 키 설계 비교 (기존 log_id 키 vs v2 entry_key 키 + meal-type-index).
+
+FakeAWS에 여러 사용자의 반년치 기록과 나중에 기록한 지난 식사(back-dated)를 넣고,
+1. scripts/migrate_foodlogs_v2.py로 v2 테이블에 복사합니다. 첫 실행은 스캔 도중 실패시키고
+   같은 체크포인트로 다시 실행하여, 이어서 복사한 결과가 빠짐/중복 없이 원본과 같은지 확인합니다.
+2. GetFoodlog를 legacy/v2 읽기 모드로 실행하여 시나리오별 query 호출 수, 읽은 아이템 수
+   (ScannedCount, 읽기 용량에 비례), 반환한 기록 수와 정답(식사 날짜 기준) 기록 수를 비교합니다.
+   (가짜 테이블의 query는 테이블 전체를 훑으므로 지연 시간은 비교하지 않습니다)
+
+사용법 (lambda_backend 디렉터리에서):
+    python benchmarks/bench_foodlog_keys.py
+    python benchmarks/bench_foodlog_keys.py --users 20 --days 365
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, ".."))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "scripts"))
+
+from bench_handlers import ENV  # noqa: E402
+from fakes import FakeAWS  # noqa: E402
+from daily_rollups import kst_day  # noqa: E402
+from foodlog_keys import ENTRY_KEY, MEAL_INDEX_KEY, MEAL_INDEX_NAME  # noqa: E402
+from migrate_foodlogs_v2 import Checkpoint, migrate_segment  # noqa: E402
+
+V2_TABLE_NAME = "food-logs-v2"
+SEGMENTS = 4
+KST = timezone(timedelta(hours=9))
+# ETC(야식 등 분류 없는 기록)는 meal-type-index에 들어가지 않습니다.
+MEALS = (("breakfast", 8), ("lunch", 12), ("snack", 15), ("dinner", 19), ("ETC", 22))
+
+
+class FlakyScan:
+    """
+    scan이 fail_at번째 호출에서 한 번 실패하는 테이블 래퍼 (마이그레이션 중단 재현)
+    """
+
+    def __init__(self, table, fail_at):
+        self.table = table
+        self.fail_at = fail_at
+        self.calls = 0
+
+    def scan(self, **params):
+        self.calls += 1
+        if self.calls == self.fail_at:
+            raise RuntimeError("simulated interruption")
+        return self.table.scan(**params)
+
+
+def seed(table, users, days, backdated):
+    """
+    사용자별로 days일치 하루 5끼 기록과, 오늘 저장한 지난 식사 backdated개를 넣습니다.
+    {(user_id, KST 날짜): 기록 수} 정답을 반환합니다.
+    """
+    now = datetime.now(KST)
+    truth = {}
+    for u in range(users):
+        user_id = f"bench-user-{u}"
+        entries = []
+        for d in range(days):
+            day = (now - timedelta(days=d)).date()
+            for meal_type, hour in MEALS:
+                eaten_at = datetime.combine(day, datetime.min.time(), KST).replace(
+                    hour=hour, minute=17
+                )
+                entries.append((eaten_at, eaten_at, meal_type))
+        # 오늘 저장했지만 며칠 전에 먹은 식사 (기존 키로는 오늘 범위에 들어감)
+        for b in range(backdated):
+            eaten_at = (now - timedelta(days=1 + b % 7)).replace(hour=20, minute=b)
+            entries.append((eaten_at, now - timedelta(minutes=b), "dinner"))
+        for i, (eaten_at, created_at, meal_type) in enumerate(entries):
+            created_utc = created_at.astimezone(timezone.utc)
+            table.put(
+                {
+                    "user_id": user_id,
+                    "log_id": f"{created_utc.isoformat()}#{i:08x}",
+                    "food_name": "Kimchi Fried Rice",
+                    "calories": 620,
+                    "protein": 18,
+                    "carbs": 90,
+                    "fat": 20,
+                    "meal_type": meal_type,
+                    "eaten_at": eaten_at.replace(tzinfo=None).isoformat(),
+                    "created_at": created_utc.isoformat(),
+                }
+            )
+            key = (user_id, kst_day(eaten_at.replace(tzinfo=None).isoformat()))
+            truth[key] = truth.get(key, {})
+            truth[key][meal_type] = truth[key].get(meal_type, 0) + 1
+    return truth
+
+
+def migrate(legacy, v2_table, page_size):
+    """
+    첫 실행은 중간에 실패시키고, 같은 체크포인트로 다시 실행합니다.
+    """
+    path = os.path.join(tempfile.mkdtemp(), "checkpoint.json")
+    runs = []
+    for attempt, table in enumerate((FlakyScan(legacy, fail_at=3), legacy)):
+        checkpoint = Checkpoint(path, "food-logs", V2_TABLE_NAME, SEGMENTS)
+        started = time.perf_counter()
+        failed = 0
+        for segment in range(SEGMENTS):
+            try:
+                migrate_segment(table, v2_table, segment, checkpoint, page_size, False)
+            except RuntimeError:
+                failed += 1
+        done = sum(
+            progress["done"] for progress in checkpoint.state["segments"].values()
+        )
+        runs.append(
+            f"run {attempt + 1}: {done}/{SEGMENTS} segments done, {failed} failed, "
+            f"{v2_table.item_count()} items in v2, "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+    return runs
+
+
+def count_scanned(table):
+    """
+    query 호출 수와 ScannedCount를 세도록 테이블을 감쌉니다.
+    """
+    original = table.query
+    counter = {"queries": 0, "scanned": 0}
+
+    def query(**params):
+        response = original(**params)
+        counter["queries"] += 1
+        counter["scanned"] += response["ScannedCount"]
+        return response
+
+    table.query = query
+    return counter
+
+
+def load_handler(mode):
+    os.environ["FOODLOG_READ_MODE"] = mode
+    import GetFoodlog
+
+    return importlib.reload(GetFoodlog)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--backdated", type=int, default=6)
+    parser.add_argument("--page-size", type=int, default=500)
+    args = parser.parse_args()
+
+    os.environ.update(ENV)
+    os.environ["FOODLOG_V2_TABLE_NAME"] = V2_TABLE_NAME
+    os.environ.pop("ROLLUP_TABLE_NAME", None)  # ETag/304 없이 조회 비용만 비교
+    aws = FakeAWS().install()
+    legacy = aws.dynamodb.create_table(ENV["TABLE_NAME"], "user_id", "log_id")
+    v2_table = aws.dynamodb.create_table(
+        V2_TABLE_NAME,
+        "user_id",
+        ENTRY_KEY,
+        indexes={MEAL_INDEX_NAME: (MEAL_INDEX_KEY, ENTRY_KEY)},
+    )
+
+    truth = seed(legacy, args.users, args.days, args.backdated)
+    print(f"seeded {legacy.item_count()} food logs for {args.users} users")
+
+    # 1. 중단 후 재개하는 마이그레이션
+    for line in migrate(legacy, v2_table, args.page_size):
+        print(line)
+    status = "OK" if v2_table.item_count() == legacy.item_count() else "MISMATCH"
+    print(
+        f"migration check: legacy {legacy.item_count()}, v2 {v2_table.item_count()} {status}"
+    )
+
+    # 2. 읽기 모드별 조회 비교
+    user_id = "bench-user-0"
+    now = datetime.now(KST)
+    today = now.date().isoformat()
+    month = {"year": str(now.year), "month": str(now.month)}
+    month_days = [
+        day for (user, day) in truth if user == user_id and day[:7] == today[:7]
+    ]
+    scenarios = {
+        "today": ({}, sum(truth[(user_id, today)].values())),
+        "today_breakfast": (
+            {"meal_type": "breakfast"},
+            truth[(user_id, today)].get("breakfast", 0),
+        ),
+        "month_full": (
+            {**month, "mode": "full"},
+            sum(sum(truth[(user_id, day)].values()) for day in month_days),
+        ),
+        "month_dinner_full": (
+            {**month, "mode": "full", "meal_type": "dinner"},
+            sum(truth[(user_id, day)].get("dinner", 0) for day in month_days),
+        ),
+        "month_etc_full": (
+            {**month, "mode": "full", "meal_type": "ETC"},
+            sum(truth[(user_id, day)].get("ETC", 0) for day in month_days),
+        ),
+    }
+    counters = {"legacy": count_scanned(legacy), "v2": count_scanned(v2_table)}
+
+    header = f"{'scenario':<20}{'mode':<8}{'queries':>9}{'read':>7}{'returned':>10}{'expected':>10}"
+    print(header)
+    print("-" * len(header))
+    for mode in ("legacy", "v2"):
+        handler = load_handler(mode)
+        for name, (params, expected) in scenarios.items():
+            event = {
+                "requestContext": {"authorizer": {"jwt": {"claims": {"sub": user_id}}}},
+                "queryStringParameters": params,
+                "headers": {},
+            }
+            counter = counters[mode]
+            counter.update(queries=0, scanned=0)
+            response = handler.lambda_handler(event, None)
+            returned = len(json.loads(response["body"])["items"])
+            print(
+                f"{name:<20}{mode:<8}{counter['queries']:>9}{counter['scanned']:>7}"
+                f"{returned:>10}{expected:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
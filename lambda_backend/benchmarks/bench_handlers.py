@@ -0,0 +1,507 @@
+"""
+핸들러별 콜드 스타트/지연/메모리 벤치마크.
+
+1. init: 각 핸들러를 새 인터프리터에서 import하는 시간(중앙값)과 -X importtime 기준으로
+   가장 오래 걸린 import를 측정합니다.
+2. 실행: 핸들러마다 별도 프로세스에서 인메모리 AWS 대역(benchmarks/fakes.py)을 설치하고
+   테스트 데이터를 넣은 뒤, benchmarks/events/<핸들러>.json의 기록된 이벤트로
+   lambda_handler를 반복 호출하여 p50/p95/p99, 호출당 메모리 할당 peak(tracemalloc),
+   프로세스 최대 RSS를 측정합니다.
+3. 결과를 기준선 JSON(benchmarks/baselines/handlers.json)과 비교하여 임계값 이상 느려지거나
+   메모리를 더 쓰면 회귀로 표시하고 종료 코드 1을 반환합니다.
+
+같은 기계에서 만든 기준선끼리만 비교하세요. (기준선에 Python 버전/플랫폼이 기록됩니다)
+
+사용법 (lambda_backend 디렉터리에서):
+    python benchmarks/bench_handlers.py
+    python benchmarks/bench_handlers.py --handlers GetFoodlog,GetAnalysisResult --iterations 500
+    python benchmarks/bench_handlers.py --save-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARK_DIR)
+EVENTS_DIR = os.path.join(BENCHMARK_DIR, "events")
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baselines", "handlers.json")
+
+HANDLERS = (
+    "AnalyzeImage",
+    "EnqueueUploadAnalysis",
+    "GetAnalysisResult",
+    "GetFoodlog",
+    "GetNutritionAnalytics",
+    "GetUserProfile",
+    "RequestAnalysis",
+    "SaveAnalysis",
+    "UpdateOnboardingProfile",
+    "UploadImage",
+)
+
+# 이미지 디코딩이 포함된 핸들러는 반복 횟수를 줄입니다.
+ITERATION_SCALE = {"AnalyzeImage": 0.1}
+
+BENCH_USER = "bench-user"
+BENCH_MONTH = (2026, 9)
+
+ENV = {
+    "AWS_DEFAULT_REGION": "ap-northeast-2",
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "BUCKET_NAME": "bench-bucket",
+    "MODEL_ID": "bench-model",
+    "RESULTS_TABLE_NAME": "analysis-results",
+    "TABLE_NAME": "food-logs",
+    "ROLLUP_TABLE_NAME": "food-log-daily",
+    "IDEMPOTENCY_TABLE_NAME": "idempotency",
+    "PROFILE_CACHE_TABLE_NAME": "profile-cache",
+    "ANALYTICS_CACHE_TABLE_NAME": "analytics-cache",
+    "SQS_QUEUE_URL": "https://sqs.ap-northeast-2.amazonaws.com/000000000000/analysis-jobs",
+    "USER_POOL_ID": "ap-northeast-2_bench",
+    "IMAGE_BASE_URL": "https://images.example.com",
+}
+
+# 기준선 대비 허용 증가율과, 잡음으로 보고 무시할 최소 절대 증가량
+DEFAULT_THRESHOLDS = {
+    "init_ms": {"ratio": 0.25, "floor": 20.0},
+    "p50_ms": {"ratio": 0.25, "floor": 0.05},
+    "p95_ms": {"ratio": 0.35, "floor": 0.1},
+    "p99_ms": {"ratio": 0.5, "floor": 0.2},
+    "alloc_peak_kb": {"ratio": 0.15, "floor": 16.0},
+    "peak_rss_mb": {"ratio": 0.15, "floor": 5.0},
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+# ---------------------------------------------------------------------------
+# init 측정
+# ---------------------------------------------------------------------------
+
+INIT_SNIPPET = (
+    "import sys, time; sys.path.insert(0, sys.argv[1]); t = time.perf_counter(); "
+    "__import__(sys.argv[2]); print((time.perf_counter() - t) * 1000)"
+)
+
+
+def measure_init(handler, repeat):
+    """
+    새 인터프리터에서 핸들러 import 시간(중앙값)과 핸들러가 직접 import한 모듈 중 가장 무거운 5개를 반환합니다.
+    """
+    env = {**os.environ, **ENV}
+    timings = []
+    heaviest = []
+    for attempt in range(repeat):
+        args = [sys.executable]
+        if attempt == 0:
+            args += ["-X", "importtime"]
+        output = subprocess.run(
+            args + ["-c", INIT_SNIPPET, BACKEND_DIR, handler],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=BACKEND_DIR,
+        )
+        if output.returncode != 0:
+            raise RuntimeError(f"{handler} import failed:\n{output.stderr[-2000:]}")
+        if attempt == 0:
+            # -X importtime 출력이 측정을 느리게 하므로 첫 실행은 import 목록만 수집합니다.
+            top_level = []
+            for line in output.stderr.splitlines():
+                match = IMPORTTIME_LINE.match(line)
+                if match and len(match.group(3)) == 3:
+                    top_level.append((int(match.group(2)) / 1000, match.group(4)))
+            heaviest = [
+                {"module": name, "cumulative_ms": round(ms, 1)}
+                for ms, name in sorted(top_level, reverse=True)[:5]
+            ]
+            continue
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings), heaviest
+
+
+# ---------------------------------------------------------------------------
+# 핸들러 실행 (워커 프로세스)
+# ---------------------------------------------------------------------------
+
+
+class LambdaContext:
+    function_name = "benchmark"
+    aws_request_id = "bench-request"
+    memory_limit_in_mb = 1024
+
+    def __init__(self, timeout_ms=30000):
+        self._deadline = time.monotonic() + timeout_ms / 1000
+
+    def get_remaining_time_in_millis(self):
+        return int((self._deadline - time.monotonic()) * 1000)
+
+
+def outcome(response):
+    """
+    API 응답은 상태 코드, SQS 배치 응답은 실패한 메시지 수로 요약합니다.
+    """
+    if "batchItemFailures" in response:
+        return f"{len(response['batchItemFailures'])} failed"
+    return response.get("statusCode")
+
+
+def seed(aws):
+    """
+    핸들러가 읽는 테이블/객체를 만듭니다.
+    """
+    from datetime import datetime, timedelta, timezone
+    from decimal import Decimal
+
+    from daily_rollups import NUTRIENT_FIELDS, kst_day
+
+    db = aws.dynamodb
+    food_logs = db.create_table(ENV["TABLE_NAME"], "user_id", "log_id")
+    rollups = db.create_table(ENV["ROLLUP_TABLE_NAME"], "user_id", "day")
+    results = db.create_table(ENV["RESULTS_TABLE_NAME"], "analysisId")
+    db.create_table(ENV["IDEMPOTENCY_TABLE_NAME"], "idempotencyKey")
+    db.create_table(ENV["PROFILE_CACHE_TABLE_NAME"], "sub")
+    db.create_table(ENV["ANALYTICS_CACHE_TABLE_NAME"], "user_id", "periodKey")
+
+    # 1. 한 달치 음식 기록 (하루 4끼) + 오늘 기록, 일자별 rollup
+    kst = timezone(timedelta(hours=9))
+    year, month = BENCH_MONTH
+    meals = (("breakfast", 8), ("lunch", 12), ("snack", 15), ("dinner", 19))
+    eaten = []
+    for day in range(1, 31):
+        for meal_type, hour in meals:
+            eaten.append((datetime(year, month, day, hour, 17, tzinfo=kst), meal_type))
+    now = datetime.now(kst)
+    for meal_type, hour in meals[: max(1, now.hour // 6)]:
+        eaten.append((now.replace(hour=hour, minute=5), meal_type))
+
+    totals = {}
+    for i, (eaten_at, meal_type) in enumerate(eaten):
+        created_at = eaten_at.astimezone(timezone.utc)
+        item = {
+            "user_id": BENCH_USER,
+            "log_id": f"{created_at.isoformat()}#{i:08x}",
+            "food_name": "Kimchi Fried Rice",
+            "calories": 620 + i % 50,
+            "protein": 18,
+            "carbs": 90,
+            "fat": 20,
+            "meal_type": meal_type,
+            "eaten_at": eaten_at.replace(tzinfo=None).isoformat(),
+            "created_at": created_at.isoformat(),
+            "image_url": f"https://images.example.com/uploads/{BENCH_USER}/{i}.jpg",
+        }
+        food_logs.put(item)
+        row = totals.setdefault(kst_day(item["eaten_at"]), dict(entry_count=0))
+        for field in NUTRIENT_FIELDS:
+            row[field] = row.get(field, 0) + item[field]
+        row["entry_count"] += 1
+    for day, row in totals.items():
+        rollups.put({"user_id": BENCH_USER, "day": day, **row})
+
+    # 2. 완료된 분석 결과 (AnalyzeImage처럼 실수는 Decimal)와 같은 결과의 압축 형식 아이템
+    from result_codec import compact_item
+
+    completed = {
+        "analysisId": "bench-completed",
+        "status": "COMPLETED",
+        "objectKey": f"uploads/{BENCH_USER}/meal-0.jpg",
+        "updatedAt": now.isoformat(),
+        "result": {
+            "candidates": [
+                {
+                    "name": name,
+                    "calories": Decimal(calories),
+                    "protein": Decimal(str(protein + 0.5)),
+                    "carbs": Decimal(str(carbs + 0.25)),
+                    "fat": Decimal(str(fat + 0.75)),
+                }
+                for name, calories, protein, carbs, fat in (
+                    ("Bibimbap", 560, 22, 85, 14),
+                    ("Bulgogi", 480, 35, 20, 26),
+                    ("Tteokbokki", 520, 10, 100, 8),
+                )
+            ]
+        },
+    }
+    results.put(completed)
+    results.put(compact_item({**completed, "analysisId": "bench-completed-compact"}))
+
+    # 3. Cognito 사용자
+    aws.cognito.add_user(
+        BENCH_USER,
+        email="bench@example.com",
+        email_verified="true",
+        birthdate="1995-04-12",
+        gender="male",
+        **{
+            "custom:height": "172",
+            "custom:weight": "68",
+            "custom:activity_level": "moderate",
+            "custom:goal": "lose",
+            "custom:target_calories": "2100",
+            "custom:target_carbs": "210",
+            "custom:target_protein": "158",
+            "custom:target_fats": "70",
+        },
+    )
+
+    # 4. 업로드된 식사 사진 (휴대폰 카메라 해상도, 품질 80)
+    try:
+        from io import BytesIO
+
+        from bench_image_preprocess import synthetic_photo
+    except ImportError:
+        return
+    for i in range(5):
+        output = BytesIO()
+        synthetic_photo(4032, 3024, i + 1).save(output, format="JPEG", quality=80)
+        aws.s3.put(
+            ENV["BUCKET_NAME"], f"uploads/{BENCH_USER}/meal-{i}.jpg", output.getvalue()
+        )
+
+
+def run_worker(handler, iterations, warmup, alloc_iterations):
+    """
+    한 핸들러의 모든 시나리오를 실행하고 결과 dict를 반환합니다. (별도 프로세스에서 호출)
+    """
+    import importlib
+    import resource
+    import tracemalloc
+
+    os.environ.update(ENV)
+    sys.path.insert(0, BACKEND_DIR)
+
+    from fakes import FakeAWS
+
+    aws = FakeAWS(seed=1).install()
+    seed(aws)
+    module = importlib.import_module(handler)
+    with open(os.path.join(EVENTS_DIR, f"{handler}.json")) as f:
+        scenarios = json.load(f)
+
+    stdout = sys.stdout
+    scenario_results = {}
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull  # 핸들러의 print 로그는 버립니다.
+        try:
+            for name, event in scenarios.items():
+                for _ in range(warmup):
+                    module.lambda_handler(event, LambdaContext())
+
+                timings = []
+                for _ in range(iterations):
+                    context = LambdaContext()
+                    started = time.perf_counter()
+                    response = module.lambda_handler(event, context)
+                    timings.append((time.perf_counter() - started) * 1000)
+                status = outcome(response)
+
+                tracemalloc.start()
+                peaks = []
+                for _ in range(alloc_iterations):
+                    tracemalloc.reset_peak()
+                    current, _ = tracemalloc.get_traced_memory()
+                    module.lambda_handler(event, LambdaContext())
+                    peaks.append(tracemalloc.get_traced_memory()[1] - current)
+                tracemalloc.stop()
+
+                scenario_results[name] = {
+                    "status": status,
+                    "iterations": iterations,
+                    "p50_ms": round(percentile(timings, 50), 3),
+                    "p95_ms": round(percentile(timings, 95), 3),
+                    "p99_ms": round(percentile(timings, 99), 3),
+                    "alloc_peak_kb": round(statistics.median(peaks) / 1024, 1),
+                }
+        finally:
+            sys.stdout = stdout
+
+    # Linux의 ru_maxrss 단위는 KB, macOS는 바이트
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "peak_rss_mb": round(max_rss / divisor, 1),
+        "scenarios": scenario_results,
+    }
+
+
+def run_handler(handler, args):
+    iterations = max(5, int(args.iterations * ITERATION_SCALE.get(handler, 1)))
+    warmup = max(1, int(args.warmup * ITERATION_SCALE.get(handler, 1)))
+    alloc_iterations = max(3, min(20, iterations // 10))
+    output = subprocess.run(
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--worker",
+            handler,
+            "--iterations",
+            str(iterations),
+            "--warmup",
+            str(warmup),
+            "--alloc-iterations",
+            str(alloc_iterations),
+        ],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **ENV},
+        cwd=BACKEND_DIR,
+    )
+    if output.returncode != 0:
+        raise RuntimeError(f"{handler} benchmark failed:\n{output.stderr[-2000:]}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+# ---------------------------------------------------------------------------
+# 기준선 비교
+# ---------------------------------------------------------------------------
+
+
+def compare(results, baseline):
+    """
+    기준선보다 임계값 이상 나빠진 지표 목록을 반환합니다.
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}
+    regressions = []
+
+    def check(label, metric, current, previous):
+        if previous is None or current is None:
+            return
+        limit = thresholds[metric]
+        if current > previous * (1 + limit["ratio"]) and (
+            current - previous > limit["floor"]
+        ):
+            regressions.append(
+                f"{label} {metric}: {previous} -> {current} "
+                f"(+{(current / previous - 1) * 100 if previous else 0:.0f}%)"
+            )
+
+    for handler, result in results.items():
+        previous = baseline.get("results", {}).get(handler)
+        if not previous:
+            continue
+        check(handler, "init_ms", result["init_ms"], previous.get("init_ms"))
+        check(
+            handler, "peak_rss_mb", result["peak_rss_mb"], previous.get("peak_rss_mb")
+        )
+        for name, scenario in result["scenarios"].items():
+            old = previous.get("scenarios", {}).get(name, {})
+            for metric in ("p50_ms", "p95_ms", "p99_ms", "alloc_peak_kb"):
+                check(f"{handler}.{name}", metric, scenario[metric], old.get(metric))
+    return regressions
+
+
+def print_report(results):
+    print(
+        f"{'handler.scenario':<36}{'init ms':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+        f"{'alloc KB':>10}{'RSS MB':>8}"
+    )
+    for handler, result in results.items():
+        for i, (name, scenario) in enumerate(result["scenarios"].items()):
+            init = f"{result['init_ms']:.0f}" if i == 0 else ""
+            rss = f"{result['peak_rss_mb']:.0f}" if i == 0 else ""
+            print(
+                f"{handler + '.' + name:<36}{init:>9}{scenario['p50_ms']:>9.2f}"
+                f"{scenario['p95_ms']:>9.2f}{scenario['p99_ms']:>9.2f}"
+                f"{scenario['alloc_peak_kb']:>10.1f}{rss:>8}"
+            )
+        heaviest = ", ".join(
+            f"{entry['module']} {entry['cumulative_ms']}ms"
+            for entry in result["heaviest_imports"][:3]
+        )
+        print(f"    heaviest imports: {heaviest}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lambda handler benchmarks")
+    parser.add_argument("--handlers", help="쉼표로 구분한 핸들러 목록 (기본: 전체)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--init-repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", help="이번 결과를 저장할 JSON 경로")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--alloc-iterations", type=int, default=20, help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(
+            args.worker, args.iterations, args.warmup, args.alloc_iterations
+        )
+        print(json.dumps(result))
+        return
+
+    handlers = args.handlers.split(",") if args.handlers else list(HANDLERS)
+    results = {}
+    for handler in handlers:
+        init_ms, heaviest = measure_init(handler, args.init_repeat + 1)
+        results[handler] = {
+            "init_ms": round(init_ms, 1),
+            "heaviest_imports": heaviest,
+            **run_handler(handler, args),
+        }
+    print_report(results)
+
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "thresholds": DEFAULT_THRESHOLDS,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.save_baseline:
+        if baseline:
+            # 이번에 측정하지 않은 핸들러와 직접 조정한 임계값은 유지합니다.
+            report["thresholds"] = baseline.get("thresholds", DEFAULT_THRESHOLDS)
+            report["results"] = {**baseline.get("results", {}), **results}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nbaseline saved to {args.baseline}")
+        return
+
+    if baseline is None:
+        print(f"\nno baseline at {args.baseline} (run with --save-baseline)")
+        return
+    if baseline.get("machine") != report["machine"]:
+        print("\nwarning: baseline was recorded on a different machine/Python")
+    regressions = compare(results, baseline)
+    if regressions:
+        print("\nregressions:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nno regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
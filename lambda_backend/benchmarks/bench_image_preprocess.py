@@ -0,0 +1,130 @@
+"""
+이미지 정규화 벤치마크.
+
+원본을 그대로 base64로 보낼 때와 normalize_image를 거친 뒤 보낼 때의
+바이트 수, base64 크기, 예상 입력 토큰, 처리 시간을 비교합니다.
+
+사용법 (lambda_backend 디렉터리에서):
+    python benchmarks/bench_image_preprocess.py
+    python benchmarks/bench_image_preprocess.py --fixtures ~/Pictures/meals
+"""
+
+import argparse
+import base64
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from PIL import Image, ImageDraw, ImageFilter  # noqa: E402
+
+from image_preprocess import normalize_image  # noqa: E402
+
+# Claude 이미지 입력 토큰 근사치: (가로 * 세로) / 750
+# (Bedrock이 큰 이미지를 서버에서 다시 축소하기 전 기준)
+TOKENS_PER_PIXEL = 1 / 750
+
+
+def synthetic_photo(width, height, seed):
+    """
+    노이즈와 도형으로 사진과 비슷한 압축률을 가지는 테스트 이미지를 만듭니다.
+    """
+    noise = Image.effect_noise((width // 4, height // 4), 40 + seed).convert("RGB")
+    image = noise.resize((width, height)).filter(ImageFilter.GaussianBlur(2))
+    draw = ImageDraw.Draw(image)
+    for i in range(6):
+        x = (seed * 97 + i * 211) % width
+        y = (seed * 53 + i * 157) % height
+        radius = min(width, height) // (4 + i)
+        color = ((seed * 40 + i * 60) % 256, (i * 90) % 256, (seed * 15) % 256)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+    return image.filter(ImageFilter.GaussianBlur(1))
+
+
+def generate_fixtures():
+    fixtures = []
+    for name, (width, height) in (("4mp", (2304, 1728)), ("12mp", (4032, 3024))):
+        image = synthetic_photo(width, height, len(fixtures) + 1)
+
+        output = BytesIO()
+        image.save(output, format="JPEG", quality=95)
+        fixtures.append((f"{name}.jpg", output.getvalue()))
+
+        # 세로로 찍은 사진 (EXIF Orientation=6)
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        output = BytesIO()
+        image.save(output, format="JPEG", quality=92, exif=exif)
+        fixtures.append((f"{name}-rotated.jpg", output.getvalue()))
+
+    output = BytesIO()
+    synthetic_photo(1920, 1440, 7).save(output, format="PNG")
+    fixtures.append(("screenshot.png", output.getvalue()))
+    return fixtures
+
+
+def load_fixtures(directory):
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                fixtures.append((name, f.read()))
+    return fixtures
+
+
+def image_tokens(image_bytes):
+    with Image.open(BytesIO(image_bytes)) as image:
+        return round(image.width * image.height * TOKENS_PER_PIXEL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", help="실제 사진이 들어 있는 디렉터리")
+    parser.add_argument("--max-edge", type=int, default=1280)
+    parser.add_argument("--quality", type=int, default=85)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else generate_fixtures()
+
+    header = (
+        f"{'fixture':<22}{'bytes in':>12}{'bytes out':>12}{'b64 in':>12}"
+        f"{'b64 out':>12}{'tokens in':>11}{'tokens out':>11}{'ms (p50)':>10}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    total_in = total_out = 0
+    for name, image_bytes in fixtures:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            normalized, _, stats = normalize_image(
+                image_bytes, max_edge=args.max_edge, quality=args.quality
+            )
+            base64.b64encode(normalized)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        total_in += stats["bytesIn"]
+        total_out += stats["bytesOut"]
+        print(
+            f"{name:<22}{stats['bytesIn']:>12,}{stats['bytesOut']:>12,}"
+            f"{len(base64.b64encode(image_bytes)):>12,}"
+            f"{len(base64.b64encode(normalized)):>12,}"
+            f"{image_tokens(image_bytes):>11,}{image_tokens(normalized):>11,}"
+            f"{statistics.median(timings):>10.1f}"
+        )
+
+    print("-" * len(header))
+    print(
+        f"total: {total_in:,} -> {total_out:,} bytes "
+        f"({100 * (1 - total_out / total_in):.1f}% smaller)"
+    )
+
+
+if __name__ == "__main__":
+    main()
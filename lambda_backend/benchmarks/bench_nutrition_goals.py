@@ -0,0 +1,138 @@
+"""
+목표 섭취량 재계산 벤치마크.
+
+1. 계산: 사용자 N명에 대해 calculate_nutritional_goals를 한 명씩 호출할 때와
+   calculate_nutritional_goals_bulk(NumPy)로 한 번에 계산할 때의 시간을 비교하고
+   결과가 모두 같은지 확인합니다.
+2. 전체 흐름: Cognito 대역(호출 지연 포함)에서 scripts/recompute_targets.py의
+   사용자 읽기 -> 계산/비교 -> 바뀐 사용자 쓰기(초당 호출 수 제한)의 처리량을 측정합니다.
+
+사용법 (lambda_backend 디렉터리에서):
+    python benchmarks/bench_nutrition_goals.py
+    python benchmarks/bench_nutrition_goals.py --users 10000,1000000 --pipeline-users 0
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from fakes import FakeAWS  # noqa: E402
+from nutrition_goals import (  # noqa: E402
+    ACTIVITY_MULTIPLIERS,
+    GOAL_ADJUSTMENTS,
+    calculate_nutritional_goals,
+    calculate_nutritional_goals_bulk,
+)
+import recompute_targets  # noqa: E402
+
+
+def random_profiles(count, seed=1):
+    rng = random.Random(seed)
+    return {
+        "birthdate": [
+            date(
+                rng.randint(1945, 2010), rng.randint(1, 12), rng.randint(1, 28)
+            ).isoformat()
+            for _ in range(count)
+        ],
+        "height": [round(rng.uniform(145, 195), 1) for _ in range(count)],
+        "weight": [round(rng.uniform(40, 120), 1) for _ in range(count)],
+        "gender": [rng.choice(("male", "female")) for _ in range(count)],
+        "activity_level": [
+            rng.choice(list(ACTIVITY_MULTIPLIERS)) for _ in range(count)
+        ],
+        "goal": [rng.choice(list(GOAL_ADJUSTMENTS)) for _ in range(count)],
+    }
+
+
+def bench_compute(count):
+    profiles = random_profiles(count)
+    columns = [profiles[name] for name in profiles]
+
+    started = time.perf_counter()
+    scalar = [calculate_nutritional_goals(*row) for row in zip(*columns)]
+    scalar_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    bulk = calculate_nutritional_goals_bulk(*columns)
+    bulk_seconds = time.perf_counter() - started
+
+    mismatches = sum(
+        1
+        for index, goals in enumerate(scalar)
+        if any(goals[name] != bulk[name][index] for name in goals)
+    )
+    print(
+        f"{count:>9}{scalar_seconds * 1000:>12.1f}{bulk_seconds * 1000:>10.1f}"
+        f"{scalar_seconds / bulk_seconds:>9.1f}x{mismatches:>12}"
+    )
+
+
+def bench_pipeline(args):
+    aws = FakeAWS(cognito_latency=args.cognito_latency).install()
+    profiles = random_profiles(args.pipeline_users, seed=2)
+    stale = random.Random(3)
+    for index, row in enumerate(zip(*profiles.values())):
+        birthdate, height, weight, gender, activity_level, goal = row
+        goals = calculate_nutritional_goals(*row)
+        # 일부 사용자는 오래된 목표가 저장된 것으로 만듭니다.
+        if stale.random() < args.stale_fraction:
+            goals["calories"] -= 50
+        aws.cognito.add_user(
+            f"user-{index:07d}",
+            birthdate=birthdate,
+            gender=gender,
+            **{
+                "custom:height": str(height),
+                "custom:weight": str(weight),
+                "custom:activity_level": activity_level,
+                "custom:goal": goal,
+            },
+            **{f"custom:target_{name}": str(value) for name, value in goals.items()},
+        )
+
+    started = time.perf_counter()
+    changes = recompute_targets.recompute(
+        argparse.Namespace(
+            user_pool_id="bench-pool",
+            profile_cache_table=None,
+            rate=args.rate,
+            concurrency=args.concurrency,
+            report=None,
+            dry_run=False,
+        )
+    )
+    elapsed = time.perf_counter() - started
+    print(
+        f"pipeline: {args.pipeline_users} users, {len(changes)} updated, "
+        f"{elapsed:.1f}s total ({args.pipeline_users / elapsed:.0f} users/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nutritional target benchmark")
+    parser.add_argument("--users", default="1000,100000,1000000")
+    parser.add_argument("--pipeline-users", type=int, default=3000)
+    parser.add_argument("--stale-fraction", type=float, default=0.02)
+    parser.add_argument("--cognito-latency", type=float, default=0.03)
+    parser.add_argument("--rate", type=float, default=25.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    print(
+        f"{'users':>9}{'scalar ms':>12}{'bulk ms':>10}{'speedup':>10}{'mismatches':>12}"
+    )
+    for count in (int(value) for value in args.users.split(",")):
+        bench_compute(count)
+    if args.pipeline_users:
+        bench_pipeline(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+분석 결과 저장 형식 비교 (맵 형식 vs result_codec 압축 형식).
+
+AnalyzeImage가 저장하는 모양의 결과 아이템(후보 3개, 단계별 timings, tokenUsage)을 만들고
+DynamoDB 아이템 크기 규칙으로 계산한 크기, 쓰기 1회당 WCU, 읽기 1회당 RCU,
+인코딩/디코딩 시간을 비교합니다. 후보 이름은 압축 사전에 없는 이름도 섞어 만듭니다.
+
+크기 규칙 (DynamoDB 개발자 안내서 기준):
+- 문자열/이진: 속성 이름 길이 + 값 바이트 수
+- 숫자: 속성 이름 길이 + 유효 숫자 2개당 1바이트 + 1바이트
+- 맵/리스트: 속성 이름 길이 + 3바이트 + 요소당 1바이트 + 요소 크기
+- WCU는 1KB, RCU는 4KB 단위로 올림 (최종 일관성 읽기는 RCU의 절반)
+
+사용법 (lambda_backend 디렉터리에서):
+    python benchmarks/bench_result_storage.py
+    python benchmarks/bench_result_storage.py --items 5000 --candidates 5
+"""
+
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from result_codec import compact_item, decode_item  # noqa: E402
+
+DISH_WORDS = (
+    "Kimchi",
+    "Fried",
+    "Rice",
+    "Spicy",
+    "Pork",
+    "Beef",
+    "Chicken",
+    "Soybean",
+    "Paste",
+    "Stew",
+    "Seaweed",
+    "Soup",
+    "Cold",
+    "Buckwheat",
+    "Noodles",
+    "Grilled",
+    "Mackerel",
+    "Steamed",
+    "Egg",
+    "Japchae",
+    "Pancake",
+    "Tofu",
+    "Dumplings",
+    "Salad",
+    "Sandwich",
+    "Pasta",
+)
+STAGES = (
+    "queueWait",
+    "s3Download",
+    "normalize",
+    "cacheLookup",
+    "encode",
+    "model",
+    "parse",
+    "dynamoWrite",
+    "endToEnd",
+)
+
+
+def number_size(value):
+    digits = str(abs(Decimal(value))).replace(".", "").strip("0") or "0"
+    return math.ceil(len(digits) / 2) + 1
+
+
+def value_size(value):
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, bool) or value is None:
+        return 1
+    if isinstance(value, (int, Decimal)):
+        return number_size(value)
+    if isinstance(value, dict):
+        return 3 + sum(
+            1 + len(key.encode("utf-8")) + value_size(item)
+            for key, item in value.items()
+        )
+    if isinstance(value, list):
+        return 3 + sum(1 + value_size(item) for item in value)
+    raise TypeError(f"unsupported type: {type(value)}")
+
+
+def item_size(item):
+    return sum(
+        len(name.encode("utf-8")) + value_size(value) for name, value in item.items()
+    )
+
+
+def make_item(rng, index, candidates):
+    def number(low, high):
+        # 모델은 정수 또는 소수점 한 자리 값을 주로 반환합니다.
+        value = rng.uniform(low, high)
+        return Decimal(str(round(value, rng.choice((0, 1)))))
+
+    return {
+        "analysisId": f"{rng.getrandbits(128):032x}"[:8] + f"-{index:04d}-4000-8000-"
+        f"{rng.getrandbits(48):012x}",
+        "status": "COMPLETED",
+        "result": {
+            "candidates": [
+                {
+                    "name": " ".join(rng.sample(DISH_WORDS, rng.randint(1, 3))),
+                    "calories": number(150, 1100),
+                    "protein": number(2, 60),
+                    "carbs": number(5, 140),
+                    "fat": number(1, 50),
+                }
+                for _ in range(candidates)
+            ]
+        },
+        "objectKey": f"uploads/{rng.getrandbits(128):032x}/{rng.getrandbits(128):032x}.jpg",
+        "updatedAt": datetime.now(timezone.utc).isoformat(),
+        "cacheHit": False,
+        "timings": {stage: rng.randint(1, 9000) for stage in STAGES},
+        "tokenUsage": {
+            "inputTokens": rng.randint(1200, 1700),
+            "outputTokens": rng.randint(90, 260),
+        },
+        "expiresAt": int(time.time()) + 3 * 24 * 3600,
+    }
+
+
+def summarize(sizes):
+    return {
+        "mean": statistics.mean(sizes),
+        "p95": sorted(sizes)[int(len(sizes) * 0.95) - 1],
+        "max": max(sizes),
+        "wcu": statistics.mean(math.ceil(size / 1024) for size in sizes),
+        "rcu": statistics.mean(math.ceil(size / 4096) for size in sizes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis result storage benchmark")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--candidates", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    items = [make_item(rng, i, args.candidates) for i in range(args.items)]
+
+    started = time.perf_counter()
+    compact = [compact_item(item) for item in items]
+    encode_us = (time.perf_counter() - started) / len(items) * 1e6
+    started = time.perf_counter()
+    decoded = [decode_item(item) for item in compact]
+    decode_us = (time.perf_counter() - started) / len(items) * 1e6
+
+    # 디코딩 결과가 원래 아이템과 같은지 확인 (Decimal과 float 비교)
+    mismatches = sum(
+        1
+        for original, restored in zip(items, decoded)
+        if any(
+            float(a[field]) != float(b[field])
+            for a, b in zip(
+                original["result"]["candidates"], restored["result"]["candidates"]
+            )
+            for field in ("calories", "protein", "carbs", "fat")
+        )
+        or original["timings"] != restored["timings"]
+    )
+
+    formats = {
+        "map": summarize([item_size(item) for item in items]),
+        "compact": summarize([item_size(item) for item in compact]),
+    }
+    print(f"{args.items} items, {args.candidates} candidates each")
+    print(
+        f"{'format':<10}{'mean B':>9}{'p95 B':>8}{'max B':>8}"
+        f"{'WCU/put':>9}{'RCU/get':>9}"
+    )
+    for name, row in formats.items():
+        print(
+            f"{name:<10}{row['mean']:>9.0f}{row['p95']:>8}{row['max']:>8}"
+            f"{row['wcu']:>9.2f}{row['rcu']:>9.2f}"
+        )
+    saved = 1 - formats["compact"]["mean"] / formats["map"]["mean"]
+    print(f"storage saved: {saved:.0%}")
+    print(f"encode {encode_us:.1f} us/item, decode {decode_us:.1f} us/item")
+    print(f"round-trip mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
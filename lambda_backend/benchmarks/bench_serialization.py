@@ -0,0 +1,125 @@
+"""
+응답 직렬화 벤치마크.
+
+한 달치 음식 기록(DynamoDB가 반환하는 Decimal 포함)을 기존 방식
+(json.dumps(default=str), DecimalEncoder)과 serialization 모듈(표준 json, orjson)로
+직렬화하는 시간과 크기, gzip 압축 후 크기/시간을 비교합니다.
+
+사용법 (lambda_backend 디렉터리에서):
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --items 120,600 --repeat 500
+"""
+
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import serialization  # noqa: E402
+from serialization import _default  # noqa: E402
+
+
+class DecimalEncoder(json.JSONEncoder):
+    """
+    기존 GetAnalysisResult의 인코더 (비교용)
+    """
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            if obj % 1 == 0:
+                return int(obj)
+            else:
+                return float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+
+def month_payload(count):
+    """
+    GetFoodlog 월 조회 응답과 같은 모양의 데이터 (숫자는 DynamoDB처럼 Decimal)
+    """
+    items = []
+    for i in range(count):
+        day = 1 + i * 30 // count
+        items.append(
+            {
+                "user_id": "3f1c2a9e-5b7d-4e21-9c0a-7d2b8e6f4a10",
+                "log_id": f"2026-09-{day:02d}T03:{i % 60:02d}:00.123456+00:00#{i:08x}",
+                "food_name": "Kimchi Fried Rice",
+                "calories": Decimal(620 + i % 50),
+                "protein": Decimal(18),
+                "carbs": Decimal(90),
+                "fat": Decimal("20.5"),
+                "meal_type": ("breakfast", "lunch", "snack", "dinner")[i % 4],
+                "eaten_at": f"2026-09-{day:02d}T12:{i % 60:02d}:00",
+                "created_at": f"2026-09-{day:02d}T03:{i % 60:02d}:00.123456+00:00",
+                "image_url": f"https://images.example.com/uploads/user/{i}.jpg",
+            }
+        )
+    return {"items": items, "last_evaluated_key": None}
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization benchmark")
+    parser.add_argument("--items", default="120,300,600")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    orjson = serialization.orjson
+    print(f"orjson: {'available' if orjson else 'not installed'}")
+    print(f"{'items':>6} {'method':<30}{'p50 ms':>9}{'bytes':>9}")
+    for count in (int(value) for value in args.items.split(",")):
+        payload = month_payload(count)
+        methods = [
+            ("json default=str (old)", lambda: json.dumps(payload, default=str)),
+            ("DecimalEncoder (old)", lambda: json.dumps(payload, cls=DecimalEncoder)),
+            (
+                "serialization (json)",
+                lambda: json.dumps(
+                    payload, default=_default, separators=(",", ":"), ensure_ascii=False
+                ),
+            ),
+        ]
+        if orjson:
+            methods.append(
+                (
+                    "serialization (orjson)",
+                    lambda: orjson.dumps(payload, default=_default).decode("utf-8"),
+                )
+            )
+        body = None
+        for name, function in methods:
+            p50, body = measure(function, args.repeat)
+            print(f"{count:>6} {name:<30}{p50:>9.3f}{len(body):>9}")
+
+        raw = serialization.dumps(payload).encode("utf-8")
+        p50, compressed = measure(
+            lambda: gzip.compress(raw, serialization.GZIP_LEVEL, mtime=0), args.repeat
+        )
+        print(f"{count:>6} {'+ gzip (level 6)':<30}{p50:>9.3f}{len(compressed):>9}")
+        if serialization.brotli:
+            p50, compressed = measure(
+                lambda: serialization.brotli.compress(
+                    raw, quality=serialization.BROTLI_QUALITY
+                ),
+                args.repeat,
+            )
+            print(f"{count:>6} {'+ brotli (q5)':<30}{p50:>9.3f}{len(compressed):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+썸네일 벤치마크.
+
+휴대폰 사진(원본)과 AnalyzeImage가 만든 정규화 이미지에서 크기별 WebP/JPEG 썸네일을 만들 때의
+바이트 수와 생성 시간, 월간 목록(기록 90개)을 원본/썸네일로 내려받을 때의 전송량을 비교합니다.
+FakeS3로 ensure_thumbnails를 두 번 실행하여 두 번째 실행이 head_object 한 번으로 끝나는지도
+확인합니다.
+
+사용법 (lambda_backend 디렉터리에서):
+    python benchmarks/bench_thumbnails.py
+    python benchmarks/bench_thumbnails.py --fixtures ~/Pictures/meals --sizes 160,320,640
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_image_preprocess import generate_fixtures, load_fixtures  # noqa: E402
+from fakes import FakeS3  # noqa: E402
+from image_preprocess import normalize_image  # noqa: E402
+from image_thumbnails import (  # noqa: E402
+    ensure_thumbnails,
+    parse_formats,
+    parse_sizes,
+    render_thumbnails,
+)
+
+MONTH_ENTRIES = 90
+
+
+class CountingS3(FakeS3):
+    def __init__(self):
+        super().__init__()
+        self.heads = 0
+        self.puts = 0
+
+    def head_object(self, **kwargs):
+        self.heads += 1
+        return super().head_object(**kwargs)
+
+    def put_object(self, **kwargs):
+        self.puts += 1
+        return super().put_object(**kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", help="실제 사진이 들어 있는 디렉터리")
+    parser.add_argument("--sizes", default="160,480")
+    parser.add_argument("--formats", default="webp,jpeg")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sizes = parse_sizes(args.sizes)
+    formats = parse_formats(args.formats)
+    fixtures = [
+        (name, image_bytes)
+        for name, image_bytes in (
+            load_fixtures(args.fixtures) if args.fixtures else generate_fixtures()
+        )
+        if name.endswith(".jpg") or args.fixtures
+    ]
+
+    columns = "".join(f"{f'{size} {fmt}':>12}" for size in sizes for fmt in formats)
+    header = f"{'fixture':<22}{'source':<12}{'bytes':>11}{columns}{'ms (p50)':>10}"
+    print(header)
+    print("-" * len(header))
+
+    originals = []
+    thumbnails = {target: [] for target in ((s, f) for s in sizes for f in formats)}
+    for name, image_bytes in fixtures:
+        normalized, _, _ = normalize_image(image_bytes)
+        originals.append(len(image_bytes))
+        for source, data in (("original", image_bytes), ("normalized", normalized)):
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                rendered = render_thumbnails(data, sizes, formats)
+                timings.append((time.perf_counter() - started) * 1000)
+            if source == "normalized":
+                for target, output in rendered.items():
+                    thumbnails[target].append(len(output))
+            print(
+                f"{name:<22}{source:<12}{len(data):>11,}"
+                + "".join(f"{len(rendered[target]):>12,}" for target in thumbnails)
+                + f"{statistics.median(timings):>10.1f}"
+            )
+
+    print("-" * len(header))
+    month_original = statistics.mean(originals) * MONTH_ENTRIES
+    print(f"month view ({MONTH_ENTRIES} entries): originals {month_original:,.0f} B")
+    for (size, fmt), values in thumbnails.items():
+        month = statistics.mean(values) * MONTH_ENTRIES
+        print(
+            f"  {size} {fmt}: {month:,.0f} B "
+            f"({100 * (1 - month / month_original):.1f}% smaller)"
+        )
+
+    # 멱등성: 두 번째 실행은 렌더링/업로드 없이 head_object 한 번으로 끝나야 합니다.
+    s3 = CountingS3()
+    normalized, _, _ = normalize_image(fixtures[0][1])
+    runs = []
+    for _ in range(2):
+        s3.heads = s3.puts = 0
+        written = ensure_thumbnails(
+            s3, "bench", "uploads/user/meal.jpg", normalized, sizes, formats
+        )
+        runs.append(f"written={written} heads={s3.heads} puts={s3.puts}")
+    print(f"ensure_thumbnails first run: {runs[0]}; second run: {runs[1]}")
+
+
+if __name__ == "__main__":
+    main()
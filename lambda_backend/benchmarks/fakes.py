@@ -0,0 +1,1175 @@
+"""
+벤치마크/부하 시뮬레이션용 인메모리 AWS 서비스 대역(S3, SQS, DynamoDB, Cognito, Bedrock).
+
+핸들러는 aws_clients.get_client/get_resource/get_table로 클라이언트를 얻으므로,
+FakeAWS.install()이 aws_clients의 캐시에 가짜 객체를 넣어 두면 핸들러 코드를 고치지 않고
+그대로 실행할 수 있습니다. 네트워크 호출은 없으며, 필요하면 서비스별 지연(latency)과
+Bedrock 스로틀링 비율을 지정할 수 있습니다.
+
+DynamoDB 대역은 핸들러가 쓰는 범위만 흉내 냅니다.
+- 숫자는 Decimal로 저장/반환하고 float는 거부 (boto3 리소스와 동일)
+- 조건식/키 조건식/필터식: 비교, BETWEEN, IN, AND/OR/NOT, begins_with, contains,
+  attribute_exists/attribute_not_exists (최상위 속성만)
+- 업데이트식: SET(+, -, if_not_exists, list_append), ADD, REMOVE, DELETE
+- query/scan 페이지는 실제처럼 약 1MB에서 끊김
+- 글로벌 보조 인덱스(GSI)는 query(IndexName=...)만 지원하며, 인덱스 키가 없는 아이템은
+  인덱스에 없는 것으로 취급 (sparse index)
+"""
+
+import base64
+import copy
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from decimal import Decimal
+from io import BytesIO
+
+from boto3.dynamodb.conditions import ConditionBase, ConditionExpressionBuilder
+from boto3.dynamodb.types import Binary
+from botocore.exceptions import ClientError
+
+PAGE_BYTES = 1024 * 1024
+
+
+def client_error(code, message, operation):
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+def _sleep(latency):
+    if latency is not None:
+        delay = latency() if callable(latency) else latency
+        if delay > 0:
+            time.sleep(delay)
+
+
+# ---------------------------------------------------------------------------
+# DynamoDB 식(expression) 해석
+# ---------------------------------------------------------------------------
+
+TOKEN_PATTERN = re.compile(
+    r"\s*(?:(<>|<=|>=|=|<|>|\(|\)|,|\+|-)|(:[A-Za-z0-9_]+)|(#[A-Za-z0-9_]+)|([A-Za-z_][A-Za-z0-9_]*))"
+)
+KEYWORDS = {"AND", "OR", "NOT", "BETWEEN", "IN", "SET", "ADD", "REMOVE", "DELETE"}
+
+
+def tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = TOKEN_PATTERN.match(expression, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Cannot parse expression near: {expression[position:]}")
+        operator, value, name, word = match.groups()
+        if operator:
+            tokens.append(("op", operator))
+        elif value:
+            tokens.append(("value", value))
+        elif name:
+            tokens.append(("name", name))
+        elif word.upper() in KEYWORDS:
+            tokens.append(("keyword", word.upper()))
+        else:
+            tokens.append(("name", word))
+        position = match.end()
+    return tokens
+
+
+class ExpressionParser:
+    """
+    토큰 목록을 item -> 값/참거짓 함수로 바꾸는 재귀 하강 파서.
+    """
+
+    def __init__(self, expression, names=None, values=None):
+        self.tokens = tokenize(expression)
+        self.position = 0
+        self.names = names or {}
+        self.values = values or {}
+
+    def peek(self, kind=None, text=None):
+        if self.position >= len(self.tokens):
+            return False
+        token_kind, token_text = self.tokens[self.position]
+        return (kind is None or token_kind == kind) and (
+            text is None or token_text == text
+        )
+
+    def take(self, kind=None, text=None):
+        if not self.peek(kind, text):
+            found = (
+                self.tokens[self.position] if self.position < len(self.tokens) else None
+            )
+            raise ValueError(f"Expected {kind} {text}, found {found}")
+        token = self.tokens[self.position]
+        self.position += 1
+        return token[1]
+
+    def done(self):
+        return self.position >= len(self.tokens)
+
+    def attribute_name(self, token):
+        if token.startswith("#"):
+            return self.names[token]
+        return token
+
+    # 피연산자: 속성 경로, :값, 함수 호출
+    def operand(self):
+        if self.peek("value"):
+            value = self.values[self.take("value")]
+            return lambda item: value
+        name = self.take("name")
+        if self.peek("op", "("):
+            return self.function(name)
+        attribute = self.attribute_name(name)
+        return lambda item: item.get(attribute)
+
+    def function(self, name):
+        self.take("op", "(")
+        if name in ("attribute_exists", "attribute_not_exists"):
+            attribute = self.attribute_name(self.take("name"))
+            self.take("op", ")")
+            if name == "attribute_exists":
+                return lambda item: attribute in item
+            return lambda item: attribute not in item
+        if name == "if_not_exists":
+            attribute = self.attribute_name(self.take("name"))
+            self.take("op", ",")
+            default = self.operand()
+            self.take("op", ")")
+            return lambda item: item[attribute] if attribute in item else default(item)
+        arguments = [self.operand()]
+        while self.peek("op", ","):
+            self.take("op", ",")
+            arguments.append(self.operand())
+        self.take("op", ")")
+        if name == "begins_with":
+            left, right = arguments
+            return lambda item: isinstance(left(item), str) and left(item).startswith(
+                right(item)
+            )
+        if name == "contains":
+            left, right = arguments
+            return lambda item: left(item) is not None and right(item) in left(item)
+        if name == "size":
+            (target,) = arguments
+            return lambda item: len(target(item))
+        if name == "list_append":
+            left, right = arguments
+            return lambda item: list(left(item) or []) + list(right(item) or [])
+        raise ValueError(f"Unsupported function: {name}")
+
+    # 조건식
+    def condition(self):
+        left = self.conjunction()
+        while self.peek("keyword", "OR"):
+            self.take()
+            right = self.conjunction()
+            left = (lambda a, b: lambda item: a(item) or b(item))(left, right)
+        return left
+
+    def conjunction(self):
+        left = self.negation()
+        while self.peek("keyword", "AND"):
+            self.take()
+            right = self.negation()
+            left = (lambda a, b: lambda item: a(item) and b(item))(left, right)
+        return left
+
+    def negation(self):
+        if self.peek("keyword", "NOT"):
+            self.take()
+            inner = self.negation()
+            return lambda item: not inner(item)
+        return self.comparison()
+
+    def comparison(self):
+        if self.peek("op", "("):
+            self.take()
+            inner = self.condition()
+            self.take("op", ")")
+            return inner
+
+        left = self.operand()
+        if self.peek("keyword", "BETWEEN"):
+            self.take()
+            low = self.operand()
+            self.take("keyword", "AND")
+            high = self.operand()
+            return lambda item: _compare(low(item), "<=", left(item)) and _compare(
+                left(item), "<=", high(item)
+            )
+        if self.peek("keyword", "IN"):
+            self.take()
+            self.take("op", "(")
+            options = [self.operand()]
+            while self.peek("op", ","):
+                self.take()
+                options.append(self.operand())
+            self.take("op", ")")
+            return lambda item: any(left(item) == option(item) for option in options)
+        if self.peek("op") and self.tokens[self.position][1] in (
+            "=",
+            "<>",
+            "<",
+            "<=",
+            ">",
+            ">=",
+        ):
+            operator = self.take("op")
+            right = self.operand()
+            return lambda item: _compare(left(item), operator, right(item))
+        # 함수 호출(begins_with, attribute_exists 등) 자체가 조건인 경우
+        return left
+
+    # 업데이트식의 SET 값: operand [+|- operand]
+    def set_value(self):
+        left = self.operand()
+        if self.peek("op", "+") or self.peek("op", "-"):
+            operator = self.take("op")
+            right = self.operand()
+            if operator == "+":
+                return lambda item: left(item) + right(item)
+            return lambda item: left(item) - right(item)
+        return left
+
+
+def _compare(left, operator, right):
+    if operator == "=":
+        return left == right
+    if operator == "<>":
+        return left != right
+    if left is None or right is None or type(left) is not type(right):
+        return False
+    if operator == "<":
+        return left < right
+    if operator == "<=":
+        return left <= right
+    if operator == ">":
+        return left > right
+    return left >= right
+
+
+def resolve_condition(condition, names=None, values=None, is_key_condition=False):
+    """
+    문자열 또는 boto3 조건 객체(Key/Attr)를 item -> bool 함수로 바꿉니다.
+    """
+    names = dict(names or {})
+    values = dict(values or {})
+    if isinstance(condition, ConditionBase):
+        built = ConditionExpressionBuilder().build_expression(
+            condition, is_key_condition=is_key_condition
+        )
+        names.update(built.attribute_name_placeholders)
+        values.update(to_stored(built.attribute_value_placeholders))
+        condition = built.condition_expression
+    parser = ExpressionParser(condition, names, values)
+    evaluate = parser.condition()
+    if not parser.done():
+        raise ValueError(f"Unexpected trailing tokens in: {condition}")
+    return evaluate
+
+
+def apply_update(item, expression, names=None, values=None):
+    """
+    업데이트식을 item에 적용하고 변경된 속성 이름 목록을 반환합니다.
+    """
+    parser = ExpressionParser(expression, names, values)
+    updated = []
+    while not parser.done():
+        clause = parser.take("keyword")
+        while True:
+            attribute = parser.attribute_name(parser.take("name"))
+            if clause == "SET":
+                parser.take("op", "=")
+                item[attribute] = parser.set_value()(item)
+            elif clause == "ADD":
+                value = parser.operand()(item)
+                if isinstance(value, set):
+                    item[attribute] = set(item.get(attribute, set())) | value
+                else:
+                    item[attribute] = item.get(attribute, Decimal(0)) + value
+            elif clause == "DELETE":
+                value = parser.operand()(item)
+                remaining = set(item.get(attribute, set())) - value
+                if remaining:
+                    item[attribute] = remaining
+                else:
+                    item.pop(attribute, None)
+            elif clause == "REMOVE":
+                item.pop(attribute, None)
+            else:
+                raise ValueError(f"Unsupported update clause: {clause}")
+            updated.append(attribute)
+            if not parser.peek("op", ","):
+                break
+            parser.take("op", ",")
+    return updated
+
+
+def to_stored(value):
+    """
+    boto3 리소스 레이어처럼 값을 변환합니다. (int -> Decimal, bytes -> Binary, float 거부)
+    """
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return Binary(bytes(value))
+    if isinstance(value, dict):
+        return {key: to_stored(inner) for key, inner in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_stored(inner) for inner in value]
+    if isinstance(value, (set, frozenset)):
+        return {to_stored(inner) for inner in value}
+    return value
+
+
+def _size_default(value):
+    # 이진 값은 바이트 수만큼의 문자열로 셉니다. (Binary.__str__은 bytes를 반환)
+    if isinstance(value, Binary):
+        return "x" * len(value.value)
+    return str(value)
+
+
+def item_size(item):
+    return len(json.dumps(item, default=_size_default))
+
+
+def project(item, projection, names):
+    if not projection:
+        return copy.deepcopy(item)
+    attributes = [
+        names.get(part.strip(), part.strip()) for part in projection.split(",")
+    ]
+    return {
+        attribute: copy.deepcopy(item[attribute])
+        for attribute in attributes
+        if attribute in item
+    }
+
+
+# ---------------------------------------------------------------------------
+# DynamoDB
+# ---------------------------------------------------------------------------
+
+
+class FakeBatchWriter:
+    def __init__(self, table, overwrite_by_pkeys=None):
+        self.table = table
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+    def put_item(self, Item):
+        self.table._put(Item)
+
+    def delete_item(self, Key):
+        self.table._delete(Key)
+
+
+class FakeTable:
+    """
+    boto3 DynamoDB Table 리소스의 인메모리 대역.
+    """
+
+    def __init__(self, name, hash_key, range_key=None, latency=None, indexes=None):
+        self.name = name
+        self.table_name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.latency = latency
+        self.indexes = indexes or {}  # 인덱스 이름 -> (hash 키, range 키)
+        self.calls = 0
+        self._partitions = {}  # hash 값 -> {range 값: (item, 크기)}
+        self._lock = threading.Lock()
+
+    def _key(self, key):
+        hash_value = key[self.hash_key]
+        range_value = key[self.range_key] if self.range_key else None
+        return to_stored(hash_value), to_stored(range_value)
+
+    def _get(self, key):
+        hash_value, range_value = self._key(key)
+        entry = self._partitions.get(hash_value, {}).get(range_value)
+        return entry[0] if entry else None
+
+    def _put(self, item):
+        stored = to_stored(item)
+        hash_value, range_value = self._key(stored)
+        with self._lock:
+            self._partitions.setdefault(hash_value, {})[range_value] = (
+                stored,
+                item_size(stored),
+            )
+
+    def _delete(self, key):
+        hash_value, range_value = self._key(key)
+        with self._lock:
+            self._partitions.get(hash_value, {}).pop(range_value, None)
+
+    def _check(self, item, condition, names, values, operation):
+        if condition is None:
+            return
+        if not resolve_condition(condition, names, to_stored(values or {}))(item or {}):
+            raise client_error(
+                "ConditionalCheckFailedException",
+                "The conditional request failed",
+                operation,
+            )
+
+    def _call(self):
+        self.calls += 1
+        _sleep(self.latency)
+
+    def put(self, item):
+        """
+        테스트 데이터를 지연 없이 넣습니다.
+        """
+        self._put(item)
+
+    def item_count(self):
+        return sum(len(partition) for partition in self._partitions.values())
+
+    def batch_writer(self, overwrite_by_pkeys=None):
+        self._call()
+        return FakeBatchWriter(self, overwrite_by_pkeys)
+
+    def get_item(
+        self,
+        Key,
+        ConsistentRead=False,
+        ProjectionExpression=None,
+        ExpressionAttributeNames=None,
+    ):
+        self._call()
+        with self._lock:
+            item = self._get(Key)
+            if item is None:
+                return {}
+            return {
+                "Item": project(
+                    item, ProjectionExpression, ExpressionAttributeNames or {}
+                )
+            }
+
+    def put_item(
+        self,
+        Item,
+        ConditionExpression=None,
+        ExpressionAttributeNames=None,
+        ExpressionAttributeValues=None,
+    ):
+        self._call()
+        with self._lock:
+            self._check(
+                self._get(Item),
+                ConditionExpression,
+                ExpressionAttributeNames,
+                ExpressionAttributeValues,
+                "PutItem",
+            )
+        self._put(Item)
+        return {}
+
+    def delete_item(self, Key, **kwargs):
+        self._call()
+        self._delete(Key)
+        return {}
+
+    def update_item(
+        self,
+        Key,
+        UpdateExpression,
+        ConditionExpression=None,
+        ExpressionAttributeNames=None,
+        ExpressionAttributeValues=None,
+        ReturnValues="NONE",
+    ):
+        self._call()
+        values = to_stored(ExpressionAttributeValues or {})
+        with self._lock:
+            current = self._get(Key)
+            self._check(
+                current,
+                ConditionExpression,
+                ExpressionAttributeNames,
+                ExpressionAttributeValues,
+                "UpdateItem",
+            )
+            old = copy.deepcopy(current) if current else {}
+            item = copy.deepcopy(current) if current else to_stored(dict(Key))
+            updated = apply_update(
+                item, UpdateExpression, ExpressionAttributeNames, values
+            )
+            hash_value, range_value = self._key(item)
+            self._partitions.setdefault(hash_value, {})[range_value] = (
+                item,
+                item_size(item),
+            )
+
+        if ReturnValues == "ALL_NEW":
+            return {"Attributes": copy.deepcopy(item)}
+        if ReturnValues == "ALL_OLD":
+            return {"Attributes": old} if old else {}
+        if ReturnValues == "UPDATED_NEW":
+            return {
+                "Attributes": {
+                    name: copy.deepcopy(item[name]) for name in updated if name in item
+                }
+            }
+        return {}
+
+    def _page(self, candidates, params, operation, index_keys=()):
+        names = params.get("ExpressionAttributeNames") or {}
+        values = to_stored(params.get("ExpressionAttributeValues") or {})
+        filter_condition = params.get("FilterExpression")
+        matches = (
+            resolve_condition(filter_condition, names, values)
+            if filter_condition is not None
+            else None
+        )
+        limit = params.get("Limit")
+        start_key = params.get("ExclusiveStartKey")
+        if start_key:
+            start = self._key(start_key)
+            keys = [(self._key(item), item) for item, _ in candidates]
+            index = next(
+                (i for i, (key, _) in enumerate(keys) if key == start), len(keys) - 1
+            )
+            candidates = candidates[index + 1 :]
+
+        items = []
+        read_bytes = 0
+        evaluated = 0
+        last_item = None
+        for item, size in candidates:
+            evaluated += 1
+            read_bytes += size
+            last_item = item
+            if matches is None or matches(item):
+                items.append(project(item, params.get("ProjectionExpression"), names))
+            if (limit and evaluated >= limit) or read_bytes >= PAGE_BYTES:
+                break
+
+        response = {"Items": items, "Count": len(items), "ScannedCount": evaluated}
+        if last_item is not None and evaluated < len(candidates):
+            key = {self.hash_key: last_item[self.hash_key]}
+            if self.range_key:
+                key[self.range_key] = last_item[self.range_key]
+            for name in index_keys:
+                key[name] = last_item[name]
+            response["LastEvaluatedKey"] = copy.deepcopy(key)
+        return response
+
+    def query(self, KeyConditionExpression, **params):
+        self._call()
+        names = params.get("ExpressionAttributeNames") or {}
+        values = to_stored(params.get("ExpressionAttributeValues") or {})
+        key_matches = resolve_condition(
+            KeyConditionExpression, names, values, is_key_condition=True
+        )
+        index_keys = self.indexes.get(params.get("IndexName"), ())
+        with self._lock:
+            partitions = list(self._partitions.values())
+            candidates = [
+                entry
+                for partition in partitions
+                for entry in partition.values()
+                if key_matches(entry[0])
+            ]
+        if index_keys:
+            # 인덱스 키가 없는 아이템은 인덱스에 없고, 인덱스 정렬 키 순서로 반환합니다.
+            candidates = [
+                entry
+                for entry in candidates
+                if all(name in entry[0] for name in index_keys)
+            ]
+            sort_keys = [name for name in index_keys[1:] + (self.range_key,) if name]
+            candidates.sort(
+                key=lambda entry: tuple(entry[0].get(name) for name in sort_keys),
+                reverse=not params.get("ScanIndexForward", True),
+            )
+        else:
+            candidates.sort(
+                key=lambda entry: entry[0].get(self.range_key) if self.range_key else 0,
+                reverse=not params.get("ScanIndexForward", True),
+            )
+        return self._page(candidates, params, "Query", index_keys)
+
+    def scan(self, Segment=0, TotalSegments=1, **params):
+        self._call()
+        with self._lock:
+            candidates = [
+                entry
+                for hash_value, partition in sorted(
+                    self._partitions.items(), key=lambda pair: str(pair[0])
+                )
+                if hash(str(hash_value)) % TotalSegments == Segment
+                for _, entry in sorted(partition.items(), key=lambda pair: str(pair[0]))
+            ]
+        return self._page(candidates, params, "Scan")
+
+
+class FakeDynamoDB:
+    """
+    boto3 DynamoDB 서비스 리소스의 인메모리 대역. 테이블은 create_table로 미리 만듭니다.
+    """
+
+    def __init__(self, latency=None):
+        self.latency = latency
+        self.tables = {}
+
+    def create_table(self, name, hash_key, range_key=None, indexes=None):
+        table = FakeTable(
+            name, hash_key, range_key, latency=self.latency, indexes=indexes
+        )
+        self.tables[name] = table
+        return table
+
+    def Table(self, name):
+        try:
+            return self.tables[name]
+        except KeyError:
+            raise client_error(
+                "ResourceNotFoundException", f"Table {name} not found", "DescribeTable"
+            )
+
+    def batch_get_item(self, RequestItems):
+        _sleep(self.latency)
+        responses = {}
+        for name, request in RequestItems.items():
+            table = self.Table(name)
+            names = request.get("ExpressionAttributeNames") or {}
+            responses[name] = []
+            for key in request["Keys"]:
+                item = table._get(key)
+                if item is not None:
+                    responses[name].append(
+                        project(item, request.get("ProjectionExpression"), names)
+                    )
+        return {"Responses": responses, "UnprocessedKeys": {}}
+
+
+# ---------------------------------------------------------------------------
+# S3, SQS, Cognito
+# ---------------------------------------------------------------------------
+
+
+class FakeS3:
+    def __init__(self, latency=None):
+        self.latency = latency
+        self.objects = {}  # (bucket, key) -> (bytes, content type)
+        self._lock = threading.Lock()
+
+    def put(self, bucket, key, body, content_type="image/jpeg"):
+        with self._lock:
+            self.objects[(bucket, key)] = (bytes(body), content_type)
+
+    def put_object(self, Bucket, Key, Body=b"", ContentType="binary/octet-stream", **_):
+        _sleep(self.latency)
+        body = Body.read() if hasattr(Body, "read") else Body
+        if isinstance(body, str):
+            body = body.encode()
+        self.put(Bucket, Key, body, ContentType)
+        return {"ETag": f'"{uuid.uuid4().hex}"'}
+
+    def get_object(self, Bucket, Key, **_):
+        _sleep(self.latency)
+        entry = self.objects.get((Bucket, Key))
+        if entry is None:
+            raise client_error(
+                "NoSuchKey", "The specified key does not exist.", "GetObject"
+            )
+        return {
+            "Body": BytesIO(entry[0]),
+            "ContentLength": len(entry[0]),
+            "ContentType": entry[1],
+        }
+
+    def head_object(self, Bucket, Key, **_):
+        _sleep(self.latency)
+        entry = self.objects.get((Bucket, Key))
+        if entry is None:
+            raise client_error("404", "Not Found", "HeadObject")
+        return {"ContentLength": len(entry[0]), "ContentType": entry[1]}
+
+    def generate_presigned_url(self, ClientMethod, Params=None, ExpiresIn=3600, **_):
+        params = Params or {}
+        return (
+            f"https://{params.get('Bucket')}.s3.fake/{params.get('Key')}"
+            f"?X-Amz-Expires={ExpiresIn}&X-Amz-Signature={uuid.uuid4().hex}"
+        )
+
+    def generate_presigned_post(
+        self, Bucket, Key, Fields=None, Conditions=None, ExpiresIn=3600
+    ):
+        policy = base64.b64encode(
+            json.dumps({"conditions": Conditions or [], "expires": ExpiresIn}).encode()
+        ).decode()
+        return {
+            "url": f"https://{Bucket}.s3.fake/",
+            "fields": {
+                **(Fields or {}),
+                "key": Key,
+                "policy": policy,
+                "x-amz-signature": uuid.uuid4().hex,
+            },
+        }
+
+
+def _queue_arn(queue_url):
+    """
+    https://sqs.<region>.amazonaws.com/<account>/<name> 형식의 큐 URL을 ARN으로 바꿉니다.
+    """
+    host, account, name = queue_url.split("://", 1)[-1].split("/")[:3]
+    region = host.split(".")[1] if host.count(".") >= 2 else "us-east-1"
+    return f"arn:aws:sqs:{region}:{account}:{name}"
+
+
+class FakeSQS:
+    """
+    SQS 대역. 보낸 메시지는 큐 URL별 deque에 쌓이고, receive_records로 Lambda SQS 이벤트의
+    Records 형식으로 꺼낼 수 있습니다.
+    """
+
+    def __init__(self, latency=None, batch_failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.batch_failure_rate = batch_failure_rate
+        self.queues = {}
+        self.visibility_changes = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _enqueue(self, queue_url, body, attributes=None):
+        message_id = str(uuid.uuid4())
+        record = {
+            "messageId": message_id,
+            "receiptHandle": uuid.uuid4().hex,
+            "body": body,
+            "attributes": {"SentTimestamp": str(int(time.time() * 1000))},
+            "messageAttributes": {
+                name: {
+                    "stringValue": value.get("StringValue"),
+                    "stringListValues": [],
+                    "binaryListValues": [],
+                    "dataType": value["DataType"],
+                }
+                for name, value in (attributes or {}).items()
+            },
+            "eventSource": "aws:sqs",
+            "eventSourceARN": _queue_arn(queue_url),
+        }
+        with self._lock:
+            self.queues.setdefault(queue_url, deque()).append(record)
+        return message_id
+
+    def send_message(self, QueueUrl, MessageBody, MessageAttributes=None, **_):
+        _sleep(self.latency)
+        return {"MessageId": self._enqueue(QueueUrl, MessageBody, MessageAttributes)}
+
+    def send_message_batch(self, QueueUrl, Entries):
+        """
+        batch_failure_rate 비율의 항목은 서버 측 일시 오류(SenderFault=False)로 실패합니다.
+        """
+        _sleep(self.latency)
+        successful, failed = [], []
+        for entry in Entries:
+            with self._lock:
+                fail = self._random.random() < self.batch_failure_rate
+            if fail:
+                failed.append(
+                    {
+                        "Id": entry["Id"],
+                        "SenderFault": False,
+                        "Code": "InternalError",
+                        "Message": "We encountered an internal error.",
+                    }
+                )
+                continue
+            message_id = self._enqueue(
+                QueueUrl, entry["MessageBody"], entry.get("MessageAttributes")
+            )
+            successful.append({"Id": entry["Id"], "MessageId": message_id})
+        return {"Successful": successful, "Failed": failed}
+
+    def change_message_visibility(self, QueueUrl, ReceiptHandle, VisibilityTimeout):
+        _sleep(self.latency)
+        with self._lock:
+            self.visibility_changes.append((QueueUrl, ReceiptHandle, VisibilityTimeout))
+        return {}
+
+    def depth(self, queue_url):
+        return len(self.queues.get(queue_url, ()))
+
+    def receive_records(self, queue_url, max_records=10):
+        with self._lock:
+            queue = self.queues.get(queue_url, deque())
+            return [queue.popleft() for _ in range(min(max_records, len(queue)))]
+
+    def requeue(self, queue_url, records):
+        with self._lock:
+            self.queues.setdefault(queue_url, deque()).extend(records)
+
+
+class _UserNotFoundException(ClientError):
+    pass
+
+
+class _CognitoExceptions:
+    UserNotFoundException = _UserNotFoundException
+
+
+class FakeCognito:
+    exceptions = _CognitoExceptions
+
+    def __init__(self, latency=None):
+        self.latency = latency
+        self.users = {}  # Username -> {속성 이름: 값}
+        self.calls = 0
+
+    def add_user(self, username, **attributes):
+        self.users[username] = {"sub": username, **attributes}
+
+    def admin_get_user(self, UserPoolId, Username):
+        self.calls += 1
+        _sleep(self.latency)
+        if Username not in self.users:
+            raise _UserNotFoundException(
+                {
+                    "Error": {
+                        "Code": "UserNotFoundException",
+                        "Message": "User does not exist.",
+                    }
+                },
+                "AdminGetUser",
+            )
+        return {
+            "Username": Username,
+            "UserAttributes": [
+                {"Name": name, "Value": value}
+                for name, value in self.users[Username].items()
+            ],
+        }
+
+    def list_users(
+        self, UserPoolId, Limit=60, PaginationToken=None, AttributesToGet=None, **_
+    ):
+        self.calls += 1
+        _sleep(self.latency)
+        usernames = sorted(self.users)
+        start = int(PaginationToken) if PaginationToken else 0
+        page = usernames[start : start + min(Limit, 60)]
+        users = []
+        for username in page:
+            attributes = self.users[username]
+            if AttributesToGet is not None:
+                attributes = {
+                    name: value
+                    for name, value in attributes.items()
+                    if name in AttributesToGet
+                }
+            users.append(
+                {
+                    "Username": username,
+                    "Attributes": [
+                        {"Name": name, "Value": value}
+                        for name, value in attributes.items()
+                    ],
+                    "Enabled": True,
+                    "UserStatus": "CONFIRMED",
+                }
+            )
+        response = {"Users": users}
+        if start + len(page) < len(usernames):
+            response["PaginationToken"] = str(start + len(page))
+        return response
+
+    def admin_update_user_attributes(self, UserPoolId, Username, UserAttributes):
+        self.calls += 1
+        _sleep(self.latency)
+        if Username not in self.users:
+            raise _UserNotFoundException(
+                {
+                    "Error": {
+                        "Code": "UserNotFoundException",
+                        "Message": "User does not exist.",
+                    }
+                },
+                "AdminUpdateUserAttributes",
+            )
+        for attribute in UserAttributes:
+            self.users[Username][attribute["Name"]] = attribute["Value"]
+        return {}
+
+
+# ---------------------------------------------------------------------------
+# Bedrock
+# ---------------------------------------------------------------------------
+
+DISHES = (
+    ("Bibimbap", 560, 22, 85, 14),
+    ("Kimchi Fried Rice", 620, 18, 90, 20),
+    ("Bulgogi", 480, 35, 20, 26),
+    ("Chicken Breast Salad", 350, 38, 15, 14),
+    ("Tteokbokki", 520, 10, 100, 8),
+)
+# 스로틀링 응답이 돌아오는 데 걸리는 시간(초)
+THROTTLE_LATENCY = 0.1
+# 스트리밍 응답: 첫 토큰까지 걸리는 시간의 비율, 델타 이벤트 하나의 글자 수
+STREAM_FIRST_TOKEN_SHARE = 0.1
+STREAM_CHUNK_CHARS = 16
+IMAGE_TAG = re.compile(r"^Image (img\d+):$")
+
+
+class FakeBedrock:
+    """
+    bedrock-runtime 대역. 요청의 이미지 수/태그에 맞는 분석 JSON을 돌려줍니다.
+    latency는 초 단위 고정값이나 함수(예: lambda: random.lognormvariate(...)),
+    throttle_rate는 ThrottlingException을 낼 확률입니다.
+    quota_per_second를 주면 계정 할당량처럼 초당 호출 수가 이를 넘을 때 스로틀합니다.
+    virtual_time=True이면 기다리지 않고 (스레드 ID, 지연)을 virtual_latencies에 기록하여
+    시뮬레이터가 가상 시계에 반영하도록 합니다.
+    """
+
+    def __init__(
+        self,
+        latency=None,
+        throttle_rate=0.0,
+        seed=None,
+        virtual_time=False,
+        quota_per_second=None,
+    ):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.quota_per_second = quota_per_second
+        self._quota_tokens = quota_per_second or 0.0
+        self._quota_refilled = time.monotonic()
+        self.random = random.Random(seed)
+        self.virtual_time = virtual_time
+        self.virtual_latencies = []
+        self.calls = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _wait(self, latency):
+        if not self.virtual_time:
+            _sleep(latency)
+            return
+        delay = latency() if callable(latency) else latency or 0
+        with self._lock:
+            self.virtual_latencies.append((threading.get_ident(), delay))
+
+    def _candidates(self):
+        picks = self.random.sample(DISHES, 3)
+        return {
+            "candidates": [
+                {
+                    "name": name,
+                    "calories": calories,
+                    "protein": protein,
+                    "carbs": carbs,
+                    "fat": fat + 0.5,
+                }
+                for name, calories, protein, carbs, fat in picks
+            ]
+        }
+
+    def _over_quota(self):
+        # 1초 분량까지 쌓이는 토큰 버킷 (락 안에서 호출)
+        now = time.monotonic()
+        self._quota_tokens = min(
+            self.quota_per_second,
+            self._quota_tokens + (now - self._quota_refilled) * self.quota_per_second,
+        )
+        self._quota_refilled = now
+        if self._quota_tokens < 1:
+            return True
+        self._quota_tokens -= 1
+        return False
+
+    def _throttle(self, operation):
+        with self._lock:
+            self.calls += 1
+            throttled = self.random.random() < self.throttle_rate
+            if not throttled and self.quota_per_second:
+                throttled = self._over_quota()
+            if throttled:
+                self.throttled += 1
+        if throttled:
+            self._wait(THROTTLE_LATENCY)
+            raise client_error("ThrottlingException", "Too many requests", operation)
+
+    def _answer(self, body):
+        request = json.loads(body)
+        content = request["messages"][0]["content"]
+        tags = [
+            match.group(1)
+            for block in content
+            if block.get("type") == "text"
+            for match in [IMAGE_TAG.match(block["text"])]
+            if match
+        ]
+        with self._lock:
+            if tags:
+                answer = {tag: self._candidates() for tag in tags}
+            else:
+                answer = self._candidates()
+        text = json.dumps(answer)
+        images = sum(1 for block in content if block.get("type") == "image")
+        usage = {"input_tokens": 200 + images * 1600, "output_tokens": len(text) // 4}
+        return text, usage
+
+    def _respond(self, body):
+        self._throttle("InvokeModel")
+        self._wait(self.latency)
+        text, usage = self._answer(body)
+        return {
+            "id": f"msg_{uuid.uuid4().hex}",
+            "type": "message",
+            "role": "assistant",
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": usage,
+        }
+
+    def invoke_model(self, modelId, body, contentType=None, accept=None, **_):
+        response = self._respond(body)
+        return {
+            "body": BytesIO(json.dumps(response).encode()),
+            "contentType": "application/json",
+        }
+
+    def _stream_events(self, text, usage, delay):
+        """
+        응답 스트림 이벤트를 만듭니다. 실시간 모드에서는 지연의 STREAM_FIRST_TOKEN_SHARE를
+        첫 토큰 전에, 나머지를 조각마다 나누어 기다립니다. (소비하는 쪽이 읽을 때 진행)
+        """
+        chunks = [
+            text[i : i + STREAM_CHUNK_CHARS]
+            for i in range(0, len(text), STREAM_CHUNK_CHARS)
+        ]
+
+        def event(payload):
+            return {"chunk": {"bytes": json.dumps(payload).encode()}}
+
+        if not self.virtual_time:
+            time.sleep(delay * STREAM_FIRST_TOKEN_SHARE)
+        yield event(
+            {
+                "type": "message_start",
+                "message": {
+                    "id": f"msg_{uuid.uuid4().hex}",
+                    "role": "assistant",
+                    "usage": {
+                        "input_tokens": usage["input_tokens"],
+                        "output_tokens": 1,
+                    },
+                },
+            }
+        )
+        yield event(
+            {
+                "type": "content_block_start",
+                "index": 0,
+                "content_block": {"type": "text", "text": ""},
+            }
+        )
+        per_chunk = delay * (1 - STREAM_FIRST_TOKEN_SHARE) / max(1, len(chunks))
+        for chunk in chunks:
+            if not self.virtual_time:
+                time.sleep(per_chunk)
+            yield event(
+                {
+                    "type": "content_block_delta",
+                    "index": 0,
+                    "delta": {"type": "text_delta", "text": chunk},
+                }
+            )
+        yield event({"type": "content_block_stop", "index": 0})
+        yield event(
+            {
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn"},
+                "usage": {"output_tokens": usage["output_tokens"]},
+            }
+        )
+        yield event({"type": "message_stop"})
+
+    def invoke_model_with_response_stream(
+        self, modelId, body, contentType=None, accept=None, **_
+    ):
+        self._throttle("InvokeModelWithResponseStream")
+        latency = self.latency
+        delay = latency() if callable(latency) else latency or 0
+        if self.virtual_time:
+            self._wait(delay)
+        text, usage = self._answer(body)
+        return {
+            "body": self._stream_events(text, usage, delay),
+            "contentType": "application/json",
+        }
+
+
+# ---------------------------------------------------------------------------
+# 설치
+# ---------------------------------------------------------------------------
+
+
+class FakeAWS:
+    """
+    모든 대역을 묶어 aws_clients에 설치합니다.
+    """
+
+    def __init__(
+        self,
+        dynamodb_latency=None,
+        s3_latency=None,
+        sqs_latency=None,
+        cognito_latency=None,
+        bedrock_latency=None,
+        bedrock_throttle_rate=0.0,
+        bedrock_virtual_time=False,
+        bedrock_quota_per_second=None,
+        sqs_batch_failure_rate=0.0,
+        seed=None,
+    ):
+        self.dynamodb = FakeDynamoDB(latency=dynamodb_latency)
+        self.s3 = FakeS3(latency=s3_latency)
+        self.sqs = FakeSQS(
+            latency=sqs_latency, batch_failure_rate=sqs_batch_failure_rate, seed=seed
+        )
+        self.cognito = FakeCognito(latency=cognito_latency)
+        self.bedrock = FakeBedrock(
+            latency=bedrock_latency,
+            throttle_rate=bedrock_throttle_rate,
+            seed=seed,
+            virtual_time=bedrock_virtual_time,
+            quota_per_second=bedrock_quota_per_second,
+        )
+
+    def install(self):
+        import aws_clients
+
+        aws_clients._clients.update(
+            {
+                "s3": self.s3,
+                "sqs": self.sqs,
+                "cognito-idp": self.cognito,
+                "bedrock-runtime": self.bedrock,
+            }
+        )
+        aws_clients._resources["dynamodb"] = self.dynamodb
+        aws_clients._tables.clear()
+        return self
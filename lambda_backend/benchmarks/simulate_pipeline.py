@@ -0,0 +1,474 @@
+"""
+업로드 → 분석 → 폴링 전체 흐름의 로컬 부하 시뮬레이터.
+
+실제 핸들러(UploadImage, RequestAnalysis, AnalyzeImage, GetAnalysisResult)를 인메모리 대역
+(benchmarks/fakes.py)에 연결하고, 가상 시계 위에서 이산 사건 시뮬레이션으로 수천 명의 사용자를
+흘려 보냅니다.
+- 사용자: 포아송 도착 (--rate, 선택적으로 --peak-rate 구간), 업로드 URL 요청 → PUT 업로드
+  → 분석 요청 → 앱과 같은 방식으로 1초 간격 폴링, 10초가 지나면 포기
+- SQS → AnalyzeImage: 동시 실행 수(--concurrency)만큼의 Lambda 인스턴스가 최대 --batch-size개씩
+  메시지를 가져가고, 실패한 메시지는 가시성 타임아웃 뒤 다시 전달, --max-receives 이후 DLQ
+- Bedrock: 로그정규 지연 분포(--bedrock-p50, --bedrock-sigma)와 스로틀링 확률
+
+핸들러는 실제로 실행되며, 걸린 시간(× --cpu-scale)이 가상 시계에 더해집니다. Bedrock 지연은
+기다리지 않고 샘플링하여, AnalyzeImage 워커 수만큼의 슬롯에 배정했을 때 가장 늦게 끝나는 시각을
+호출 시간에 더합니다.
+폴링은 결과가 기록된 가상 시각 이후에만 실제 GetAnalysisResult를 호출합니다.
+
+--concurrency와 --batch-size에 쉼표로 여러 값을 주면 조합마다 같은 도착 순서로 다시 실행하여
+동시 실행 수별 처리량, 결과까지 걸린 시간 백분위, 큐 깊이를 비교합니다.
+
+사용법 (lambda_backend 디렉터리에서):
+    python benchmarks/simulate_pipeline.py --users 2000 --rate 20 --concurrency 5,10,20
+    python benchmarks/simulate_pipeline.py --users 3000 --rate 10 --peak-rate 60 \\
+        --peak-start 60 --peak-seconds 30 --batch-size 1,5,10 --timeline /tmp/depth.csv
+"""
+
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from io import BytesIO
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_handlers import ENV, LambdaContext, percentile  # noqa: E402
+from fakes import FakeAWS  # noqa: E402
+
+os.environ.update(ENV)
+# AnalyzeImage의 분석 캐시는 끄고 시뮬레이션합니다. (같은 이미지를 재사용하므로)
+os.environ.pop("ANALYSIS_CACHE_TABLE_NAME", None)
+
+BENCH_USER = "sim-user"
+
+
+def http_event(method, body=None, path_parameters=None):
+    event = {
+        "requestContext": {
+            "http": {"method": method},
+            "authorizer": {"jwt": {"claims": {"sub": BENCH_USER}}},
+        }
+    }
+    if body is not None:
+        event["body"] = json.dumps(body)
+    if path_parameters:
+        event["pathParameters"] = path_parameters
+    return event
+
+
+def make_images(width, height, count):
+    from bench_image_preprocess import synthetic_photo
+
+    images = []
+    for i in range(count):
+        output = BytesIO()
+        synthetic_photo(width, height, i + 1).save(output, format="JPEG", quality=80)
+        images.append(output.getvalue())
+    return images
+
+
+def arrival_times(args, rng):
+    """
+    포아송 도착 시각 목록. peak 구간에서는 --peak-rate를 사용합니다.
+    """
+    times = []
+    now = 0.0
+    peak_end = args.peak_start + args.peak_seconds
+    while len(times) < args.users:
+        rate = args.rate
+        if args.peak_rate and args.peak_start <= now < peak_end:
+            rate = args.peak_rate
+        now += rng.expovariate(rate)
+        times.append(now)
+    return times
+
+
+class Simulation:
+    def __init__(self, args, handlers, images, arrivals, concurrency, batch_size):
+        self.args = args
+        self.handlers = handlers
+        self.images = images
+        self.arrivals = arrivals
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.rng = random.Random(args.seed)
+
+        mu = math.log(args.bedrock_p50)
+        self.aws = FakeAWS(
+            bedrock_latency=lambda: self.rng.lognormvariate(mu, args.bedrock_sigma),
+            bedrock_throttle_rate=args.bedrock_throttle_rate,
+            bedrock_virtual_time=True,
+            seed=args.seed,
+        ).install()
+        self.aws.dynamodb.create_table(ENV["RESULTS_TABLE_NAME"], "analysisId")
+        # RequestAnalysis가 같은 객체의 중복 분석을 막는 멱등성 테이블
+        self.aws.dynamodb.create_table(ENV["IDEMPOTENCY_TABLE_NAME"], "idempotencyKey")
+        self.queue_url = ENV["SQS_QUEUE_URL"]
+
+        self.events = []
+        self.sequence = itertools.count()
+        self.now = 0.0
+        self.idle_instances = 0  # 웜 상태로 쉬고 있는 인스턴스 수
+        self.running = 0
+        self.busy_seconds = 0.0
+        self.window_scheduled = False
+        self.visible_since = {}  # messageId -> 큐에 보이기 시작한 가상 시각
+        self.receive_counts = defaultdict(int)
+        self.invisible = 0
+
+        self.users = {}  # analysisId -> 사용자 상태
+        self.completed_at = {}  # analysisId -> 결과 기록 가상 시각
+        self.dead_letters = 0
+        self.cold_starts = 0
+        self.invocations = 0
+        self.handler_seconds = defaultdict(float)
+        self.polls = 0
+        self.timeline = []
+
+    # 사건 큐 -----------------------------------------------------------------
+
+    def schedule(self, at, kind, *payload):
+        heapq.heappush(self.events, (at, next(self.sequence), kind, payload))
+
+    def rtt(self):
+        return self.rng.lognormvariate(math.log(self.args.api_rtt_ms / 1000), 0.3)
+
+    def call(self, name, event):
+        """
+        실제 핸들러를 실행하고 (응답, 가상 소요 시간)을 반환합니다.
+        """
+        started = time.perf_counter()
+        stdout = sys.stdout
+        sys.stdout = self.devnull
+        try:
+            response = self.handlers[name].lambda_handler(event, LambdaContext())
+        finally:
+            sys.stdout = stdout
+        elapsed = (time.perf_counter() - started) * self.args.cpu_scale
+        self.handler_seconds[name] += elapsed
+        return response, elapsed
+
+    # 사용자 흐름 -------------------------------------------------------------
+
+    def on_arrive(self, user_index):
+        response, elapsed = self.call("UploadImage", http_event("GET"))
+        object_key = json.loads(response["body"])["objectKey"]
+        upload_seconds = self.rng.lognormvariate(
+            math.log(self.args.upload_ms / 1000), 0.5
+        )
+        self.schedule(
+            self.now + elapsed + self.rtt() + upload_seconds,
+            "uploaded",
+            user_index,
+            object_key,
+        )
+
+    def on_uploaded(self, user_index, object_key):
+        self.aws.s3.put(
+            ENV["BUCKET_NAME"], object_key, self.images[user_index % len(self.images)]
+        )
+        depth_before = self.aws.sqs.depth(self.queue_url)
+        response, elapsed = self.call(
+            "RequestAnalysis", http_event("POST", {"objectKey": object_key})
+        )
+        analysis_id = json.loads(response["body"])["analysisId"]
+        for record in list(self.aws.sqs.queues[self.queue_url])[depth_before:]:
+            self.visible_since[record["messageId"]] = self.now + elapsed
+
+        accepted_at = self.now + elapsed + self.rtt()
+        self.users[analysis_id] = {
+            "arrived": self.arrivals[user_index],
+            "accepted": accepted_at,
+            "gave_up": False,
+            "received": None,
+        }
+        self.schedule(accepted_at + self.args.poll_interval, "poll", analysis_id, 1)
+        self.schedule(self.now + elapsed, "dispatch")
+
+    def on_poll(self, analysis_id, attempt):
+        user = self.users[analysis_id]
+        self.polls += 1
+        completed_at = self.completed_at.get(analysis_id)
+        if completed_at is not None and completed_at <= self.now:
+            response, elapsed = self.call(
+                "GetAnalysisResult",
+                http_event("GET", path_parameters={"analysisId": analysis_id}),
+            )
+            body = json.loads(response["body"])
+            if response["statusCode"] == 200 and body.get("status") == "COMPLETED":
+                user["received"] = self.now + elapsed + self.rtt()
+                return
+        if attempt >= self.args.max_polls:
+            user["gave_up"] = True
+            return
+        self.schedule(
+            self.now + self.rtt() + self.args.poll_interval,
+            "poll",
+            analysis_id,
+            attempt + 1,
+        )
+
+    # SQS 이벤트 소스 매핑 ----------------------------------------------------
+
+    def on_dispatch(self):
+        self.window_scheduled = False
+        queue = self.aws.sqs.queues.get(self.queue_url, ())
+        while queue and self.running < self.concurrency:
+            oldest = self.visible_since[queue[0]["messageId"]]
+            if (
+                len(queue) < self.batch_size
+                and self.now < oldest + self.args.batch_window
+            ):
+                if not self.window_scheduled:
+                    self.window_scheduled = True
+                    self.schedule(oldest + self.args.batch_window, "dispatch")
+                return
+            records = self.aws.sqs.receive_records(self.queue_url, self.batch_size)
+            self.invoke(records)
+
+    def invoke(self, records):
+        self.running += 1
+        self.invocations += 1
+        duration = 0.0
+        if self.idle_instances > 0:
+            self.idle_instances -= 1
+        else:
+            self.cold_starts += 1
+            duration += self.args.cold_start_ms / 1000
+
+        for record in records:
+            self.receive_counts[record["messageId"]] += 1
+            record["attributes"]["ApproximateReceiveCount"] = str(
+                self.receive_counts[record["messageId"]]
+            )
+
+        self.aws.bedrock.virtual_latencies = []
+        response, elapsed = self.call("AnalyzeImage", {"Records": records})
+        # 실제 실행에서는 Bedrock 호출이 즉시 끝나 스레드 배정이 달라지므로,
+        # 샘플링된 지연을 워커 수만큼의 슬롯에 순서대로 배정하여 가장 늦은 끝 시각을 구합니다.
+        workers = [0.0] * max(
+            1, min(self.handlers["AnalyzeImage"].MAX_WORKERS, len(records))
+        )
+        for _, delay in self.aws.bedrock.virtual_latencies:
+            heapq.heapreplace(workers, workers[0] + delay)
+        duration += elapsed + max(workers)
+        self.busy_seconds += duration
+
+        failed = {
+            failure["itemIdentifier"] for failure in response["batchItemFailures"]
+        }
+        self.schedule(self.now + duration, "complete", records, failed)
+
+    def on_complete(self, records, failed):
+        self.running -= 1
+        self.idle_instances += 1
+        for record in records:
+            message_id = record["messageId"]
+            if message_id not in failed:
+                analysis_id = json.loads(record["body"])["analysisId"]
+                self.completed_at[analysis_id] = self.now
+                continue
+            if self.receive_counts[message_id] >= self.args.max_receives:
+                self.dead_letters += 1
+                continue
+            # 가시성 타임아웃은 메시지를 가져간 시각부터 계산하지만, 단순화하여 완료 시각부터 계산
+            self.invisible += 1
+            self.schedule(self.now + self.args.visibility_timeout, "visible", record)
+        self.on_dispatch()
+
+    def on_visible(self, record):
+        self.invisible -= 1
+        self.visible_since[record["messageId"]] = self.now
+        self.aws.sqs.requeue(self.queue_url, [record])
+        self.on_dispatch()
+
+    def on_sample(self):
+        self.timeline.append(
+            {
+                "t": round(self.now, 1),
+                "depth": self.aws.sqs.depth(self.queue_url),
+                "invisible": self.invisible,
+                "running": self.running,
+            }
+        )
+        if len(self.events) > 0:
+            self.schedule(self.now + self.args.sample_seconds, "sample")
+
+    # 실행 --------------------------------------------------------------------
+
+    def run(self):
+        for index, arrived in enumerate(self.arrivals):
+            self.schedule(arrived, "arrive", index)
+        self.schedule(0.0, "sample")
+
+        with open(os.devnull, "w") as self.devnull:
+            while self.events:
+                self.now, _, kind, payload = heapq.heappop(self.events)
+                getattr(self, f"on_{kind}")(*payload)
+        return self.summary()
+
+    def summary(self):
+        users = list(self.users.values())
+        received = [
+            user["received"] - user["arrived"] for user in users if user["received"]
+        ]
+        processing = [
+            self.completed_at[analysis_id] - user["accepted"]
+            for analysis_id, user in self.users.items()
+            if analysis_id in self.completed_at
+        ]
+        first = min(self.arrivals)
+        last = max(self.completed_at.values(), default=first)
+        makespan = max(last - first, 1e-9)
+
+        def pct(values, p):
+            return round(percentile(values, p), 2) if values else None
+
+        return {
+            "concurrency": self.concurrency,
+            "batch_size": self.batch_size,
+            "users": len(users),
+            "completed": len(self.completed_at),
+            "gave_up": sum(1 for user in users if user["gave_up"]),
+            "dead_letters": self.dead_letters,
+            "throttled_calls": self.aws.bedrock.throttled,
+            "invocations": self.invocations,
+            "cold_starts": self.cold_starts,
+            "polls": self.polls,
+            "throughput_per_s": round(len(self.completed_at) / makespan, 2),
+            "utilization": round(self.busy_seconds / (self.concurrency * makespan), 2),
+            "ttr_p50": pct(received, 50),
+            "ttr_p95": pct(received, 95),
+            "ttr_p99": pct(received, 99),
+            "processing_p50": pct(processing, 50),
+            "processing_p99": pct(processing, 99),
+            "max_depth": max((row["depth"] for row in self.timeline), default=0),
+            "handler_seconds": {
+                name: round(seconds, 2)
+                for name, seconds in self.handler_seconds.items()
+            },
+            "timeline": self.timeline,
+        }
+
+
+def print_depth_timeline(result, sample_seconds, width=60):
+    timeline = result["timeline"]
+    if not timeline:
+        return
+    step = max(1, len(timeline) // width)
+    peak = max(result["max_depth"], 1)
+    bars = " ▁▂▃▄▅▆▇█"
+    line = "".join(
+        bars[min(8, math.ceil(row["depth"] / peak * 8))] for row in timeline[::step]
+    )
+    print(f"    queue depth (max {peak}, {step * sample_seconds:g}s/char): {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload→analyze→poll load simulator")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=10.0, help="초당 도착 사용자 수")
+    parser.add_argument("--peak-rate", type=float, help="peak 구간의 초당 도착 수")
+    parser.add_argument("--peak-start", type=float, default=60.0)
+    parser.add_argument("--peak-seconds", type=float, default=30.0)
+    parser.add_argument(
+        "--concurrency", default="10", help="예약 동시 실행 수 (쉼표 구분)"
+    )
+    parser.add_argument("--batch-size", default="10", help="SQS 배치 크기 (쉼표 구분)")
+    parser.add_argument(
+        "--batch-window", type=float, default=0.0, help="배치 대기 시간(초)"
+    )
+    parser.add_argument("--visibility-timeout", type=float, default=60.0)
+    parser.add_argument("--max-receives", type=int, default=3)
+    parser.add_argument("--cold-start-ms", type=float, default=900.0)
+    parser.add_argument(
+        "--bedrock-p50", type=float, default=4.0, help="Bedrock 지연 중앙값(초)"
+    )
+    parser.add_argument("--bedrock-sigma", type=float, default=0.35)
+    parser.add_argument("--bedrock-throttle-rate", type=float, default=0.0)
+    parser.add_argument("--api-rtt-ms", type=float, default=80.0)
+    parser.add_argument("--upload-ms", type=float, default=600.0)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--max-polls", type=int, default=10)
+    parser.add_argument(
+        "--cpu-scale", type=float, default=1.0, help="핸들러 실행 시간 배율"
+    )
+    parser.add_argument("--image-size", default="1600x1200")
+    parser.add_argument("--sample-seconds", type=float, default=1.0)
+    parser.add_argument("--timeline", help="큐 깊이 시계열을 저장할 CSV 경로")
+    parser.add_argument("--output", help="요약을 저장할 JSON 경로")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # AnalyzeImage가 마지막 시도에서 실패한 작업의 멱등성 레코드를 풀 수 있게 합니다.
+    os.environ["MAX_RECEIVE_COUNT"] = str(args.max_receives)
+    import AnalyzeImage
+    import GetAnalysisResult
+    import RequestAnalysis
+    import UploadImage
+
+    handlers = {
+        "AnalyzeImage": AnalyzeImage,
+        "GetAnalysisResult": GetAnalysisResult,
+        "RequestAnalysis": RequestAnalysis,
+        "UploadImage": UploadImage,
+    }
+    width, height = (int(value) for value in args.image_size.split("x"))
+    images = make_images(width, height, 4)
+    arrivals = arrival_times(args, random.Random(args.seed))
+
+    results = []
+    print(
+        f"{'conc':>5}{'batch':>6}{'done':>7}{'gaveup':>7}{'DLQ':>5}{'thr/s':>8}"
+        f"{'util':>6}{'ttr p50':>9}{'p95':>7}{'p99':>7}{'maxQ':>6}{'cold':>6}"
+    )
+    for concurrency in (int(value) for value in args.concurrency.split(",")):
+        for batch_size in (int(value) for value in args.batch_size.split(",")):
+            result = Simulation(
+                args, handlers, images, arrivals, concurrency, batch_size
+            ).run()
+            results.append(result)
+            print(
+                f"{concurrency:>5}{batch_size:>6}{result['completed']:>7}"
+                f"{result['gave_up']:>7}{result['dead_letters']:>5}"
+                f"{result['throughput_per_s']:>8}{result['utilization']:>6}"
+                f"{result['ttr_p50'] or '-':>9}{result['ttr_p95'] or '-':>7}"
+                f"{result['ttr_p99'] or '-':>7}{result['max_depth']:>6}"
+                f"{result['cold_starts']:>6}"
+            )
+            print_depth_timeline(result, args.sample_seconds)
+
+    if args.timeline:
+        with open(args.timeline, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(
+                ["concurrency", "batch_size", "t", "depth", "invisible", "running"]
+            )
+            for result in results:
+                for row in result["timeline"]:
+                    writer.writerow(
+                        [
+                            result["concurrency"],
+                            result["batch_size"],
+                            row["t"],
+                            row["depth"],
+                            row["invisible"],
+                            row["running"],
+                        ]
+                    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
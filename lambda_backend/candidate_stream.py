@@ -0,0 +1,95 @@
+"""
+Bedrock 스트리밍 응답에서 후보(candidate)를 점진적으로 꺼내는 도구.
+
+모델은 {"candidates": [{...}, {...}, {...}]} 형태의 JSON을 토큰 단위로 출력합니다.
+CandidateStreamParser는 받은 텍스트를 한 번만 훑으면서 문자열/이스케이프와 괄호 깊이를
+추적하고, 배열 안의 객체가 닫히는 순간 그 객체를 파싱하여 돌려줍니다.
+전체 응답의 최종 파싱은 스트림이 끝난 뒤 기존과 같이 json.loads로 합니다.
+"""
+
+import json
+from decimal import Decimal
+
+
+class CandidateStreamParser:
+    """
+    배열 원소인 JSON 객체가 완성될 때마다 반환하는 점진적 파서.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._position = 0
+        self._stack = []  # 열린 괄호 문자들
+        self._in_string = False
+        self._escaped = False
+        self._object_start = None
+        self._object_depth = 0
+
+    def feed(self, chunk):
+        """
+        텍스트 조각을 추가하고, 이번 조각으로 새로 완성된 후보 dict 목록을 반환합니다.
+        """
+        self.text += chunk
+        completed = []
+        text = self.text
+        for position in range(self._position, len(text)):
+            char = text[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                # 배열 바로 안의 객체만 후보로 봅니다. (후보 안의 중첩 객체는 제외)
+                if (
+                    char == "{"
+                    and self._object_start is None
+                    and self._stack
+                    and self._stack[-1] == "["
+                ):
+                    self._object_start = position
+                    self._object_depth = len(self._stack)
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if (
+                    self._object_start is not None
+                    and len(self._stack) == self._object_depth
+                ):
+                    fragment = text[self._object_start : position + 1]
+                    self._object_start = None
+                    try:
+                        candidate = json.loads(fragment, parse_float=Decimal)
+                    except ValueError:
+                        continue
+                    if isinstance(candidate, dict):
+                        completed.append(candidate)
+        self._position = len(text)
+        return completed
+
+
+def iter_text_deltas(event_stream, usage=None):
+    """
+    invoke_model_with_response_stream의 이벤트 스트림에서 텍스트 조각을 순서대로 꺼냅니다.
+    usage(dict)를 넘기면 message_start/message_delta 이벤트의 토큰 수를 채웁니다.
+    """
+    for event in event_stream:
+        chunk = event.get("chunk")
+        if not chunk:
+            continue
+        payload = json.loads(chunk["bytes"])
+        event_type = payload.get("type")
+        if event_type == "content_block_delta":
+            delta = payload.get("delta", {})
+            if delta.get("type") == "text_delta":
+                yield delta.get("text", "")
+        elif usage is not None and event_type == "message_start":
+            usage.update(payload.get("message", {}).get("usage", {}))
+        elif usage is not None and event_type == "message_delta":
+            usage.update(payload.get("usage", {}))
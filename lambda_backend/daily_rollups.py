@@ -0,0 +1,115 @@
+"""
+사용자별, 한국 시간(KST) 일자별 영양소 합계(rollup).
+
+SaveAnalysis가 음식 기록을 저장할 때마다 원자적 카운터(ADD)로 갱신하고,
+GetFoodlog의 캘린더 조회는 원본 기록 대신 한 달 최대 31개의 rollup 행을 읽습니다.
+행의 version은 갱신할 때마다 1씩 늘어나므로, 기간 안의 행들로 만든 지문(period_fingerprint)이
+같으면 그 기간의 기록이 바뀌지 않은 것으로 보고 캐시된 계산 결과를 재사용할 수 있습니다.
+
+사용자별 기록 버전(LOG_VERSION_DAY 행)은 기록을 저장할 때마다 1씩 늘어나며,
+GetFoodlog가 본문을 만들지 않고 ETag를 계산하는 데 사용합니다. SaveAnalysis는 기록을 쓰기 전에
+버전을 올리고(실패하면 저장하지 않음), 쓰는 도중의 조회를 무효화하도록 쓴 뒤에 한 번 더 올립니다.
+
+DynamoDB 테이블 스키마: 파티션 키 user_id (S), 정렬 키 day (S, 'YYYY-MM-DD')
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from boto3.dynamodb.conditions import Key
+
+# 한국 시간대 (서머타임이 없으므로 고정 오프셋, SaveAnalysis에 pytz 의존성을 추가하지 않음)
+KST = timezone(timedelta(hours=9))
+
+NUTRIENT_FIELDS = ("calories", "protein", "carbs", "fat")
+
+# 사용자별 기록 버전 행의 정렬 키 ('#'은 숫자보다 앞에 정렬되어 일자 범위 조회에 포함되지 않음)
+LOG_VERSION_DAY = "#log_version"
+
+
+def kst_day(eaten_at):
+    """
+    eaten_at(ISO 8601 문자열)이 속한 KST 날짜('YYYY-MM-DD')를 반환합니다.
+    앱은 기기 로컬 시간을 시간대 없이 보내므로, 시간대가 없으면 KST로 간주합니다.
+    """
+    dt = datetime.fromisoformat(eaten_at.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        return dt.date().isoformat()
+    return dt.astimezone(KST).date().isoformat()
+
+
+def add_to_rollup(table, user_id, day, totals, entry_count=1):
+    """
+    해당 일자의 rollup에 영양소 합계와 기록 수를 원자적으로 더하고 version을 올립니다.
+    """
+    values = {f":{field}": int(totals.get(field, 0)) for field in NUTRIENT_FIELDS}
+    values[":entry_count"] = entry_count
+    values[":one"] = 1
+    table.update_item(
+        Key={"user_id": user_id, "day": day},
+        UpdateExpression=(
+            "ADD calories :calories, protein :protein, carbs :carbs, fat :fat, "
+            "entry_count :entry_count, #version :one"
+        ),
+        ExpressionAttributeNames={"#version": "version"},
+        ExpressionAttributeValues=values,
+    )
+
+
+def to_rollup_row(item):
+    """
+    DynamoDB rollup 아이템을 응답용 dict로 변환합니다.
+    """
+    row = {"day": item["day"], "entry_count": int(item.get("entry_count", 0))}
+    for field in NUTRIENT_FIELDS:
+        row[field] = int(item.get(field, 0))
+    return row
+
+
+def period_fingerprint(table, user_id, start_day, end_day):
+    """
+    기간 안의 rollup 행(일자, version, 기록 수, 영양소 합계)으로 지문을 만듭니다.
+    기간 안에 기록이 추가되거나 rollup이 다른 값으로 다시 만들어지면 지문이 바뀝니다.
+    """
+    fields = ("version", "entry_count") + NUTRIENT_FIELDS
+    names = {"#day": "day", **{f"#f{i}": field for i, field in enumerate(fields)}}
+    digest = hashlib.sha1()
+    query_params = {
+        "KeyConditionExpression": Key("user_id").eq(user_id)
+        & Key("day").between(start_day, end_day),
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+    while True:
+        response = table.query(**query_params)
+        for item in response.get("Items", []):
+            values = ":".join(str(int(item.get(field, 0))) for field in fields)
+            digest.update(f"{item['day']}:{values};".encode())
+        if "LastEvaluatedKey" not in response:
+            return digest.hexdigest()
+        query_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def bump_log_version(table, user_id):
+    """
+    사용자의 기록 버전을 1 올립니다. (기록을 저장하기 전과 후에 호출)
+    """
+    table.update_item(
+        Key={"user_id": user_id, "day": LOG_VERSION_DAY},
+        UpdateExpression="ADD #version :one",
+        ExpressionAttributeNames={"#version": "version"},
+        ExpressionAttributeValues={":one": 1},
+    )
+
+
+def get_log_version(table, user_id):
+    """
+    사용자의 기록 버전을 강한 일관성 읽기로 조회합니다. 기록이 없으면 0입니다.
+    """
+    item = table.get_item(
+        Key={"user_id": user_id, "day": LOG_VERSION_DAY},
+        ProjectionExpression="#version",
+        ExpressionAttributeNames={"#version": "version"},
+        ConsistentRead=True,
+    ).get("Item")
+    return int(item.get("version", 0)) if item else 0
@@ -0,0 +1,99 @@
+"""
+음식 기록 v2 테이블의 키 설계 (SaveAnalysis 이중 쓰기, GetFoodlog 읽기, 이전 스크립트).
+
+기존 food-logs 테이블은 정렬 키 log_id가 저장 시각(UTC)이라, 지난 식사를 나중에 기록하면
+다른 날짜 범위에 들어가고 GetFoodlog는 KST 날짜 경계를 UTC로 바꾼 뒤 "ZZZ"를 붙여 조회합니다.
+식사 종류별 조회는 기간 전체를 읽어 걸러야 합니다. v2 테이블은 식사 시각(eaten_at)을 키로 씁니다.
+
+    파티션 키 user_id (S)
+    정렬 키   entry_key (S) = <eaten_at의 KST 로컬 시각 YYYY-MM-DDTHH:MM:SS.ffffff>#<접미사>
+    GSI meal-type-index: 파티션 키 user_meal (S) = <user_id>#<meal_type>, 정렬 키 entry_key,
+                         프로젝션 ALL
+
+- 정렬 키가 KST 날짜로 시작하므로 하루/한 달 조회는 정확한 키 범위 조회가 됩니다.
+- 접미사는 기존 log_id의 해시라서 같은 시각에 먹은 기록끼리 겹치지 않고, 같은 기록은 이중
+  쓰기와 이전 스크립트가 몇 번 써도 같은 키가 됩니다(멱등).
+- meal_type이 없거나 ETC인 기록에는 user_meal을 넣지 않아 인덱스에 들어가지 않습니다(sparse).
+"""
+
+import hashlib
+from datetime import datetime
+
+from boto3.dynamodb.conditions import Attr, Key
+
+from daily_rollups import KST
+
+ENTRY_KEY = "entry_key"
+MEAL_INDEX_NAME = "meal-type-index"
+MEAL_INDEX_KEY = "user_meal"
+
+# 인덱스에 넣지 않는 식사 종류 (SaveAnalysis 기본값)
+UNINDEXED_MEAL_TYPES = ("ETC",)
+
+# 정렬 키에 쓰이는 어떤 문자('0'-'9', '-', 'T', ':', '.', '#', 16진수)보다 큰 문자
+KEY_RANGE_END = "~"
+
+
+def kst_timestamp(eaten_at):
+    """
+    eaten_at(ISO 8601 문자열)을 KST 로컬 시각 문자열로 바꿉니다. (daily_rollups.kst_day와
+    같은 규칙: 시간대가 없으면 KST로 간주) 마이크로초까지 고정 길이라 문자열 순서가 시간 순서입니다.
+    """
+    dt = datetime.fromisoformat(eaten_at.replace("Z", "+00:00"))
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(KST)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+
+def entry_key(eaten_at, log_id):
+    suffix = hashlib.sha256(log_id.encode("utf-8")).hexdigest()[:12]
+    return f"{kst_timestamp(eaten_at)}#{suffix}"
+
+
+def meal_key(user_id, meal_type):
+    return f"{user_id}#{meal_type}"
+
+
+def to_v2_item(item):
+    """
+    기존 food-logs 아이템을 v2 아이템으로 바꿉니다. (log_id는 원래 기록을 찾을 수 있게 유지)
+    eaten_at이 없는 오래된 기록은 created_at을 식사 시각으로 사용합니다.
+    """
+    v2_item = dict(item)
+    v2_item[ENTRY_KEY] = entry_key(
+        item.get("eaten_at") or item["created_at"], item["log_id"]
+    )
+    meal_type = item.get("meal_type")
+    if meal_type and meal_type not in UNINDEXED_MEAL_TYPES:
+        v2_item[MEAL_INDEX_KEY] = meal_key(item["user_id"], meal_type)
+    return v2_item
+
+
+def day_key_range(start_day, end_day):
+    """
+    KST 날짜 범위(양 끝 포함)를 entry_key 범위로 바꿉니다.
+    """
+    return start_day, f"{end_day}{KEY_RANGE_END}"
+
+
+def entry_range_query(user_id, start_key, end_key, meal_type=None):
+    """
+    entry_key 범위 조회의 query 파라미터를 만듭니다.
+    meal_type을 주면 meal-type-index에서 해당 식사 종류만 읽습니다. 인덱스에 넣지 않는 식사
+    종류(UNINDEXED_MEAL_TYPES)는 기본 테이블의 범위를 읽어 거릅니다.
+    """
+    entry_range = Key(ENTRY_KEY).between(start_key, end_key)
+    if meal_type in UNINDEXED_MEAL_TYPES:
+        return {
+            "KeyConditionExpression": Key("user_id").eq(user_id) & entry_range,
+            "FilterExpression": Attr("meal_type").eq(meal_type),
+        }
+    if meal_type:
+        return {
+            "IndexName": MEAL_INDEX_NAME,
+            "KeyConditionExpression": Key(MEAL_INDEX_KEY).eq(
+                meal_key(user_id, meal_type)
+            )
+            & entry_range,
+        }
+    return {"KeyConditionExpression": Key("user_id").eq(user_id) & entry_range}
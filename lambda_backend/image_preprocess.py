@@ -0,0 +1,100 @@
+"""
+Bedrock 호출 전 이미지 정규화.
+
+휴대폰에서 올라온 원본(수 MB, 4~12MP)을 그대로 base64로 보내지 않고
+EXIF 방향 적용 -> 긴 변 기준 축소 -> JPEG 재인코딩(메타데이터 제거) 순서로 줄입니다.
+"""
+
+from io import BytesIO
+
+# Pillow 레이어가 없으면 원본을 그대로 보내되 media_type만 올바르게 판별합니다.
+try:
+    from PIL import Image, ImageOps, UnidentifiedImageError
+except ImportError:
+    Image = None
+
+# HEIC 업로드는 pillow-heif가 있을 때만 디코딩할 수 있습니다.
+try:
+    import pillow_heif
+
+    pillow_heif.register_heif_opener()
+except ImportError:
+    pass
+
+# Bedrock(Claude)이 받는 이미지 형식
+SUPPORTED_MEDIA_TYPES = ("image/jpeg", "image/png", "image/gif", "image/webp")
+
+
+def detect_media_type(image_bytes):
+    """
+    파일 시그니처로 실제 이미지 형식을 판별합니다. 알 수 없으면 None을 반환합니다.
+    """
+    header = image_bytes[:16]
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    if header[4:8] == b"ftyp" and header[8:12] in (
+        b"heic",
+        b"heix",
+        b"hevc",
+        b"heim",
+        b"heis",
+        b"mif1",
+        b"msf1",
+    ):
+        return "image/heic"
+    return None
+
+
+def normalize_image(image_bytes, max_edge=1280, quality=85):
+    """
+    이미지를 Bedrock에 보낼 형태로 정규화합니다.
+    (정규화된 바이트, media_type, 통계 dict)를 반환합니다.
+    이미지로 읽을 수 없는 데이터면 ValueError를 발생시킵니다.
+    """
+    media_type = detect_media_type(image_bytes)
+    stats = {"bytesIn": len(image_bytes), "bytesOut": len(image_bytes)}
+
+    if Image is None:
+        if media_type not in SUPPORTED_MEDIA_TYPES:
+            raise ValueError(f"Unsupported image type without Pillow: {media_type}")
+        return image_bytes, media_type, stats
+
+    # 잘린 파일은 열기는 성공하고 픽셀을 디코딩할 때(thumbnail/save) OSError가 나므로,
+    # 재인코딩까지 모두 감싸서 ValueError로 바꿉니다.
+    try:
+        image = Image.open(BytesIO(image_bytes))
+        # 1. JPEG는 DCT 단계에서 축소 디코딩하여 전체 해상도 디코딩 비용을 줄입니다.
+        image.draft("RGB", (max_edge, max_edge))
+
+        # 2. EXIF 방향 적용 (재인코딩하면 EXIF가 사라지므로 먼저 픽셀을 회전)
+        image = ImageOps.exif_transpose(image)
+
+        # 3. 투명도가 있는 이미지는 흰 배경에 합성하여 RGB로 변환
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        # 4. 긴 변이 max_edge를 넘지 않도록 축소
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+        # 5. 메타데이터 없이 JPEG로 재인코딩
+        output = BytesIO()
+        image.save(output, format="JPEG", quality=quality)
+        normalized = output.getvalue()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise ValueError(f"Unsupported image: {media_type}") from e
+
+    stats.update(
+        {"bytesOut": len(normalized), "width": image.width, "height": image.height}
+    )
+    return normalized, "image/jpeg", stats
@@ -0,0 +1,159 @@
+"""
+음식 기록 목록/캘린더용 썸네일 생성.
+
+원본 사진(수 MB) 대신 긴 변 기준 크기별 썸네일을 별도 접두사 아래에 저장합니다.
+
+    thumbnails/<긴 변 픽셀>/<원본 키에서 확장자를 뺀 경로>.<webp|jpg>
+
+키는 원본 키로 정해지므로 SaveAnalysis/GetFoodlog는 S3 조회 없이 URL을 만들 수 있습니다.
+업로드 키는 매번 새로 만들어지고 같은 키의 원본은 바뀌지 않으므로, 썸네일도 한 번 만들면
+다시 만들 필요가 없습니다. 이미 있는 썸네일은 head_object로 확인하여 건너뜁니다.
+"""
+
+from io import BytesIO
+
+from botocore.exceptions import ClientError
+
+# Pillow 레이어가 없으면 썸네일을 만들지 않습니다.
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+THUMBNAIL_PREFIX = "thumbnails/"
+
+# 형식 이름 -> (확장자, Content-Type, Pillow 저장 옵션)
+FORMATS = {
+    "webp": ("webp", "image/webp", {"format": "WEBP", "quality": 75, "method": 4}),
+    "jpeg": ("jpg", "image/jpeg", {"format": "JPEG", "quality": 80, "optimize": True}),
+}
+
+# 원본 키가 바뀌지 않으므로 썸네일은 오래 캐시해도 됩니다.
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def parse_sizes(value):
+    """
+    "160,480" 형식의 환경 변수 값을 긴 변 픽셀 튜플(작은 순)로 바꿉니다.
+    """
+    return tuple(sorted({int(size) for size in value.split(",") if size.strip()}))
+
+
+def parse_formats(value):
+    """
+    "webp,jpeg" 형식의 환경 변수 값을 형식 이름 튜플(순서 유지)로 바꿉니다.
+    알 수 없는 형식이면 ValueError를 발생시킵니다.
+    """
+    formats = tuple(
+        dict.fromkeys(name.strip().lower() for name in value.split(",") if name.strip())
+    )
+    unknown = [name for name in formats if name not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unsupported thumbnail formats: {unknown}")
+    return formats
+
+
+def thumbnail_key(object_key, size, fmt):
+    stem = object_key.lstrip("/").rsplit(".", 1)[0]
+    return f"{THUMBNAIL_PREFIX}{size}/{stem}.{FORMATS[fmt][0]}"
+
+
+def thumbnail_urls(base_url, object_key, sizes, fmt):
+    """
+    음식 기록에 저장할 {긴 변 픽셀(문자열): URL}을 만듭니다.
+    """
+    return {
+        str(size): f"{base_url.rstrip('/')}/{thumbnail_key(object_key, size, fmt)}"
+        for size in sizes
+    }
+
+
+def render_thumbnails(image_bytes, sizes, formats):
+    """
+    이미지를 한 번만 디코딩하여 큰 크기부터 차례로 줄여 가며 인코딩합니다.
+    {(size, fmt): bytes}를 반환합니다.
+    """
+    image = Image.open(BytesIO(image_bytes))
+    # JPEG는 가장 큰 썸네일 크기에 맞춰 축소 디코딩합니다.
+    image.draft("RGB", (max(sizes), max(sizes)))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    rendered = {}
+    for size in sorted(sizes, reverse=True):
+        # 이전(더 큰) 썸네일에서 줄이면 원본에서 줄이는 것보다 훨씬 빠릅니다.
+        image.thumbnail((size, size), Image.LANCZOS)
+        for fmt in formats:
+            output = BytesIO()
+            image.save(output, **FORMATS[fmt][2])
+            rendered[(size, fmt)] = output.getvalue()
+    return rendered
+
+
+def thumbnail_exists(s3, bucket, key):
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def ensure_thumbnails(s3, bucket, object_key, image_bytes, sizes, formats):
+    """
+    원본 키의 썸네일을 만들어 저장합니다. 이미 있는 썸네일은 다시 만들지 않습니다.
+    저장한 썸네일 수를 반환합니다. (모두 있으면 0)
+    formats의 형식을 만들 수 없으면(WebP 인코더 없음) RuntimeError를 발생시킵니다.
+
+    썸네일은 항상 같은 순서(작은 크기 -> 큰 크기, formats 순)로 저장하므로 마지막
+    썸네일이 있으면 모두 있는 것입니다. 대부분의 재실행은 head_object 한 번으로 끝납니다.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is required to render thumbnails")
+    if "webp" in formats and not features.check("webp"):
+        # SaveAnalysis는 THUMBNAIL_FORMATS의 첫 형식으로 URL을 저장하므로, 설정된 형식을
+        # 건너뛰면 기록이 없는 썸네일을 가리킵니다. THUMBNAIL_FORMATS에서 webp를 빼야 합니다.
+        raise RuntimeError(
+            "Pillow was built without a WebP encoder; remove webp from THUMBNAIL_FORMATS"
+        )
+    targets = [(size, fmt) for size in sorted(sizes) for fmt in formats]
+    if not targets:
+        return 0
+
+    # 1. 마지막 썸네일이 있으면 모두 만들어진 것
+    last_size, last_fmt = targets[-1]
+    if thumbnail_exists(s3, bucket, thumbnail_key(object_key, last_size, last_fmt)):
+        return 0
+
+    # 2. 앞선 실행이 중간에 실패했을 수 있으므로 빠진 것만 다시 만듭니다.
+    missing = [targets[-1]] + [
+        (size, fmt)
+        for size, fmt in targets[:-1]
+        if not thumbnail_exists(s3, bucket, thumbnail_key(object_key, size, fmt))
+    ]
+    missing_formats = {fmt for _, fmt in missing}
+    rendered = render_thumbnails(
+        image_bytes,
+        sorted({size for size, _ in missing}),
+        tuple(fmt for fmt in formats if fmt in missing_formats),
+    )
+
+    # 3. 정해진 순서대로 저장 (마지막 썸네일을 가장 나중에)
+    for size, fmt in targets:
+        if (size, fmt) not in missing:
+            continue
+        s3.put_object(
+            Bucket=bucket,
+            Key=thumbnail_key(object_key, size, fmt),
+            Body=rendered[(size, fmt)],
+            ContentType=FORMATS[fmt][1],
+            CacheControl=CACHE_CONTROL,
+        )
+    return len(missing)
@@ -0,0 +1,66 @@
+"""
+CloudWatch 임베디드 메트릭 형식(EMF) 로그.
+
+EMF 형식의 JSON 한 줄을 print하면 CloudWatch Logs가 메트릭으로 추출하므로
+PutMetricData 호출(지연, 비용) 없이 핸들러에서 메트릭을 남길 수 있습니다.
+값에 리스트를 넘기면 한 줄에 여러 샘플이 기록되어 히스토그램(백분위)으로 조회할 수 있습니다.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "Snapit")
+
+
+def emit_metrics(metrics, units=None, dimensions=None, properties=None):
+    """
+    metrics({이름: 값 또는 값 리스트})를 EMF 로그 한 줄로 출력합니다.
+    units는 {이름: 단위}(기본 Count), dimensions는 {차원 이름: 값},
+    properties는 메트릭이 아닌 검색용 필드입니다.
+    """
+    metrics = {name: value for name, value in metrics.items() if value is not None}
+    if not metrics:
+        return
+    units = units or {}
+    dimensions = dimensions or {}
+    document = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": METRICS_NAMESPACE,
+                    "Dimensions": [list(dimensions)],
+                    "Metrics": [
+                        {"Name": name, "Unit": units.get(name, "Count")}
+                        for name in metrics
+                    ],
+                }
+            ],
+        }
+    }
+    document.update(properties or {})
+    document.update(dimensions)
+    document.update(metrics)
+    print(json.dumps(document, default=str))
+
+
+class StageTimer:
+    """
+    단계별 소요 시간(ms)을 모읍니다. 같은 단계를 여러 번 재면 더합니다.
+    """
+
+    def __init__(self):
+        self.timings = {}
+
+    def add(self, name, milliseconds):
+        self.timings[name] = self.timings.get(name, 0.0) + milliseconds
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000)
@@ -0,0 +1,204 @@
+"""
+기간별 섭취 분석 (일자별 합계, 이동 평균, 주/월 평균, 목표 대비, 끼니별 분포).
+
+기간 안의 음식 기록을 한 번에 NumPy 배열로 바꾼 뒤 bincount/cumsum/reduceat으로 계산합니다.
+(기록 수에 비례하는 파이썬 루프는 배열을 만드는 한 번뿐)
+평균은 기록이 있는 날만 기준으로 계산합니다. (기록하지 않은 날을 0kcal로 보지 않음)
+
+GetNutritionAnalytics가 사용하며, Lambda에는 numpy 레이어가 필요합니다.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from daily_rollups import NUTRIENT_FIELDS
+
+# Cognito 프로필의 목표 속성 -> 영양소 필드
+TARGET_ATTRIBUTES = {
+    "custom:target_calories": "calories",
+    "custom:target_protein": "protein",
+    "custom:target_carbs": "carbs",
+    "custom:target_fats": "fat",
+}
+
+
+def targets_from_attributes(user_attributes):
+    """
+    Cognito 사용자 속성에서 {영양소: 목표} dict를 만듭니다. 목표가 없거나 0이면 제외합니다.
+    """
+    targets = {}
+    for attribute in user_attributes:
+        field = TARGET_ATTRIBUTES.get(attribute["Name"])
+        if field is None:
+            continue
+        try:
+            value = float(attribute["Value"])
+        except (TypeError, ValueError):
+            continue
+        if value > 0:
+            targets[field] = value
+    return targets
+
+
+def _round(values, digits=1):
+    """
+    NumPy 값을 JSON으로 보낼 파이썬 float 리스트로 바꿉니다. (NaN은 None)
+    """
+    return [
+        None if np.isnan(value) else round(value, digits)
+        for value in np.asarray(values, dtype=np.float64).tolist()
+    ]
+
+
+def _nutrients(values):
+    return dict(zip(NUTRIENT_FIELDS, values))
+
+
+def _group_summary(totals, counts, starts, target_vector):
+    """
+    연속된 일자 구간(starts: 구간 시작 인덱스)별 기록일 수, 기록일 평균, 목표 대비 %를 계산합니다.
+    """
+    sums = np.add.reduceat(totals, starts, axis=1)
+    logged_days = np.add.reduceat((counts > 0).astype(np.int64), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = sums / np.where(logged_days > 0, logged_days, np.nan)
+        percents = averages / target_vector[:, None] * 100
+    return logged_days, averages, percents
+
+
+def compute_period_analytics(items, start_day, end_day, targets=None, window=7):
+    """
+    기간(start_day ~ end_day, date) 안의 기록들로 분석 결과 dict를 만듭니다.
+    items는 {'day': 'YYYY-MM-DD', 영양소 필드..., 'meal_type'} 목록이며 기간 밖의 기록은 무시합니다.
+    """
+    targets = targets or {}
+    day_count = (end_day - start_day).days + 1
+    target_vector = np.array(
+        [targets.get(field, np.nan) for field in NUTRIENT_FIELDS], dtype=np.float64
+    )
+
+    # 1. 기록 -> 배열 (일자 인덱스, 영양소 행렬, 끼니)
+    if items:
+        day_index = (
+            np.array([item["day"] for item in items], dtype="datetime64[D]")
+            - np.datetime64(start_day)
+        ).astype(np.int64)
+        values = np.array(
+            [[item.get(field) or 0 for field in NUTRIENT_FIELDS] for item in items],
+            dtype=np.float64,
+        ).T
+        meal_types = np.array(
+            [item.get("meal_type") or "unknown" for item in items], dtype=str
+        )
+        in_range = (day_index >= 0) & (day_index < day_count)
+        day_index = day_index[in_range]
+        values = values[:, in_range]
+        meal_types = meal_types[in_range]
+    else:
+        day_index = np.zeros(0, dtype=np.int64)
+        values = np.zeros((len(NUTRIENT_FIELDS), 0))
+        meal_types = np.zeros(0, dtype=str)
+
+    # 2. 일자별 합계와 기록 수
+    totals = np.vstack(
+        [np.bincount(day_index, weights=row, minlength=day_count) for row in values]
+    )
+    counts = np.bincount(day_index, minlength=day_count)
+    logged = counts > 0
+
+    # 3. 이동 평균: 각 날짜를 끝으로 하는 window일 중 기록이 있는 날의 평균
+    positions = np.arange(day_count)
+    lower = np.maximum(0, positions - window + 1)
+    cumulative = np.concatenate(
+        [np.zeros((len(NUTRIENT_FIELDS), 1)), np.cumsum(totals, axis=1)], axis=1
+    )
+    logged_cumulative = np.concatenate([[0], np.cumsum(logged)])
+    window_days = logged_cumulative[positions + 1] - logged_cumulative[lower]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rolling = (cumulative[:, positions + 1] - cumulative[:, lower]) / np.where(
+            window_days > 0, window_days, np.nan
+        )
+        percent_of_target = totals / target_vector[:, None] * 100
+    deviation = totals - target_vector[:, None]
+
+    days = []
+    for position in np.flatnonzero(logged).tolist():
+        row = {
+            "day": (start_day + timedelta(days=position)).isoformat(),
+            "entry_count": int(counts[position]),
+            **_nutrients(int(round(value)) for value in totals[:, position].tolist()),
+            "rolling_average": _nutrients(_round(rolling[:, position])),
+        }
+        if targets:
+            row["deviation"] = _nutrients(_round(deviation[:, position]))
+            row["percent_of_target"] = _nutrients(
+                _round(percent_of_target[:, position])
+            )
+        days.append(row)
+
+    # 4. 주(월요일 시작)/월/전체 평균
+    dates = np.datetime64(start_day) + np.arange(day_count)
+    weekday = (dates.astype(np.int64) - 4) % 7  # 1970-01-01은 목요일
+    week_starts = np.flatnonzero((weekday == 0) | (positions == 0))
+    month_numbers = dates.astype("datetime64[M]").astype(np.int64)
+    month_starts = np.flatnonzero(
+        np.concatenate([[True], month_numbers[1:] != month_numbers[:-1]])
+    )
+
+    def summarize(starts, label):
+        logged_days, averages, percents = _group_summary(
+            totals, counts, starts, target_vector
+        )
+        groups = []
+        for group, position in enumerate(starts.tolist()):
+            entry = {
+                label: (start_day + timedelta(days=position)).isoformat(),
+                "logged_days": int(logged_days[group]),
+                "average": _nutrients(_round(averages[:, group])),
+            }
+            if targets:
+                entry["percent_of_target"] = _nutrients(_round(percents[:, group]))
+            groups.append(entry)
+        return groups
+
+    weeks = summarize(week_starts, "week_start")
+    months = summarize(month_starts, "month_start")
+    overall = summarize(np.array([0]), "start")[0]
+
+    # 5. 끼니별 분포 (기록 수, 칼로리, 칼로리 비율)
+    meal_distribution = {}
+    if meal_types.size:
+        names, codes = np.unique(meal_types, return_inverse=True)
+        entries = np.bincount(codes).tolist()
+        calories = np.bincount(codes, weights=values[0]).tolist()
+        total_calories = sum(calories)
+        for code, name in enumerate(names.tolist()):
+            meal_distribution[name] = {
+                "entries": entries[code],
+                "calories": int(round(calories[code])),
+                "share": (
+                    round(calories[code] / total_calories * 100, 1)
+                    if total_calories
+                    else 0.0
+                ),
+            }
+
+    return {
+        "start": start_day.isoformat(),
+        "end": end_day.isoformat(),
+        "window": window,
+        "targets": targets or None,
+        "summary": {key: value for key, value in overall.items() if key != "start"},
+        "days": days,
+        "weeks": weeks,
+        "months": months,
+        "meal_types": meal_distribution,
+    }
+
+
+def parse_day(value):
+    """
+    'YYYY-MM-DD' 문자열을 date로 바꿉니다. 잘못된 형식이면 ValueError를 발생시킵니다.
+    """
+    return date.fromisoformat(value)
@@ -0,0 +1,123 @@
+"""
+일일 권장 섭취량(목표 칼로리/탄수화물/단백질/지방) 계산.
+
+Mifflin-St Jeor 방정식으로 BMR을 구하고 활동량 계수와 목표별 칼로리 조정을 적용한 뒤
+MACRO_SPLIT 비율로 영양소를 배분합니다. 계수를 바꾸면 온보딩(UpdateOnboardingProfile)과
+전체 사용자 재계산 스크립트(scripts/recompute_targets.py)에 함께 적용됩니다.
+
+calculate_nutritional_goals는 한 명, calculate_nutritional_goals_bulk는 NumPy 배열로
+여러 명을 한 번에 계산하며, 두 함수는 같은 순서의 부동소수점 연산과 같은 반올림
+(round, 짝수 쪽으로 반올림)을 사용하므로 결과가 같습니다.
+"""
+
+from datetime import date
+
+# 활동량 계수 (TDEE = BMR * 계수)
+ACTIVITY_MULTIPLIERS = {
+    "sedentary": 1.2,
+    "light": 1.375,
+    "moderate": 1.55,
+    "very": 1.725,
+    "extra": 1.9,
+}
+
+# 목표별 칼로리 조정 (kcal)
+GOAL_ADJUSTMENTS = {"lose": -500, "maintain": 0, "gain": 300}
+
+# 영양소 배분 (칼로리 기준 비율)과 1g당 칼로리
+MACRO_SPLIT = {"carbs": 0.40, "protein": 0.30, "fats": 0.30}
+CALORIES_PER_GRAM = {"carbs": 4, "protein": 4, "fats": 9}
+
+# BMR 성별 상수 (male 외에는 female 상수 사용)
+GENDER_CONSTANTS = {"male": 5, "female": -161}
+
+
+def calculate_age(birthdate, today):
+    return (
+        today.year
+        - birthdate.year
+        - ((today.month, today.day) < (birthdate.month, birthdate.day))
+    )
+
+
+def calculate_nutritional_goals(
+    birthdate_str, height_cm, weight_kg, gender, activity_level, goal, today=None
+):
+    """
+    Mifflin-St Jeor equation - 사용자 정보와 목표에 기반하여 일일 권장 섭취량을 계산합니다.
+    """
+    # 1. 나이 계산
+    age = calculate_age(date.fromisoformat(birthdate_str), today or date.today())
+
+    # 2. BMR 계산 (미플린-지어 방정식)
+    gender_constant = GENDER_CONSTANTS["male" if gender == "male" else "female"]
+    bmr = (10 * weight_kg) + (6.25 * height_cm) - (5 * age) + gender_constant
+
+    # 3. TDEE 계산 (활동량 계수 적용)
+    tdee = bmr * ACTIVITY_MULTIPLIERS[activity_level]
+
+    # 4. 목표 칼로리 설정
+    target_calories = tdee + GOAL_ADJUSTMENTS[goal]
+
+    # 5. 영양소 배분 (칼로리 비율 / 1g당 칼로리)
+    goals = {"calories": round(target_calories)}
+    for nutrient in ("carbs", "protein", "fats"):
+        goals[nutrient] = round(
+            (target_calories * MACRO_SPLIT[nutrient]) / CALORIES_PER_GRAM[nutrient]
+        )
+    return goals
+
+
+def calculate_nutritional_goals_bulk(
+    birthdates, heights_cm, weights_kg, genders, activity_levels, goals, today=None
+):
+    """
+    여러 사용자의 목표를 한 번의 NumPy 연산으로 계산합니다.
+    birthdates는 'YYYY-MM-DD' 문자열, 나머지는 사용자 순서대로의 시퀀스이며,
+    {'calories', 'carbs', 'protein', 'fats'}: int64 배열을 반환합니다.
+    """
+    # 대량 계산에만 필요한 선택적 의존성이므로, 온보딩 Lambda가 이 모듈을 import할 때
+    # numpy를 불러오지 않도록 여기서 import합니다.
+    try:
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("numpy is required for bulk goal calculation") from None
+    today = today or date.today()
+
+    # 1. 나이 계산 ('YYYY-MM-DD'를 datetime64로 파싱하여 연/월/일 분리)
+    days = np.asarray(birthdates, dtype="datetime64[D]")
+    months = days.astype("datetime64[M]")
+    year = months.astype("datetime64[Y]").astype(np.int64) + 1970
+    month = months.astype(np.int64) % 12 + 1
+    day = (days - months).astype(np.int64) + 1
+    birthday_passed = month * 100 + day <= today.month * 100 + today.day
+    age = today.year - year - (~birthday_passed).astype(np.int64)
+
+    # 2. BMR 계산
+    gender_constant = np.where(
+        np.asarray(genders, dtype=object) == "male",
+        GENDER_CONSTANTS["male"],
+        GENDER_CONSTANTS["female"],
+    )
+    bmr = (
+        (10 * np.asarray(weights_kg, dtype=np.float64))
+        + (6.25 * np.asarray(heights_cm, dtype=np.float64))
+        - (5 * age)
+        + gender_constant
+    )
+
+    # 3. TDEE, 4. 목표 칼로리 (사전 조회를 배열 인덱싱으로)
+    tdee = bmr * np.array(
+        [ACTIVITY_MULTIPLIERS[level] for level in activity_levels], dtype=np.float64
+    )
+    target_calories = tdee + np.array(
+        [GOAL_ADJUSTMENTS[goal] for goal in goals], dtype=np.int64
+    )
+
+    # 5. 영양소 배분 (np.rint는 round와 같이 짝수 쪽으로 반올림)
+    results = {"calories": np.rint(target_calories).astype(np.int64)}
+    for nutrient in ("carbs", "protein", "fats"):
+        results[nutrient] = np.rint(
+            (target_calories * MACRO_SPLIT[nutrient]) / CALORIES_PER_GRAM[nutrient]
+        ).astype(np.int64)
+    return results
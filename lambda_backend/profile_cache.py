@@ -0,0 +1,148 @@
+"""
+GetUserProfile용 2단계 프로필 캐시.
+
+admin_get_user는 느리고 계정 전체 호출 한도가 낮아서, 홈 화면이 동시에 많이 열리면
+TooManyRequestsException이 발생합니다. Cognito 응답(UserAttributes, Username)을
+- 1차: 웜 컨테이너 안의 TTL/LRU 캐시
+- 2차: (선택) DynamoDB 공유 캐시
+에 저장하고, UpdateOnboardingProfile이 프로필을 바꾸면 공유 캐시의 profileVersion을 올려 무효화합니다.
+1차 캐시는 저장할 때의 profileVersion을 함께 기억하고, 조회할 때마다 공유 캐시의 현재 버전(강한
+일관성 읽기)과 같을 때만 사용합니다. 그래서 온보딩 저장 직후의 조회도 바뀐 프로필을 받습니다.
+무효화 수단인 공유 캐시 테이블이 없으면 1차 캐시도 사용하지 않습니다.
+
+DynamoDB 테이블 스키마: 파티션 키 sub (S), TTL 속성 expiresAt
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from botocore.exceptions import ClientError
+
+from aws_clients import get_table
+
+
+def bump_profile_version(table, user_sub):
+    """
+    사용자의 프로필 버전을 올리고 공유 캐시에 저장된 프로필을 지웁니다.
+    """
+    table.update_item(
+        Key={"sub": user_sub},
+        UpdateExpression="ADD profileVersion :one REMOVE userAttributes, userName, cachedVersion",
+        ExpressionAttributeValues={":one": 1},
+    )
+
+
+class ProfileCache:
+    """
+    Cognito admin_get_user 응답 캐시 (프로세스 내 TTL/LRU + 선택적 DynamoDB).
+    """
+
+    def __init__(
+        self,
+        table_name=None,
+        local_ttl_seconds=30,
+        shared_ttl_seconds=3600,
+        max_entries=1024,
+    ):
+        self.table_name = table_name
+        self.local_ttl_seconds = local_ttl_seconds
+        self.shared_ttl_seconds = shared_ttl_seconds
+        self.max_entries = max_entries
+        self._local = OrderedDict()  # sub -> (만료 시각, attributes, username, 버전)
+        self._lock = threading.Lock()
+        self._stats = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+    @property
+    def table(self):
+        return get_table(self.table_name) if self.table_name else None
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _remember(self, user_sub, attributes, username, version):
+        if self.table_name is None:
+            return
+        with self._lock:
+            self._local[user_sub] = (
+                time.monotonic() + self.local_ttl_seconds,
+                attributes,
+                username,
+                version,
+            )
+            self._local.move_to_end(user_sub)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def get(self, user_sub):
+        """
+        (UserAttributes, Username, 캐시 계층, 버전)을 반환합니다.
+        캐시에 없으면 (None, None, "miss", 버전)을 반환하며, 이 버전을 put에 넘겨줍니다.
+        """
+        if self.table is None:
+            self._count("misses")
+            return None, None, "miss", 0
+
+        # 다른 컨테이너에서 올린 버전도 바로 보이도록 강한 일관성으로 읽습니다.
+        item = (
+            self.table.get_item(Key={"sub": user_sub}, ConsistentRead=True).get("Item")
+            or {}
+        )
+        version = int(item.get("profileVersion", 0))
+
+        with self._lock:
+            entry = self._local.get(user_sub)
+            if entry and entry[0] > time.monotonic() and entry[3] == version:
+                self._local.move_to_end(user_sub)
+                self._stats["local_hits"] += 1
+                return entry[1], entry[2], "local", version
+            if entry:
+                del self._local[user_sub]
+
+        if (
+            "userAttributes" in item
+            and int(item.get("cachedVersion", -1)) == version
+            and int(item.get("expiresAt", 0)) > time.time()
+        ):
+            self._count("shared_hits")
+            attributes, username = item["userAttributes"], item["userName"]
+            self._remember(user_sub, attributes, username, version)
+            return attributes, username, "shared", version
+
+        self._count("misses")
+        return None, None, "miss", version
+
+    def put(self, user_sub, attributes, username, version):
+        """
+        Cognito 응답을 캐시에 저장합니다. 조회 이후 버전이 바뀌었다면(동시에 프로필이
+        수정됨) 공유 캐시에는 저장하지 않습니다.
+        """
+        self._remember(user_sub, attributes, username, version)
+        if self.table is None:
+            return
+
+        try:
+            self.table.update_item(
+                Key={"sub": user_sub},
+                UpdateExpression=(
+                    "SET userAttributes = :attributes, userName = :username, "
+                    "cachedVersion = :version, expiresAt = :expires_at"
+                ),
+                ConditionExpression=(
+                    "attribute_not_exists(profileVersion) OR profileVersion = :version"
+                ),
+                ExpressionAttributeValues={
+                    ":attributes": attributes,
+                    ":username": username,
+                    ":version": version,
+                    ":expires_at": int(time.time()) + self.shared_ttl_seconds,
+                },
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
@@ -0,0 +1,89 @@
+"""
+분석 결과 아이템의 압축 저장 형식.
+
+result(후보 목록), timings, tokenUsage를 DynamoDB 맵으로 저장하면 후보마다 속성 이름과
+타입 표기가 반복되어 아이템이 커지고 쓰기 용량(WCU)을 더 씁니다. 압축 형식은 이 필드들을
+이진 속성 resultBlob 하나에 저장합니다.
+
+    resultBlob = 형식 버전(1바이트) + raw deflate(JSON, 버전별 사전 zdict)
+
+결과 JSON은 수백 바이트로 작아서 일반 압축으로는 거의 줄지 않으므로, 자주 나오는 키와 값을
+담은 사전(zdict)을 함께 사용합니다. 사전은 버전마다 고정이며, 바꾸려면 새 버전을 추가하고
+이전 버전 사전은 기존 아이템을 읽을 수 있도록 남겨 둡니다.
+
+decode_item은 resultBlob을 원래 필드로 되돌리므로, 읽는 쪽은 맵 형식(기존 아이템)과
+압축 형식을 구분하지 않고 같은 모양의 아이템을 받습니다.
+"""
+
+import json
+import zlib
+
+from serialization import dumps_bytes
+
+# 압축 형식으로 옮기는 필드
+COMPACT_FIELDS = ("result", "timings", "tokenUsage")
+BLOB_ATTRIBUTE = "resultBlob"
+
+RESULT_BLOB_VERSION = 1
+
+# 버전별 압축 사전 (한 번 배포한 사전은 바꾸지 않습니다)
+_DICTIONARIES = {
+    1: (
+        b'"queueWait":"s3Download":"normalize":"cacheLookup":"encode":"model":'
+        b'"parse":"dynamoWrite":"endToEnd":"inputTokens":"outputTokens":'
+        b'{"timings":{"tokenUsage":{"result":{"candidates":['
+        b'{"name":"Rice","Soup","Stew","Salad","Chicken","Kimchi","Fried",'
+        b'"Noodles","Beef","Pork","Bibimbap","Bulgogi","Tteokbokki",'
+        b'"calories":"protein":"carbs":"fat":},{"name":'
+    ),
+}
+
+
+def encode_payload(payload, version=RESULT_BLOB_VERSION):
+    """
+    dict를 압축 형식 바이트로 인코딩합니다. (Decimal은 serialization 규칙으로 숫자 변환)
+    """
+    compressor = zlib.compressobj(
+        level=9, wbits=-15, memLevel=9, zdict=_DICTIONARIES[version]
+    )
+    return (
+        bytes([version])
+        + compressor.compress(dumps_bytes(payload))
+        + compressor.flush()
+    )
+
+
+def decode_payload(blob):
+    """
+    압축 형식 바이트(또는 boto3 Binary)를 dict로 디코딩합니다.
+    알 수 없는 버전이면 ValueError를 발생시킵니다.
+    """
+    data = bytes(getattr(blob, "value", blob))
+    version = data[0]
+    if version not in _DICTIONARIES:
+        raise ValueError(f"Unknown result blob version: {version}")
+    decompressor = zlib.decompressobj(wbits=-15, zdict=_DICTIONARIES[version])
+    return json.loads(decompressor.decompress(data[1:]) + decompressor.flush())
+
+
+def compact_item(item):
+    """
+    COMPACT_FIELDS를 resultBlob 하나로 옮긴 새 아이템을 반환합니다.
+    """
+    payload = {field: item[field] for field in COMPACT_FIELDS if field in item}
+    if not payload:
+        return item
+    compact = {key: value for key, value in item.items() if key not in payload}
+    compact[BLOB_ATTRIBUTE] = encode_payload(payload)
+    return compact
+
+
+def decode_item(item):
+    """
+    resultBlob이 있으면 원래 필드로 되돌린 아이템을 반환합니다. (맵 형식 아이템은 그대로)
+    """
+    if BLOB_ATTRIBUTE not in item:
+        return item
+    decoded = {key: value for key, value in item.items() if key != BLOB_ATTRIBUTE}
+    decoded.update(decode_payload(item[BLOB_ATTRIBUTE]))
+    return decoded
@@ -0,0 +1,180 @@
+"""
+기존 food-logs 데이터로 일자별 rollup 테이블을 다시 만듭니다.
+
+food-logs 테이블을 병렬 세그먼트로 스캔하여 (user_id, KST 일자)별로 합계를 계산한 뒤
+rollup 행의 합계를 바꾸고 version을 올립니다(캐시된 기간 지문이 무효가 되도록). 기록이 모두
+지워져 계산 결과에 없는 날짜의 행은 삭제하고, GetFoodlog의 ETag가 바뀌도록 다시 계산한
+사용자의 기록 버전을 올립니다. 같은 데이터로 여러 번 실행해도 합계는 같습니다.
+스캔 도중 저장된 기록은 합계에서 빠질 수 있으므로, 트래픽이 적은 시간에 실행하거나
+SaveAnalysis에 ROLLUP_TABLE_NAME을 설정하기 전에 실행하세요.
+
+사용법 (lambda_backend 디렉터리에서):
+    python scripts/backfill_daily_rollups.py --rollup-table food-log-daily
+    python scripts/backfill_daily_rollups.py --rollup-table food-log-daily --user-id <sub> --dry-run
+"""
+
+import argparse
+import os
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.conditions import Attr
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from daily_rollups import (  # noqa: E402
+    LOG_VERSION_DAY,
+    NUTRIENT_FIELDS,
+    bump_log_version,
+    kst_day,
+)
+
+PROJECTION = "user_id, log_id, eaten_at, created_at, " + ", ".join(NUTRIENT_FIELDS)
+
+
+def scan_segment(table, segment, total_segments, user_id=None):
+    """
+    스캔 세그먼트 하나를 읽어 {(user_id, day): 합계} dict를 반환합니다.
+    """
+    totals = defaultdict(lambda: dict.fromkeys(NUTRIENT_FIELDS + ("entry_count",), 0))
+    skipped = 0
+    scan_params = {
+        "ProjectionExpression": PROJECTION,
+        "Segment": segment,
+        "TotalSegments": total_segments,
+    }
+    if user_id:
+        scan_params["FilterExpression"] = Attr("user_id").eq(user_id)
+
+    while True:
+        response = table.scan(**scan_params)
+        for item in response.get("Items", []):
+            try:
+                day = kst_day(item.get("eaten_at") or item["created_at"])
+            except (KeyError, ValueError, TypeError, AttributeError):
+                skipped += 1
+                continue
+            row = totals[(item["user_id"], day)]
+            for field in NUTRIENT_FIELDS:
+                row[field] += int(item.get(field, 0))
+            row["entry_count"] += 1
+        if "LastEvaluatedKey" not in response:
+            break
+        scan_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    if skipped:
+        print(f"segment {segment}: skipped {skipped} items without a valid eaten_at")
+    return totals
+
+
+def existing_days(rollup_table, user_id=None):
+    """
+    rollup 테이블에 있는 (user_id, day) 키 집합을 반환합니다. (사용자별 기록 버전 행 제외)
+    """
+    keys = set()
+    scan_params = {
+        "ProjectionExpression": "user_id, #day",
+        "ExpressionAttributeNames": {"#day": "day"},
+    }
+    if user_id:
+        scan_params["FilterExpression"] = Attr("user_id").eq(user_id)
+
+    while True:
+        response = rollup_table.scan(**scan_params)
+        for item in response.get("Items", []):
+            if item["day"] != LOG_VERSION_DAY:
+                keys.add((item["user_id"], item["day"]))
+        if "LastEvaluatedKey" not in response:
+            return keys
+        scan_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def write_rollup(rollup_table, user_id, day, row):
+    """
+    rollup 행의 합계를 계산한 값으로 바꾸고 version을 올립니다.
+    """
+    fields = NUTRIENT_FIELDS + ("entry_count",)
+    values = {f":{field}": row[field] for field in fields}
+    values[":one"] = 1
+    rollup_table.update_item(
+        Key={"user_id": user_id, "day": day},
+        UpdateExpression="SET "
+        + ", ".join(f"{field} = :{field}" for field in fields)
+        + " ADD #version :one",
+        ExpressionAttributeNames={"#version": "version"},
+        ExpressionAttributeValues=values,
+    )
+
+
+def apply_rollups(rollup_table, totals, user_id=None, workers=4):
+    """
+    계산한 합계로 rollup 행을 갱신하고, 계산 결과에 없는 날짜의 행을 지운 뒤
+    다시 계산한 사용자의 기록 버전을 올립니다. (갱신한 행 수, 지운 행 수)를 반환합니다.
+    """
+    orphaned = existing_days(rollup_table, user_id) - totals.keys()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(
+            executor.map(
+                lambda pair: write_rollup(rollup_table, *pair[0], pair[1]),
+                totals.items(),
+            )
+        )
+    with rollup_table.batch_writer() as batch:
+        for orphan_user_id, day in orphaned:
+            batch.delete_item(Key={"user_id": orphan_user_id, "day": day})
+
+    for changed_user_id in {key[0] for key in totals} | {key[0] for key in orphaned}:
+        bump_log_version(rollup_table, changed_user_id)
+    return len(totals), len(orphaned)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily nutrition rollups")
+    parser.add_argument("--table", default=os.environ.get("TABLE_NAME", "food-logs"))
+    parser.add_argument("--rollup-table", default=os.environ.get("ROLLUP_TABLE_NAME"))
+    parser.add_argument("--segments", type=int, default=4)
+    parser.add_argument("--user-id", help="한 사용자만 다시 계산")
+    parser.add_argument("--dry-run", action="store_true", help="쓰지 않고 결과만 출력")
+    args = parser.parse_args()
+
+    if not args.rollup_table and not args.dry_run:
+        parser.error("--rollup-table (or ROLLUP_TABLE_NAME) is required")
+
+    dynamodb = boto3.resource("dynamodb")
+    table = dynamodb.Table(args.table)
+
+    # 1. 병렬 세그먼트 스캔 후 합치기
+    totals = {}
+    with ThreadPoolExecutor(max_workers=args.segments) as executor:
+        futures = [
+            executor.submit(scan_segment, table, i, args.segments, args.user_id)
+            for i in range(args.segments)
+        ]
+        for future in futures:
+            for key, row in future.result().items():
+                if key in totals:
+                    for field, value in row.items():
+                        totals[key][field] += value
+                else:
+                    totals[key] = row
+
+    print(f"computed {len(totals)} daily rollups from {args.table}")
+    if args.dry_run:
+        for (user_id, day), row in sorted(totals.items()):
+            print(user_id, day, row)
+        return
+
+    # 2. rollup 행 갱신 및 기록이 없어진 날짜의 행 삭제
+    written, deleted = apply_rollups(
+        dynamodb.Table(args.rollup_table), totals, args.user_id, args.segments
+    )
+    print(
+        f"wrote {written} rows and deleted {deleted} orphaned rows in {args.rollup_table}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+기존 food-logs 테이블의 기록을 식사 시각 기준 키를 쓰는 v2 테이블로 복사합니다. (foodlog_keys)
+
+food-logs 테이블을 병렬 세그먼트로 스캔하여 페이지마다 v2 아이템으로 바꿔 씁니다.
+세그먼트별 진행 위치(LastEvaluatedKey)를 체크포인트 파일에 저장하므로, 중간에 멈춰도 같은
+명령으로 다시 실행하면 멈춘 페이지부터 이어서 복사합니다. v2 키는 기존 기록에서 정해지므로
+같은 페이지를 두 번 복사해도 같은 아이템을 덮어쓸 뿐입니다(멱등).
+
+전환 순서:
+1. v2 테이블 생성 (파티션 키 user_id, 정렬 키 entry_key,
+   GSI meal-type-index: 파티션 키 user_meal, 정렬 키 entry_key, 프로젝션 ALL)
+2. SaveAnalysis에 FOODLOG_V2_TABLE_NAME 설정 (이중 쓰기, 이후 새 기록은 양쪽에 저장)
+3. 이 스크립트 실행 (이중 쓰기 전에 저장된 기록 복사)
+4. GetFoodlog에 FOODLOG_V2_TABLE_NAME과 FOODLOG_READ_MODE=shadow 설정, 로그의
+   "missing in v2"가 0인지 확인 (빠진 기록이 있으면 --reset으로 다시 실행)
+5. FOODLOG_READ_MODE=v2로 전환
+
+사용법 (lambda_backend 디렉터리에서):
+    python scripts/migrate_foodlogs_v2.py --v2-table food-logs-v2
+    python scripts/migrate_foodlogs_v2.py --v2-table food-logs-v2 --segments 16 --checkpoint run1.json
+    python scripts/migrate_foodlogs_v2.py --v2-table food-logs-v2 --dry-run
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from foodlog_keys import to_v2_item  # noqa: E402
+
+
+class Checkpoint:
+    """
+    세그먼트별 진행 상태를 JSON 파일로 저장합니다. (여러 스레드에서 호출, path가 None이면 저장 안 함)
+    {"segments": {"0": {"last_key": {...} | null, "done": false, "copied": 0}}}
+    """
+
+    def __init__(self, path, table, v2_table, total_segments, reset=False):
+        self.path = path
+        self._lock = threading.Lock()
+        state = None
+        if path and os.path.exists(path) and not reset:
+            with open(path) as f:
+                state = json.load(f)
+            # 세그먼트 수가 바뀌면 스캔 위치가 맞지 않으므로 이어서 실행할 수 없습니다.
+            if (state["table"], state["v2_table"], state["total_segments"]) != (
+                table,
+                v2_table,
+                total_segments,
+            ):
+                raise SystemExit(
+                    f"{path} was written for {state['table']} -> {state['v2_table']} "
+                    f"with {state['total_segments']} segments; "
+                    "use the same options or --reset"
+                )
+        self.state = state or {
+            "table": table,
+            "v2_table": v2_table,
+            "total_segments": total_segments,
+            "segments": {
+                str(i): {"last_key": None, "done": False, "copied": 0, "skipped": 0}
+                for i in range(total_segments)
+            },
+        }
+
+    def segment(self, segment):
+        return self.state["segments"][str(segment)]
+
+    def advance(self, segment, last_key, copied, skipped):
+        with self._lock:
+            progress = self.segment(segment)
+            progress["last_key"] = last_key
+            progress["done"] = last_key is None
+            progress["copied"] += copied
+            progress["skipped"] += skipped
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        # 중간에 멈춰도 파일이 깨지지 않도록 임시 파일에 쓰고 바꿉니다.
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(temp_path, self.path)
+
+
+def migrate_segment(table, v2_table, segment, checkpoint, page_size, dry_run):
+    """
+    스캔 세그먼트 하나를 체크포인트 위치부터 끝까지 복사합니다.
+    페이지를 v2 테이블에 다 쓴 뒤에 체크포인트를 옮기므로, 멈췄다 다시 실행하면 마지막 페이지를
+    한 번 더 쓸 수는 있어도 빠뜨리지는 않습니다.
+    """
+    progress = checkpoint.segment(segment)
+    if progress["done"]:
+        return
+    scan_params = {
+        "Segment": segment,
+        "TotalSegments": checkpoint.state["total_segments"],
+        "Limit": page_size,
+    }
+    if progress["last_key"]:
+        scan_params["ExclusiveStartKey"] = progress["last_key"]
+
+    while True:
+        response = table.scan(**scan_params)
+        v2_items = []
+        skipped = 0
+        for item in response.get("Items", []):
+            try:
+                v2_items.append(to_v2_item(item))
+            except (KeyError, ValueError, TypeError, AttributeError):
+                skipped += 1
+        if v2_items and not dry_run:
+            with v2_table.batch_writer() as batch:
+                for v2_item in v2_items:
+                    batch.put_item(Item=v2_item)
+
+        last_key = response.get("LastEvaluatedKey")
+        checkpoint.advance(segment, last_key, len(v2_items), skipped)
+        if last_key is None:
+            break
+        scan_params["ExclusiveStartKey"] = last_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy food logs to the v2 table")
+    parser.add_argument("--table", default=os.environ.get("TABLE_NAME", "food-logs"))
+    parser.add_argument("--v2-table", default=os.environ.get("FOODLOG_V2_TABLE_NAME"))
+    parser.add_argument("--segments", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--checkpoint", default="migrate_foodlogs_v2.checkpoint.json")
+    parser.add_argument(
+        "--reset", action="store_true", help="체크포인트를 무시하고 처음부터"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="쓰지 않고 변환만 확인")
+    args = parser.parse_args()
+
+    if not args.v2_table:
+        parser.error("--v2-table (or FOODLOG_V2_TABLE_NAME) is required")
+
+    dynamodb = boto3.resource("dynamodb")
+    table = dynamodb.Table(args.table)
+    v2_table = dynamodb.Table(args.v2_table)
+    # 시험 실행은 진행 위치를 저장하지 않습니다. (실제 실행이 건너뛰지 않도록)
+    checkpoint = Checkpoint(
+        None if args.dry_run else args.checkpoint,
+        args.table,
+        args.v2_table,
+        args.segments,
+        args.reset,
+    )
+    remaining = [
+        segment
+        for segment in range(args.segments)
+        if not checkpoint.segment(segment)["done"]
+    ]
+    print(
+        f"migrating {args.table} -> {args.v2_table}: "
+        f"{len(remaining)}/{args.segments} segments remaining"
+    )
+
+    # 1. 남은 세그먼트를 병렬로 복사 (세그먼트 하나가 실패해도 다른 세그먼트는 계속)
+    started = time.monotonic()
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, len(remaining))) as executor:
+        futures = {
+            executor.submit(
+                migrate_segment,
+                table,
+                v2_table,
+                segment,
+                checkpoint,
+                args.page_size,
+                args.dry_run,
+            ): segment
+            for segment in remaining
+        }
+        for future, segment in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"segment {segment} failed: {e}")
+                failed.append(segment)
+
+    # 2. 결과 요약
+    segments = checkpoint.state["segments"].values()
+    copied = sum(progress["copied"] for progress in segments)
+    skipped = sum(progress["skipped"] for progress in segments)
+    print(
+        f"{'checked' if args.dry_run else 'copied'} {copied} food logs "
+        f"({skipped} skipped without eaten_at/created_at) "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+    if failed:
+        print(f"segments {failed} did not finish; run the same command again to resume")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
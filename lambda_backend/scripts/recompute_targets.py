@@ -0,0 +1,298 @@
+"""
+전체 사용자의 목표 섭취량(custom:target_*)을 다시 계산합니다.
+
+온보딩 때 한 번 계산한 목표는 사용자가 나이를 먹거나 nutrition_goals의 계수
+(MACRO_SPLIT, GOAL_ADJUSTMENTS, ACTIVITY_MULTIPLIERS)를 바꾸면 맞지 않게 됩니다.
+User Pool의 사용자를 페이지 단위로 모두 읽은 뒤 NumPy로 한 번에 계산하고,
+저장된 값과 다른 사용자만 제한된 동시성과 초당 호출 수로 업데이트합니다.
+프로필 정보가 빠졌거나 잘못된 사용자는 건너뛰고 보고서에 개수를 남깁니다.
+
+사용법 (lambda_backend 디렉터리에서):
+    python scripts/recompute_targets.py --user-pool-id <id> --dry-run
+    python scripts/recompute_targets.py --user-pool-id <id> --dry-run --report changes.csv
+    python scripts/recompute_targets.py --user-pool-id <id> --rate 10 --concurrency 4 \\
+        --profile-cache-table profile-cache
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from aws_clients import get_client, get_table  # noqa: E402
+from nutrition_goals import (  # noqa: E402
+    ACTIVITY_MULTIPLIERS,
+    GOAL_ADJUSTMENTS,
+    calculate_nutritional_goals_bulk,
+)
+from profile_cache import bump_profile_version  # noqa: E402
+
+# 계산에 필요한 속성과 비교할 목표 속성 (custom:target_<이름>)
+PROFILE_ATTRIBUTES = [
+    "sub",
+    "birthdate",
+    "gender",
+    "custom:height",
+    "custom:weight",
+    "custom:activity_level",
+    "custom:goal",
+]
+TARGETS = ("calories", "carbs", "protein", "fats")
+TARGET_ATTRIBUTES = [f"custom:target_{name}" for name in TARGETS]
+
+
+class RatePacer:
+    """
+    여러 스레드가 공유하는 호출 간격 제한 (초당 rate회를 넘지 않도록 순서대로 슬롯 배정)
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def iter_users(cognito, user_pool_id):
+    """
+    User Pool의 모든 사용자를 (Username, {속성 이름: 값})으로 페이지 단위로 읽습니다.
+    """
+    params = {
+        "UserPoolId": user_pool_id,
+        "Limit": 60,
+        "AttributesToGet": PROFILE_ATTRIBUTES + TARGET_ATTRIBUTES,
+    }
+    while True:
+        response = cognito.list_users(**params)
+        for user in response.get("Users", []):
+            attributes = {item["Name"]: item["Value"] for item in user["Attributes"]}
+            yield user["Username"], attributes
+        if not response.get("PaginationToken"):
+            break
+        params["PaginationToken"] = response["PaginationToken"]
+
+
+def build_columns(users):
+    """
+    계산에 필요한 값을 열(column) 리스트로 모읍니다.
+    프로필이 완전한 사용자 목록, 열, 건너뛴 사용자 수를 반환합니다.
+    """
+    valid = []
+    columns = {
+        name: []
+        for name in (
+            "birthdate",
+            "height",
+            "weight",
+            "gender",
+            "activity_level",
+            "goal",
+        )
+    }
+    skipped = 0
+    for username, attributes in users:
+        try:
+            birthdate = date.fromisoformat(attributes["birthdate"]).isoformat()
+            height = float(attributes["custom:height"])
+            weight = float(attributes["custom:weight"])
+            gender = attributes["gender"]
+            activity_level = attributes["custom:activity_level"]
+            goal = attributes["custom:goal"]
+        except (KeyError, ValueError, TypeError):
+            skipped += 1
+            continue
+        if activity_level not in ACTIVITY_MULTIPLIERS or goal not in GOAL_ADJUSTMENTS:
+            skipped += 1
+            continue
+        valid.append((username, attributes))
+        columns["birthdate"].append(birthdate)
+        columns["height"].append(height)
+        columns["weight"].append(weight)
+        columns["gender"].append(gender)
+        columns["activity_level"].append(activity_level)
+        columns["goal"].append(goal)
+    return valid, columns, skipped
+
+
+def diff_targets(users, goals):
+    """
+    저장된 custom:target_* 값과 새 목표를 비교하여 바뀐 사용자만 반환합니다.
+    [(Username, sub, {이름: (이전 값 또는 None, 새 값)})]
+    """
+    changes = []
+    for index, (username, attributes) in enumerate(users):
+        changed = {}
+        for name in TARGETS:
+            new_value = int(goals[name][index])
+            stored = attributes.get(f"custom:target_{name}")
+            try:
+                old_value = int(stored) if stored is not None else None
+            except ValueError:
+                old_value = None
+            if old_value != new_value:
+                changed[name] = (old_value, new_value)
+        if changed:
+            changes.append((username, attributes.get("sub", username), changed))
+    return changes
+
+
+def write_changes(changes, user_pool_id, rate, concurrency, profile_cache_table=None):
+    """
+    바뀐 사용자의 목표 속성만 업데이트합니다. 실패한 사용자 수를 반환합니다.
+    """
+    cognito = get_client("cognito-idp")
+    pacer = RatePacer(rate)
+    cache_table = get_table(profile_cache_table) if profile_cache_table else None
+
+    def update(change):
+        username, user_sub, changed = change
+        pacer.wait()
+        try:
+            cognito.admin_update_user_attributes(
+                UserPoolId=user_pool_id,
+                Username=username,
+                UserAttributes=[
+                    {"Name": f"custom:target_{name}", "Value": str(new_value)}
+                    for name, (_, new_value) in changed.items()
+                ],
+            )
+        except Exception as e:
+            print(f"failed to update {username}: {e}")
+            return False
+        if cache_table is not None:
+            try:
+                bump_profile_version(cache_table, user_sub)
+            except Exception as e:
+                print(f"failed to invalidate profile cache for {user_sub}: {e}")
+        return True
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(update, changes))
+    return results.count(False)
+
+
+def print_report(total, skipped, changes, report_path=None):
+    """
+    드라이런 보고서: 바뀔 사용자 수, 영양소별 변경 수, 칼로리 변화량 분포.
+    report_path를 주면 바뀔 사용자별 이전/새 값을 CSV로 저장합니다.
+    """
+    print(f"users: {total}, skipped (incomplete profile): {skipped}")
+    print(f"changed: {len(changes)}, unchanged: {total - skipped - len(changes)}")
+    for name in TARGETS:
+        count = sum(1 for _, _, changed in changes if name in changed)
+        print(f"  target_{name}: {count} users")
+
+    deltas = [
+        changed["calories"][1] - changed["calories"][0]
+        for _, _, changed in changes
+        if "calories" in changed and changed["calories"][0] is not None
+    ]
+    if deltas:
+        print(
+            f"  calories delta: min {min(deltas)}, median {statistics.median(deltas)}, "
+            f"max {max(deltas)}"
+        )
+    missing = sum(
+        1
+        for _, _, changed in changes
+        if any(old is None for old, _ in changed.values())
+    )
+    if missing:
+        print(f"  users without stored targets: {missing}")
+
+    if report_path:
+        with open(report_path, "w", newline="") as output:
+            writer = csv.writer(output)
+            writer.writerow(
+                ["username"]
+                + [f"{name}_{suffix}" for name in TARGETS for suffix in ("old", "new")]
+            )
+            for username, _, changed in changes:
+                row = [username]
+                for name in TARGETS:
+                    row.extend(changed.get(name, ("", "")))
+                writer.writerow(row)
+        print(f"wrote {len(changes)} rows to {report_path}")
+
+
+def recompute(args):
+    # 1. 사용자 읽기
+    started = time.perf_counter()
+    users = list(iter_users(get_client("cognito-idp"), args.user_pool_id))
+    listed = time.perf_counter()
+
+    # 2. 한 번에 계산하고 비교
+    valid, columns, skipped = build_columns(users)
+    changes = []
+    if valid:
+        goals = calculate_nutritional_goals_bulk(
+            columns["birthdate"],
+            columns["height"],
+            columns["weight"],
+            columns["gender"],
+            columns["activity_level"],
+            columns["goal"],
+        )
+        changes = diff_targets(valid, goals)
+    computed = time.perf_counter()
+    print(
+        f"listed {len(users)} users in {listed - started:.1f}s, "
+        f"computed and compared in {(computed - listed) * 1000:.1f}ms"
+    )
+
+    print_report(len(users), skipped, changes, args.report)
+    if args.dry_run or not changes:
+        return changes
+
+    # 3. 바뀐 사용자만 쓰기
+    failed = write_changes(
+        changes,
+        args.user_pool_id,
+        args.rate,
+        args.concurrency,
+        args.profile_cache_table,
+    )
+    print(
+        f"updated {len(changes) - failed}/{len(changes)} users "
+        f"in {time.perf_counter() - computed:.1f}s"
+    )
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute nutritional targets")
+    parser.add_argument("--user-pool-id", default=os.environ.get("USER_POOL_ID"))
+    parser.add_argument(
+        "--profile-cache-table", default=os.environ.get("PROFILE_CACHE_TABLE_NAME")
+    )
+    parser.add_argument(
+        "--rate", type=float, default=10.0, help="updates per second (all threads)"
+    )
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--report", help="바뀔 사용자 목록을 저장할 CSV 경로")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="쓰지 않고 보고서만 출력"
+    )
+    args = parser.parse_args()
+
+    if not args.user_pool_id:
+        parser.error("--user-pool-id (or USER_POOL_ID) is required")
+    recompute(args)
+
+
+if __name__ == "__main__":
+    main()
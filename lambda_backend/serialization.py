@@ -0,0 +1,158 @@
+"""
+API 응답 직렬화.
+
+DynamoDB 리소스가 반환하는 타입(Decimal, set, Binary)을 직렬화하는 한 번의 순회 안에서
+JSON 타입으로 바꿉니다. (정수 Decimal은 int, 나머지는 float, set은 정렬된 리스트,
+바이너리는 base64 문자열) orjson이 설치되어 있으면 orjson으로, 없으면 표준 json으로
+직렬화하며, 변환 함수는 인코더가 모르는 값에만 호출됩니다.
+default=str과 달리 숫자를 문자열이 아닌 숫자로 내보냅니다.
+
+응답 본문이 RESPONSE_COMPRESSION_MIN_BYTES 이상이고 클라이언트가 Accept-Encoding으로
+허용하면 br(brotli 모듈이 있을 때) 또는 gzip으로 압축하여 base64로 반환합니다.
+
+조건부 요청: 핸들러가 본문 대신 버전 값(카운터, updatedAt 등)으로 etag_for를 만들고,
+If-None-Match가 일치하면(etag_matches) 본문을 만들지 않고 not_modified로 304를 반환합니다.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+from decimal import Decimal
+
+from boto3.dynamodb.types import Binary
+
+# 선택적 고속 JSON 백엔드 (Lambda 레이어에 포함된 경우에만 사용)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 이 크기(바이트) 이상인 응답만 압축합니다. 0이면 압축하지 않습니다.
+RESPONSE_COMPRESSION_MIN_BYTES = int(
+    os.environ.get("RESPONSE_COMPRESSION_MIN_BYTES", "1024")
+)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _default(value):
+    """
+    JSON 인코더가 모르는 타입만 호출되는 변환 함수입니다. (정수 Decimal은 int, 나머지는 float)
+    """
+    value_type = type(value)
+    if value_type is Decimal:
+        integral = int(value)
+        return integral if integral == value else float(value)
+    if value_type is set or value_type is frozenset:
+        return sorted(value)
+    if value_type is Binary:
+        return base64.b64encode(value.value).decode("ascii")
+    if value_type is bytes:
+        return base64.b64encode(value).decode("ascii")
+    # datetime 등 그 밖의 타입은 기존 default=str 동작과 같게 문자열로 내보냅니다.
+    return str(value)
+
+
+def dumps_bytes(value):
+    """
+    DynamoDB 값을 UTF-8 JSON 바이트로 직렬화합니다.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(
+        value, default=_default, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def dumps(value):
+    """
+    DynamoDB 값을 JSON 문자열로 직렬화합니다.
+    """
+    return dumps_bytes(value).decode("utf-8")
+
+
+def request_header(event, name):
+    """
+    요청 헤더 값을 대소문자 구분 없이 찾습니다. 없으면 빈 문자열을 반환합니다.
+    """
+    headers = (event or {}).get("headers") or {}
+    name = name.lower()
+    return (
+        next((value for key, value in headers.items() if key.lower() == name), "") or ""
+    )
+
+
+def accepted_encodings(event):
+    """
+    요청의 Accept-Encoding 헤더에서 허용된 인코딩 집합을 반환합니다.
+    """
+    header = request_header(event, "accept-encoding")
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            encodings.add(name.lower())
+    return encodings
+
+
+def etag_for(*parts):
+    """
+    버전 값들로 약한 ETag를 만듭니다. 압축 여부와 관계없이 같은 내용이면 같은 값입니다.
+    """
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode("utf-8"))
+    return f'W/"{digest.hexdigest()[:20]}"'
+
+
+def etag_matches(event, etag):
+    """
+    요청의 If-None-Match가 etag와 일치하는지 약한 비교로 확인합니다. ('*'는 항상 일치)
+    """
+    header = request_header(event, "if-none-match")
+    if not header or not etag:
+        return False
+    current = etag.removeprefix("W/")
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == current:
+            return True
+    return False
+
+
+def not_modified(etag, headers=None):
+    """
+    본문 없는 304 Not Modified 응답을 만듭니다.
+    """
+    return {"statusCode": 304, "headers": {**(headers or {}), "ETag": etag}, "body": ""}
+
+
+def json_response(status_code, body, headers=None, event=None):
+    """
+    API Gateway 응답을 만듭니다. event를 넘기면 Accept-Encoding에 따라 본문을 압축합니다.
+    """
+    raw = dumps_bytes(body)
+    response_headers = dict(headers or {})
+    response = {"statusCode": status_code, "headers": response_headers}
+
+    if event is not None and 0 < RESPONSE_COMPRESSION_MIN_BYTES <= len(raw):
+        encodings = accepted_encodings(event)
+        compressed = None
+        if brotli is not None and "br" in encodings:
+            compressed, encoding = brotli.compress(raw, quality=BROTLI_QUALITY), "br"
+        elif "gzip" in encodings:
+            compressed, encoding = gzip.compress(raw, GZIP_LEVEL, mtime=0), "gzip"
+        if compressed is not None:
+            response_headers["Content-Encoding"] = encoding
+            response_headers["Vary"] = "Accept-Encoding"
+            response["body"] = base64.b64encode(compressed).decode("ascii")
+            response["isBase64Encoded"] = True
+            return response
+
+    response["body"] = raw.decode("utf-8")
+    return response